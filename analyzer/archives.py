@@ -0,0 +1,154 @@
+import io
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple, Union
+from .models import AnalysisReport, ArchiveSummary
+
+# Archives are scanned in place: member .py files are decompressed straight
+# into memory and analyzed as text, never extracted to disk. Reports name
+# members "archive!member" ("dist/pkg.whl!pkg/__init__.py"), and nested
+# archives chain the same way ("src.tar.gz!vendor/lib.zip!lib/mod.py").
+
+ZIP_SUFFIXES = (".whl", ".zip", ".egg")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+def _read_errors() -> tuple:
+    """What a corrupt, encrypted or oddly compressed archive raises while being read."""
+    # zipfile/tarfile load on first use, like the other decompression modules
+    import zlib
+    import tarfile
+    import zipfile
+    return (OSError, EOFError, RuntimeError, NotImplementedError, zlib.error, zipfile.BadZipFile, tarfile.TarError)
+
+@dataclass
+class ArchiveLimits:
+    max_member_bytes: int = 8 * 1024 * 1024  # larger .py members are reported, not analyzed
+    max_archive_bytes: int = 256 * 1024 * 1024  # decompressed bytes read per top-level archive, nesting included
+    max_depth: int = 2  # archive-in-archive levels opened (0: none)
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ZIP_SUFFIXES + TAR_SUFFIXES)
+
+def collect_archives(directory: str) -> List[str]:
+    """Recursively list archives under directory."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if is_archive(file):
+                paths.append(os.path.join(root, file))
+    return paths
+
+def _error_report(file_path: str, error: str) -> AnalysisReport:
+    return AnalysisReport(file_path=file_path, total_score=0, obfuscation_level="ERROR", error=error)
+
+def _read(f: Optional[BinaryIO], limit: int) -> bytes:
+    if f is None:
+        return b""
+    with f:
+        return f.read(limit)
+
+def _entries(source: Union[str, BinaryIO]) -> Iterator[Tuple[str, int, Callable[[int], bytes]]]:
+    """(name, declared size, read(limit)) per regular member, in archive order."""
+    import tarfile
+    import zipfile
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    yield info.filename, info.file_size, lambda limit, info=info: _read(zf.open(info), limit)
+        return
+    if not isinstance(source, str):
+        source.seek(0)
+    try:
+        # stream mode reads compressed tars front to back once, without seeking
+        tf = tarfile.open(source, "r|*") if isinstance(source, str) else tarfile.open(fileobj=source, mode="r|*")
+    except tarfile.TarError:
+        raise ValueError("Unsupported archive (expected zip or tar)")
+    with tf:
+        for member in tf:
+            if member.isfile():
+                yield member.name, member.size, lambda limit, member=member: _read(tf.extractfile(member), limit)
+
+class _LimitReached(Exception):
+    pass
+
+def iter_members(path: str, limits: ArchiveLimits, summary: ArchiveSummary,
+                 label: Optional[str] = None) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """Yield (label, data, error) for every .py member of the archive at path, nested archives included.
+
+    Labels start with label (default: path). summary collects bytes read and
+    nested archives opened. When the archive can't be read, or
+    max_archive_bytes runs out, the scan stops with an error for the archive
+    itself, which summary.error repeats. The same archive and limits always
+    give the same sequence.
+    """
+    label = label or path
+    try:
+        yield from _walk(path, label, limits, summary, 0)
+    except (_LimitReached, ValueError, *_read_errors()) as e:
+        summary.error = str(e) or type(e).__name__
+        yield label, None, summary.error
+
+def _walk(source: Union[str, BinaryIO], label: str, limits: ArchiveLimits, summary: ArchiveSummary,
+          depth: int) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    for name, size, read in _entries(source):
+        nested = is_archive(name)
+        if not (nested or name.endswith(".py")):
+            continue
+        member = f"{label}!{name}"
+        if nested and depth >= limits.max_depth:
+            yield member, None, f"Nested archive too deep (limit {limits.max_depth})"
+            continue
+        if not nested and size > limits.max_member_bytes:
+            yield member, None, f"Member too large ({size} bytes)"
+            continue
+        remaining = limits.max_archive_bytes - summary.bytes_read
+        if size > remaining:
+            raise _LimitReached(f"Archive size limit reached ({limits.max_archive_bytes} bytes)")
+        limit = remaining if nested else min(limits.max_member_bytes, remaining)
+        try:
+            # declared sizes can lie (zip bombs); never read past the limit
+            data = read(limit + 1)
+        except _read_errors() as e:
+            yield member, None, str(e) or type(e).__name__
+            continue
+        summary.bytes_read += len(data)
+        if len(data) > remaining:
+            raise _LimitReached(f"Archive size limit reached ({limits.max_archive_bytes} bytes)")
+        if len(data) > limit:
+            yield member, None, f"Member too large (over {limits.max_member_bytes} bytes)"
+        elif not nested:
+            yield member, data, None
+        else:
+            summary.nested += 1
+            try:
+                yield from _walk(io.BytesIO(data), member, limits, summary, depth + 1)
+            except (ValueError, *_read_errors()) as e:
+                yield member, None, str(e) or type(e).__name__
+
+def decode_member(data: bytes) -> str:
+    # decoded as analyze_file reads a loose file (universal newlines), so offsets match
+    return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="ignore").read()
+
+def scan_archive(analyze: Callable[[str, str], AnalysisReport], path: str,
+                 limits: Optional[ArchiveLimits] = None) -> Tuple[List[AnalysisReport], ArchiveSummary]:
+    """Analyze every .py member of an archive with analyze(code, label); returns the reports and a summary.
+
+    Members that can't be analyzed (too large, nested too deep, unreadable)
+    get ERROR reports, so every .py member shows up in the results.
+    """
+    limits = limits or ArchiveLimits()
+    summary = ArchiveSummary(archive=path)
+    try:
+        summary.size = os.path.getsize(path)
+    except OSError:
+        pass  # iter_members reports it
+    reports = []
+    for label, data, error in iter_members(path, limits, summary):
+        if data is None:
+            report = _error_report(label, error)
+        else:
+            report = analyze(decode_member(data), label)
+        summary.add(report)
+        reports.append(report)
+    return reports, summary
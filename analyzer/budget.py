@@ -0,0 +1,80 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+try:
+    import resource
+    HAVE_RESOURCE = True
+except ImportError:  # Windows
+    HAVE_RESOURCE = False
+
+# Peak memory of ast.parse per byte of source, measured on the stdlib
+# (60-90x) with headroom for denser code
+AST_MEMORY_PER_BYTE = 100
+
+@dataclass
+class AnalysisBudget:
+    """Per-file resource limits; a limit of 0 disables it."""
+    wall_time: float = 30.0  # seconds for the whole file, decoded layers included
+    max_memory_mb: int = 1024  # estimated peak for in-process stages; hard RLIMIT_AS in workers
+    max_ast_nodes: int = 2_000_000
+    max_decoded_bytes: int = 32 * 1024 * 1024  # total output of layer peeling (base64/hex/decompression)
+
+class BudgetTracker:
+    """Budget state for one analysis; records which stages were cut short.
+
+    Trackers for decoded layers come from child(): they share the parent's
+    deadline and decoded-bytes allowance but record their own cut stages.
+    """
+
+    def __init__(self, budget: AnalysisBudget, parent: Optional["BudgetTracker"] = None):
+        self.budget = budget
+        self.root: "BudgetTracker" = parent.root if parent else self
+        if parent is not None:
+            self.deadline = parent.deadline
+        else:
+            self.deadline: Optional[float] = time.monotonic() + budget.wall_time if budget.wall_time else None
+        self.decoded_left = budget.max_decoded_bytes
+        self.cut: List[str] = []
+
+    def child(self) -> "BudgetTracker":
+        return BudgetTracker(self.budget, self)
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def fits_memory(self, estimated_bytes: int) -> bool:
+        return not self.budget.max_memory_mb or estimated_bytes <= self.budget.max_memory_mb * 1024 * 1024
+
+    def decode_allowance(self) -> Optional[int]:
+        """Decoded bytes still allowed for this file (None = unlimited)."""
+        return max(self.root.decoded_left, 0) if self.budget.max_decoded_bytes else None
+
+    def spend_decoded(self, n: int):
+        self.root.decoded_left -= n
+
+    def cut_stage(self, *stages: str):
+        for stage in stages:
+            if stage not in self.cut:
+                self.cut.append(stage)
+
+def limit_process_memory(max_memory_mb: int):
+    """Cap this process's address space at its current size plus max_memory_mb.
+
+    Used in worker processes so a runaway allocation raises MemoryError
+    (turned into a partial or error report) instead of exhausting the host.
+    No-op where RLIMIT_AS or /proc isn't available.
+    """
+    if not max_memory_mb or not HAVE_RESOURCE or not hasattr(resource, "RLIMIT_AS"):
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return  # no way to measure the baseline (not Linux)
+    limit = current + max_memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
@@ -0,0 +1,142 @@
+import os
+import glob
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Dict, Optional
+from .models import AnalysisReport
+
+logger = logging.getLogger("analyzer")
+
+# Bump to invalidate every cached result regardless of source changes
+CACHE_VERSION = 1
+
+_PKG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose code decides what a report contains
+_RULE_SOURCES = [
+    "core.py",
+    "context.py",
+    "models.py",
+    "scoring.py",
+    "deobfuscator.py",
+    "layers.py",
+    "scanner.py",
+    "entropy.py",
+    "registry.py",
+    os.path.join("detectors", "*.py"),
+]
+
+_fingerprint: Optional[str] = None
+
+def rules_fingerprint() -> str:
+    """Hash of the detector/scoring sources, so any rule change invalidates cached results."""
+    global _fingerprint
+    if _fingerprint is None:
+        h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+        for pattern in _RULE_SOURCES:
+            for path in sorted(glob.glob(os.path.join(_PKG_DIR, pattern))):
+                h.update(os.path.relpath(path, _PKG_DIR).encode())
+                with open(path, 'rb') as f:
+                    h.update(f.read())
+        _fingerprint = h.hexdigest()[:16]
+    return _fingerprint
+
+def content_hash(code: str, variant: str = "") -> str:
+    """Cache key for code; variant names a non-default detector selection."""
+    h = hashlib.sha256(code.encode('utf-8', errors='surrogatepass'))
+    if variant:
+        h.update(b"\0" + variant.encode())
+    return h.hexdigest()
+
+class ResultCache:
+    """Two-tier report cache: bounded in-process LRU backed by an optional SQLiteStorage table.
+
+    Entries are keyed by content hash; the rules fingerprint is part of the
+    persistent key so results from older detector versions are never served.
+    """
+
+    def __init__(self, max_entries: int = 1024, storage=None):
+        self.max_entries = max_entries
+        self.storage = storage
+        self.fingerprint = rules_fingerprint()
+        self._lru: "OrderedDict[str, AnalysisReport]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.storage is not None:
+            # drop rows written by other detector versions
+            purged = self.storage.purge_cache(self.fingerprint)
+            if purged:
+                logger.info(f"Purged {purged} stale cache entries")
+
+    def get(self, key: str, file_path: str) -> Optional[AnalysisReport]:
+        """Return a copy of the cached report relabelled with file_path, or None."""
+        with self._lock:
+            report = self._lru.get(key)
+            if report is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+
+        if report is None and self.storage is not None:
+            data = self.storage.get_cached_report(key, self.fingerprint)
+            if data is not None:
+                report = AnalysisReport.from_dict(data)
+                self._remember(key, report)
+                with self._lock:
+                    self.persistent_hits += 1
+
+        if report is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        return replace(
+            report,
+            file_path=file_path,
+            findings=list(report.findings),
+            score_breakdown=list(report.score_breakdown)
+        )
+
+    def put(self, key: str, report: AnalysisReport):
+        # prefilter verdicts are cheaper to recompute than to store, and must
+        # not be served to a non-tiered analyzer; a budget-limited result may
+        # be complete next time
+        if report.error or report.prefiltered or report.partial:
+            return
+        # stage timings describe one run, not the content
+        if report.stages:
+            report = replace(report, stages=[])
+        self._remember(key, report)
+        if self.storage is not None:
+            self.storage.put_cached_report(key, self.fingerprint, report)
+
+    def _remember(self, key: str, report: AnalysisReport):
+        with self._lock:
+            self._lru[key] = report
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.persistent_hits + self.misses
+            return {
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "hit_rate": round((self.hits + self.persistent_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,88 @@
+import ast
+import bisect
+from typing import List, Optional
+from .scanner import SpanTable
+
+class AnalysisContext:
+    """Per-input state shared by all detectors so the source is only parsed/encoded once."""
+
+    def __init__(self, code: str, file_path: str = "Input Text"):
+        self.code = code
+        self.file_path = file_path
+        self._raw: Optional[bytes] = None
+        self._tree: Optional[ast.AST] = None
+        self._parsed = False
+        self._parse_error: Optional[Exception] = None
+        self._line_starts: Optional[List[int]] = None
+        self._spans: Optional[SpanTable] = None
+        self._tokens: Optional[list] = None
+        self._tokenized = False
+
+    @property
+    def raw(self) -> bytes:
+        """UTF-8 bytes of the source (undecodable chars dropped)."""
+        if self._raw is None:
+            self._raw = self.code.encode('utf-8', errors='ignore')
+        return self._raw
+
+    @property
+    def tree(self) -> Optional[ast.AST]:
+        """Parsed module, or None if the source does not parse."""
+        if not self._parsed:
+            self._parsed = True
+            try:
+                self._tree = ast.parse(self.code)
+            except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+                # ValueError: source contains null bytes; RecursionError/
+                # MemoryError: nesting or size beyond what the parser handles
+                self._parse_error = e
+        return self._tree
+
+    def skip_parse(self):
+        """Treat the source as unparsed without parsing it (over a memory budget)."""
+        self._parsed = True
+
+    @property
+    def parse_exhausted(self) -> bool:
+        """Parsing failed for lack of resources rather than bad syntax."""
+        return isinstance(self.parse_error, (RecursionError, MemoryError))
+
+    @property
+    def parse_error(self) -> Optional[Exception]:
+        self.tree
+        return self._parse_error
+
+    @property
+    def spans(self) -> SpanTable:
+        """Base64/hex/chr() spans from one scan of the source, with cached decodes."""
+        if self._spans is None:
+            self._spans = SpanTable(self.code)
+        return self._spans
+
+    @property
+    def tokens(self) -> Optional[list]:
+        """Token stream (tokenize.TokenInfo list) of the source, or None if it does not tokenize."""
+        if not self._tokenized:
+            self._tokenized = True
+            import io, tokenize  # only plugins that declare TOKENS pay for this
+            try:
+                self._tokens = list(tokenize.generate_tokens(io.StringIO(self.code).readline))
+            except (tokenize.TokenError, SyntaxError, ValueError):
+                pass
+        return self._tokens
+
+    @property
+    def line_starts(self) -> List[int]:
+        """Character offset of the start of every line."""
+        if self._line_starts is None:
+            starts = [0]
+            pos = self.code.find('\n')
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = self.code.find('\n', pos + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def line_of(self, offset: int) -> int:
+        """1-based line number containing the given character offset."""
+        return bisect.bisect_right(self.line_starts, offset)
@@ -1,21 +1,103 @@
-from typing import List, Optional
-from .models import AnalysisReport, Finding, ScoreBreakdown
-from .detectors.ast_detectors import ASTDetector
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .models import AnalysisReport, ArchiveSummary, Finding, ScoreBreakdown
 from .detectors.static_detectors import StaticDetector
-from .detectors.heuristic_detectors import HeuristicDetector
+from . import registry
 from .scoring import ScoringEngine
 from .deobfuscator import SafeDeobfuscator
+from .context import AnalysisContext
+from .detectors.walker import walk
+from .largefile import LargeFileScanner
+from .layers import Layer
+from .budget import AST_MEMORY_PER_BYTE, AnalysisBudget, BudgetTracker
+from .prefilter import Prefilter
+from .instrument import StageRecorder, stage
 import os
+import time
+
+if TYPE_CHECKING:
+    from .cache import ResultCache
+    from .archives import ArchiveLimits
+
+# Rough end-to-end AST pipeline throughput, used to decide whether a large
+# file's AST stages fit in the time budget before starting them
+AST_BYTES_PER_SEC = 1.5 * 1024 * 1024
 
 class Analyzer:
-    def __init__(self):
-        self.ast_detector = ASTDetector()
+    def __init__(self, cache: Optional["ResultCache"] = None, ast_size_budget: int = 8 * 1024 * 1024,
+                 ast_time_budget: float = 10.0, max_layer_depth: int = 3, layer_time_budget: float = 5.0,
+                 budget: Optional[AnalysisBudget] = None, profile: Optional[str] = None,
+                 detectors: Optional[Iterable[str]] = None, tiered: bool = False, instrument: bool = False):
+        self.cache = cache
+        # instrument: reports carry per-stage wall/CPU time and work counters
+        # (report.stages); results are otherwise unchanged
+        self.instrument = instrument
+        self._recorder: Optional[StageRecorder] = None
+        # tiered mode: a byte-level prefilter gives clearly benign files a LOW
+        # verdict (report.prefiltered) and only candidates get full analysis;
+        # large-file mode always runs in full
+        self.tiered = tiered
+        self.prefilter = Prefilter() if tiered else None
+        # which registered detectors run: every one within the profile's cost,
+        # or exactly the named ones; inputs none of them need are never built
+        self.profile = profile or registry.DEFAULT_PROFILE
+        self.detector_names = list(detectors) if detectors is not None else None
+        self.detectors = registry.select(self.profile, self.detector_names)
+        self.needs = registry.needs_of(self.detectors)
+        self.cache_variant = registry.variant(self.detectors)
+        # per-file wall time/memory/AST node/decoded byte limits; stages that
+        # hit one stop early and are listed in the report's skipped_stages
+        self.budget = budget or AnalysisBudget()
+        self._tracker: Optional[BudgetTracker] = None
+        # large-file mode: AST stages run only for files up to ast_size_budget
+        # bytes whose estimated parse time fits in ast_time_budget seconds
+        self.ast_size_budget = ast_size_budget
+        self.ast_time_budget = ast_time_budget
+        # decoded Python layers are analyzed recursively, up to max_layer_depth
+        # levels deep and layer_time_budget seconds for the whole tree
+        self.max_layer_depth = max_layer_depth
+        self.layer_time_budget = layer_time_budget
+        self._layer_depth = 0
+        self._layer_deadline: Optional[float] = None
+        # also used by the large-file scanner and for layer findings
         self.static_detector = StaticDetector()
-        self.heuristic_detector = HeuristicDetector()
+        self._instances: Dict[str, object] = {}
+        for spec in self.detectors:
+            if spec.kind == registry.LAYERS:
+                continue
+            self._instances[spec.name] = self.static_detector if spec.name == "static" else spec.create()
+        self._visitors = [spec.name for spec in self.detectors if spec.kind == registry.VISITOR]
+        self._run_layers = any(spec.kind == registry.LAYERS for spec in self.detectors)
         self.scoring_engine = ScoringEngine()
         self.deobfuscator = SafeDeobfuscator()
+        self.large_file_scanner = LargeFileScanner(self.static_detector, self.deobfuscator)
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies what produces this analyzer's reports: rule sources plus result-changing options."""
+        from .cache import rules_fingerprint
+        parts = [rules_fingerprint()]
+        if self.cache_variant:
+            parts.append(self.cache_variant)
+        if self.tiered:
+            parts.append("tiered")
+        return "/".join(parts)
+
+    def analyze_file(self, file_path: str, max_size: Optional[int] = None) -> AnalysisReport:
+        # files over max_size are analyzed in bounded-memory large-file mode
+        if max_size is not None:
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                size = 0 # let open() below report the error
+            if size > max_size:
+                try:
+                    if self.instrument:
+                        return self._instrumented(self._analyze_large, file_path, size)
+                    return self._analyze_large(file_path, size)
+                except Exception as e:
+                    return AnalysisReport(file_path=file_path, total_score=0, obfuscation_level="ERROR", error=str(e))
 
-    def analyze_file(self, file_path: str) -> AnalysisReport:
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 code = f.read()
@@ -24,25 +106,245 @@ class Analyzer:
 
         return self.analyze_text(code, file_path)
 
+    def analyze_many(self, paths: Iterable[str], workers: int = 1, max_size: Optional[int] = None) -> Iterator[AnalysisReport]:
+        """Analyze many files, yielding reports as they finish.
+
+        With workers > 1 the files are spread over a process pool (one warm
+        Analyzer per worker) and reports arrive in completion order.
+        """
+        if workers <= 1:
+            for path in paths:
+                yield self.analyze_file(path, max_size=max_size)
+            return
+
+        from .parallel import analyze_parallel
+        yield from analyze_parallel(paths, workers, max_size=max_size, **self._worker_options())
+
+    def scan_archives(self, paths: Iterable[str], limits: Optional["ArchiveLimits"] = None,
+                      workers: int = 1) -> Iterator[Tuple[List[AnalysisReport], ArchiveSummary]]:
+        """Scan archives in place (see archives.scan_archive), yielding (member reports, summary) per archive.
+
+        With workers > 1 each archive goes to a pool worker as a whole, and
+        archives arrive in completion order.
+        """
+        from .archives import ArchiveLimits, scan_archive
+        limits = limits or ArchiveLimits()
+        if workers <= 1:
+            for path in paths:
+                yield scan_archive(self.analyze_text, path, limits)
+            return
+
+        from .parallel import scan_archives_parallel
+        yield from scan_archives_parallel(paths, workers, limits, **self._worker_options())
+
+    def _worker_options(self) -> Dict[str, Any]:
+        """How to build this analyzer's twin in a pool worker."""
+        options = {"ast_size_budget": self.ast_size_budget, "ast_time_budget": self.ast_time_budget,
+                   "max_layer_depth": self.max_layer_depth, "layer_time_budget": self.layer_time_budget,
+                   "budget": self.budget, "profile": self.profile, "detectors": self.detector_names,
+                   "tiered": self.tiered, "instrument": self.instrument}
+        storage = self.cache.storage if self.cache is not None else None
+        return {"cache_entries": self.cache.max_entries if self.cache is not None else None, "analyzer_options": options,
+                "cache_db": storage.db_path if storage is not None else None}
+
     def analyze_text(self, code: str, file_path: str = "Input Text") -> AnalysisReport:
-        all_findings: List[Finding] = []
+        if self.instrument and self._recorder is None:
+            return self._instrumented(self._analyze_text, code, file_path)
+        return self._analyze_text(code, file_path)
+
+    def _instrumented(self, analyze, *args) -> AnalysisReport:
+        """Run one top-level analysis with a StageRecorder and attach its timings."""
+        self._recorder = StageRecorder()
+        try:
+            with self._recorder.stage("total"):
+                report = analyze(*args)
+            return replace(report, stages=self._recorder.timings())
+        finally:
+            self._recorder = None
+
+    def _analyze_text(self, code: str, file_path: str) -> AnalysisReport:
+        context = AnalysisContext(code, file_path)
+        # decoded layers are suspicious by definition, so only top-level input is prefiltered
+        if self.prefilter is not None and self._layer_depth == 0:
+            with stage(self._recorder, "prefilter", len(context.raw)):
+                benign = self.prefilter.check(context.raw) is None
+            if benign:
+                return AnalysisReport(file_path=file_path, total_score=0, obfuscation_level="LOW", prefiltered=True)
+
+        if self.cache is None:
+            return self._analyze(code, file_path, context)
+
+        from .cache import content_hash
+        with stage(self._recorder, "cache"):
+            key = content_hash(code, self.cache_variant)
+            report = self.cache.get(key, file_path)
+        if report is None:
+            report = self._analyze(code, file_path, context)
+            self.cache.put(key, report)
+        return report
+
+    def _analyze_large(self, file_path: str, size: int) -> AnalysisReport:
+        """Chunked static stage over an mmap; AST stages only if the budget allows."""
+        started = time.monotonic()
+        tracker = BudgetTracker(self.budget)
+        results: Dict[str, List[Finding]] = {}
+        preview = ""
+        if "static" in self._instances:
+            with stage(self._recorder, "static", size):
+                results["static"], preview = self.large_file_scanner.scan(file_path, tracker)
+
+        # the remaining detectors (layer peeling included) need the whole source in memory
+        others = [spec.name for spec in self.detectors if spec.name != "static"]
+        remaining = self.ast_time_budget - (time.monotonic() - started)
+        if others and (size <= self.ast_size_budget and size / AST_BYTES_PER_SEC <= remaining
+                       and tracker.fits_memory(size * AST_MEMORY_PER_BYTE) and not tracker.expired()):
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                code = f.read()
+            context = AnalysisContext(code, file_path)
+            if self._visitors:
+                results.update(self._run_ast_stages(context, tracker))
+                if not preview and self._visitors[0] not in tracker.cut:
+                    with stage(self._recorder, "preview"):
+                        preview = self.deobfuscator.preview_chr(code, context)
+            self._run_text_stages(code, context, tracker, results, skip=("static",))
+            if self._run_layers:
+                with stage(self._recorder, "layers", len(context.raw)):
+                    results["layers"] = self._analyze_layers(context, tracker)[1]
+        elif others:
+            tracker.cut_stage(*others)
+            if self._visitors:
+                tracker.cut_stage("chr_assembly")
+
+        all_findings = self._collect(results)
+        with stage(self._recorder, "score"):
+            score, breakdown = self.scoring_engine.calculate_score(all_findings)
+        return AnalysisReport(
+            file_path=file_path,
+            total_score=score,
+            obfuscation_level=self.scoring_engine.get_level(score),
+            findings=all_findings,
+            score_breakdown=breakdown,
+            safe_preview=preview if preview else None,
+            partial=bool(tracker.cut),
+            skipped_stages=tracker.cut
+        )
+
+    def _collect(self, results: Dict[str, List[Finding]]) -> List[Finding]:
+        """Findings in registry order, whatever order the stages ran in."""
+        findings: List[Finding] = []
+        for spec in self.detectors:
+            findings.extend(results.get(spec.name, ()))
+        return findings
+
+    def _run_ast_stages(self, context: AnalysisContext, tracker: BudgetTracker) -> Dict[str, List[Finding]]:
+        """Parse (if it fits the time/memory budget) and walk once for every selected visitor detector."""
+        recorder = self._recorder
+        visitors = [self._instances[name] for name in self._visitors]
+        for visitor in visitors:
+            visitor.reset()
+        # parsing can't be interrupted, so don't start one that can't fit
+        too_slow = tracker.deadline is not None and len(context.raw) / AST_BYTES_PER_SEC > tracker.deadline - time.monotonic()
+        if too_slow or not tracker.fits_memory(len(context.raw) * AST_MEMORY_PER_BYTE):
+            context.skip_parse()
+            tracker.cut_stage(*self._visitors)
+            return {}
+        with stage(recorder, "parse", len(context.raw)):
+            exhausted = context.parse_exhausted
+        if exhausted:
+            tracker.cut_stage(*self._visitors)
+            return {}
+        if context.tree is not None:
+            stats = {} if recorder is not None else None
+            try:
+                with stage(recorder, "walk"):
+                    complete = walk(context.tree, visitors, max_nodes=self.budget.max_ast_nodes,
+                                    deadline=tracker.deadline, stats=stats)
+            except MemoryError:
+                complete = False
+            if not complete:
+                # keep what was found before the cut
+                tracker.cut_stage(*self._visitors)
+            if recorder is not None:
+                self._record_hooks(recorder, stats, len(context.raw))
+        results: Dict[str, List[Finding]] = {}
+        for name, visitor in zip(self._visitors, visitors):
+            with stage(recorder, name):
+                results[name] = visitor.finish(context)
+        return results
+
+    def _record_hooks(self, recorder: StageRecorder, stats: Dict, nbytes: int):
+        """Move the time visitors spent in their hooks from "walk" to their own stages.
+
+        Hooks are timed with the wall clock only; they are pure Python, so it
+        counts as CPU time too.
+        """
+        walk_timing = recorder.get("walk")
+        walk_timing.ast_nodes += stats.get("nodes", 0)
+        for name, seconds in zip(self._visitors, stats.get("hook_seconds") or ()):
+            ms = seconds * 1000
+            walk_timing.wall_ms = max(0.0, walk_timing.wall_ms - ms)
+            walk_timing.cpu_ms = max(0.0, walk_timing.cpu_ms - ms)
+            timing = recorder.get(name)
+            timing.wall_ms += ms
+            timing.cpu_ms += ms
+            timing.bytes += nbytes
+
+    def _run_text_stages(self, code: str, context: AnalysisContext, tracker: BudgetTracker,
+                         results: Dict[str, List[Finding]], skip: Tuple[str, ...] = ()):
+        for spec in self.detectors:
+            if spec.kind != registry.TEXT_SCAN or spec.name in skip:
+                continue
+            if tracker.expired():
+                tracker.cut_stage(spec.name)
+                continue
+            try:
+                with stage(self._recorder, spec.name, len(context.raw)):
+                    results[spec.name] = self._instances[spec.name].analyze(code, context, tracker)
+            except MemoryError:
+                tracker.cut_stage(spec.name)
+
+    def _analyze(self, code: str, file_path: str, context: Optional[AnalysisContext] = None) -> AnalysisReport:
+        # parse/encode once, shared by every stage below
+        context = context or AnalysisContext(code, file_path)
+        if registry.AST not in self.needs:
+            # nothing selected needs the tree (this also drops the chr() preview)
+            context.skip_parse()
+        # decoded layers analyzed through analyze_text share the top-level deadline
+        tracker = self._tracker.child() if self._tracker is not None else BudgetTracker(self.budget)
+        recorder = self._recorder
+        if recorder is not None:
+            # build shared inputs up front so their cost isn't billed to the first detector using them
+            if registry.SPANS in self.needs:
+                with recorder.stage("scan", len(context.raw)) as timing:
+                    timing.regex_matches += len(context.spans.spans)
+            if registry.TOKENS in self.needs:
+                with recorder.stage("tokenize", len(context.raw)):
+                    context.tokens
 
         # 1. Run Detectors
-        # AST
-        all_findings.extend(self.ast_detector.analyze(code))
-        
-        # Static
-        all_findings.extend(self.static_detector.analyze(code))
-        
-        # Heuristic
-        all_findings.extend(self.heuristic_detector.analyze(code))
+        # visitor detectors (AST, heuristic, plugins) share a single tree walk
+        results: Dict[str, List[Finding]] = {}
+        if self._visitors:
+            results.update(self._run_ast_stages(context, tracker))
+
+        # Static and other text scanners
+        self._run_text_stages(code, context, tracker, results)
+
+        # Encoded layers; decoded Python is analyzed like any other source
+        layers: List[Layer] = []
+        if self._run_layers:
+            with stage(recorder, "layers", len(context.raw)):
+                layers, results["layers"] = self._analyze_layers(context, tracker)
+        all_findings = self._collect(results)
 
         # 2. Score
-        score, breakdown = self.scoring_engine.calculate_score(all_findings)
-        level = self.scoring_engine.get_level(score)
+        with stage(recorder, "score"):
+            score, breakdown = self.scoring_engine.calculate_score(all_findings)
+            level = self.scoring_engine.get_level(score)
 
         # 3. Deobfuscate Preview
-        preview = self.deobfuscator.try_deobfuscate(code)
+        with stage(recorder, "preview"):
+            preview = self.deobfuscator.try_deobfuscate(code, context, layers)
 
         return AnalysisReport(
             file_path=file_path,
@@ -50,5 +352,60 @@ class Analyzer:
             obfuscation_level=level,
             findings=all_findings,
             score_breakdown=breakdown,
-            safe_preview=preview if preview else None
-        )
\ No newline at end of file
+            safe_preview=preview if preview else None,
+            partial=bool(tracker.cut),
+            skipped_stages=tracker.cut
+        )
+
+    def _analyze_layers(self, context: AnalysisContext, tracker: BudgetTracker) -> Tuple[List[Layer], List[Finding]]:
+        """Peel nested encodings and analyze each decoded Python layer through analyze_text.
+
+        Stops at the time/decoded-bytes budget, cutting stage "layers".
+        """
+        if tracker.expired():
+            tracker.cut_stage("layers")
+            return [], []
+        top = self._layer_depth == 0
+        deadline = time.monotonic() + self.layer_time_budget
+        if tracker.deadline is not None:
+            deadline = min(deadline, tracker.deadline)
+        if not top:
+            deadline = min(deadline, self._layer_deadline)
+
+        decoder = self.deobfuscator.layer_decoder
+        try:
+            layers = self.deobfuscator.peel_layers(context.spans, deadline, tracker.decode_allowance())
+        except MemoryError:
+            tracker.cut_stage("layers")
+            return [], []
+        tracker.spend_decoded(decoder.decoded_bytes)
+        if self._recorder is not None:
+            self._recorder.get("layers").decoded_bytes += decoder.decoded_bytes
+        if decoder.timed_out or decoder.exhausted:
+            tracker.cut_stage("layers")
+
+        findings: List[Finding] = []
+        for layer in layers:
+            if len(layer.chain) > 1:
+                self.static_detector._add_finding(findings, "Static", "Nested Encoding", 3, layer.offset, layer.label)
+            if layer.kind != "python" or self._layer_depth >= self.max_layer_depth:
+                continue
+            if time.monotonic() > deadline:
+                tracker.cut_stage("layers")
+                break
+
+            saved = (self._tracker, self._layer_deadline, self._recorder)
+            self._tracker, self._layer_deadline = tracker, deadline
+            if self._recorder is not None:
+                self._recorder = self._recorder.child("layer.")
+            self._layer_depth += 1
+            try:
+                child = self.analyze_text(layer.data.decode('utf-8'), f"{context.file_path} [{layer.label}]")
+            finally:
+                self._layer_depth -= 1
+                self._tracker, self._layer_deadline, self._recorder = saved
+            if child.partial:
+                tracker.cut_stage("layers")
+            prefix = f"{layer.label} layer at offset {layer.offset}"
+            findings.extend(replace(f, layer=f"{prefix}: {f.layer}" if f.layer else prefix) for f in child.findings)
+        return layers, findings
@@ -0,0 +1,351 @@
+import os
+import json
+import stat
+import time
+import socket
+import struct
+import logging
+from dataclasses import replace
+from typing import Any, Dict, Iterator, List, Optional
+from .models import AnalysisReport
+
+logger = logging.getLogger("analyzer")
+
+# Wire format: every message is a 4-byte big-endian length followed by that
+# many bytes of UTF-8 JSON. A client sends a request and reads frames until
+# one without "report" arrives:
+#   {"op": "analyze", "items": [{"path": ..., "file_path": ...} | {"code": ..., "file_path": ...}]}
+#       -> {"index": i, "report": {...}} per item, in completion order, then {"done": n}
+#   {"op": "ping"} -> {"ok": true}
+#   {"op": "info"} -> {"fingerprint": ..., "pid": ..., "uptime": ..., "requests": ..., "pool": {...}, "cache": {...}}
+#   {"op": "shutdown"} -> {"ok": true}, then the daemon exits
+# A bad request gets {"error": "..."}. Connections stay open for further requests.
+_HEADER = struct.Struct(">I")
+MAX_FRAME = 64 * 1024 * 1024
+
+class DaemonError(Exception):
+    """The daemon rejected a request or dropped the connection."""
+
+class DaemonUnavailable(DaemonError):
+    """No daemon is listening on the socket."""
+
+def _fallback_dir() -> str:
+    return os.path.join("/tmp", f"analyzer-{os.getuid()}")
+
+def default_socket_path() -> str:
+    """$ANALYZER_SOCKET, else a per-user socket in $XDG_RUNTIME_DIR or a private directory in /tmp."""
+    path = os.environ.get("ANALYZER_SOCKET")
+    if path:
+        return path
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, "analyzer.sock")
+    return os.path.join(_fallback_dir(), "analyzer.sock")
+
+def _check_private_dir(directory: str, create: bool = False):
+    """Refuse a socket directory in /tmp that another user created (and could put their own socket in)."""
+    if create:
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise DaemonError(f"{directory} is not a private directory owned by this user")
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+def _error_report(file_path: str, error: str) -> AnalysisReport:
+    return AnalysisReport(file_path=file_path, total_score=0, obfuscation_level="ERROR", error=error)
+
+class DaemonClient:
+    """Blocking client for a running daemon; one connection, any number of requests."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._file = sock.makefile("rb")
+
+    @classmethod
+    def connect(cls, socket_path: Optional[str] = None, timeout: Optional[float] = None) -> "DaemonClient":
+        path = socket_path or default_socket_path()
+        if os.path.dirname(path) == _fallback_dir():
+            try:
+                _check_private_dir(_fallback_dir())
+            except OSError as e:
+                raise DaemonUnavailable(f"no analysis daemon at {path} ({e.strerror or e})")
+            except DaemonError as e:
+                raise DaemonUnavailable(f"not connecting to {path}: {e}")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except OSError as e:
+            sock.close()
+            raise DaemonUnavailable(f"no analysis daemon at {path} ({e.strerror or e})")
+        return cls(sock)
+
+    def _send(self, message: Dict[str, Any]):
+        try:
+            self.sock.sendall(_encode(message))
+        except OSError as e:
+            raise DaemonError(f"lost connection to the daemon: {e}")
+
+    def _recv(self) -> Dict[str, Any]:
+        try:
+            header = self._file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise DaemonError("the daemon closed the connection")
+            (size,) = _HEADER.unpack(header)
+            body = self._file.read(size)
+        except OSError as e:
+            raise DaemonError(f"lost connection to the daemon: {e}")
+        if len(body) < size:
+            raise DaemonError("the daemon closed the connection")
+        message = json.loads(body)
+        if "error" in message:
+            raise DaemonError(message["error"])
+        return message
+
+    def request(self, op: str, **fields) -> Dict[str, Any]:
+        self._send(dict(fields, op=op))
+        return self._recv()
+
+    def analyze(self, items: List[Dict[str, str]], ordered: bool = False) -> Iterator[AnalysisReport]:
+        """Reports for the given items, yielded as the daemon finishes them (in item order if ordered)."""
+        self._send({"op": "analyze", "items": items})
+        held: Dict[int, AnalysisReport] = {}
+        next_index = 0
+        while True:
+            message = self._recv()
+            if "report" not in message:
+                return
+            report = AnalysisReport.from_dict(message["report"])
+            if not ordered:
+                yield report
+                continue
+            held[message["index"]] = report
+            while next_index in held:
+                yield held.pop(next_index)
+                next_index += 1
+
+    def analyze_paths(self, paths: List[str], ordered: bool = False) -> Iterator[AnalysisReport]:
+        # the daemon's working directory may differ; reports keep the paths as given
+        return self.analyze([{"path": os.path.abspath(path), "file_path": path} for path in paths], ordered)
+
+    def analyze_code(self, code: str, file_path: str = "Input Text") -> AnalysisReport:
+        (report,) = self.analyze([{"code": code, "file_path": file_path}])
+        return report
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+class DaemonServer:
+    """Resident analysis service on a Unix domain socket.
+
+    Analyses run on an AnalysisPool of warm worker processes behind an
+    in-memory ResultCache (persisted too if the cache has storage), so a
+    client only pays for connecting and for files whose content it hasn't
+    seen. Clients are served concurrently; each connection keeps at most
+    one analysis per worker in flight, so one big batch cannot fill the
+    pool's queue on its own.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, analyzer_options: Optional[Dict[str, Any]] = None,
+                 workers: Optional[int] = None, cache=None, max_size: Optional[int] = None,
+                 timeout: Optional[float] = 30.0, max_queue: int = 64):
+        from .core import Analyzer
+        from .cache import ResultCache
+        from .pool import AnalysisPool
+        self.socket_path = socket_path or default_socket_path()
+        self.analyzer_options = analyzer_options or {}
+        self.cache = cache if cache is not None else ResultCache()
+        # files over max_size are analyzed in large-file mode and not cached
+        self.max_size = max_size
+        # also validates the options (ValueError) before anything is started
+        analyzer = Analyzer(**self.analyzer_options)
+        self.cache_variant = analyzer.cache_variant
+        self.fingerprint = analyzer.fingerprint
+        self.pool = AnalysisPool(workers=workers, max_queue=max_queue, timeout=timeout,
+                                 analyzer_options=self.analyzer_options)
+        self.started = time.monotonic()
+        self.requests = 0
+        self._stop = None
+        self._clients: Dict[Any, Any] = {}  # writer -> task serving it
+
+    def run(self):
+        """Serve until SIGINT/SIGTERM or a shutdown request."""
+        import asyncio
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        import asyncio
+        import signal
+        if os.path.dirname(self.socket_path) == _fallback_dir():
+            _check_private_dir(_fallback_dir(), create=True)
+        self._claim_socket()
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stop.set)
+        self.pool.start()
+        # socket readable by this user only: the daemon opens any path it is sent
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._serve_client, path=self.socket_path)
+        finally:
+            os.umask(old_umask)
+        logger.info(f"Analysis daemon listening on {self.socket_path} (pid {os.getpid()})")
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+            # hang up on connected clients and let their tasks finish
+            for writer in list(self._clients):
+                writer.close()
+            if self._clients:
+                await asyncio.wait(list(self._clients.values()), timeout=5)
+            await server.wait_closed()
+            self.pool.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+            logger.info(f"Analysis daemon stopped after {self.requests} requests")
+
+    def _claim_socket(self):
+        """Remove a stale socket file; refuse to start if a daemon answers on it."""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+        else:
+            raise DaemonError(f"a daemon is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    async def _serve_client(self, reader, writer):
+        import asyncio
+        self._clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(_HEADER.size)
+                    (size,) = _HEADER.unpack(header)
+                    if size > MAX_FRAME:
+                        writer.write(_encode({"error": f"request over {MAX_FRAME} bytes"}))
+                        break
+                    body = await reader.readexactly(size)
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    request = json.loads(body)
+                    op = request.get("op")
+                except (ValueError, AttributeError):
+                    writer.write(_encode({"error": "malformed request"}))
+                    break
+                self.requests += 1
+                if op == "analyze":
+                    items = request.get("items") or []
+                    if isinstance(items, list):
+                        await self._analyze(items, writer)
+                    else:
+                        writer.write(_encode({"error": "items must be a list"}))
+                elif op == "ping":
+                    writer.write(_encode({"ok": True}))
+                elif op == "info":
+                    writer.write(_encode({
+                        "fingerprint": self.fingerprint,
+                        "pid": os.getpid(),
+                        "uptime": round(time.monotonic() - self.started, 1),
+                        "requests": self.requests,
+                        "pool": self.pool.stats(),
+                        "cache": self.cache.stats(),
+                    }))
+                elif op == "shutdown":
+                    writer.write(_encode({"ok": True}))
+                    self._stop.set()
+                else:
+                    writer.write(_encode({"error": f"unknown op {op!r}"}))
+                await writer.drain()
+        except ConnectionError:
+            pass  # client went away mid-response
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    async def _analyze(self, items: List[Dict[str, str]], writer):
+        import asyncio
+        slots = asyncio.Semaphore(self.pool.workers)
+
+        async def one(index: int, item: Dict[str, str]):
+            async with slots:
+                report = await self._analyze_item(item)
+            writer.write(_encode({"index": index, "report": report.to_dict()}))
+            await writer.drain()
+
+        tasks = [asyncio.ensure_future(one(i, item)) for i, item in enumerate(items)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # the client is gone (or we're shutting down); don't leave the rest running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        writer.write(_encode({"done": len(items)}))
+
+    async def _analyze_item(self, item: Any) -> AnalysisReport:
+        """Report for one request item; every failure becomes an ERROR report."""
+        if not isinstance(item, dict):
+            return _error_report("Input Text", "request item must be an object")
+        path = item.get("path")
+        file_path = item.get("file_path") or path or "Input Text"
+        if not isinstance(file_path, str):
+            return _error_report("Input Text", "file_path must be a string")
+        if not all(isinstance(item.get(key), (str, type(None))) for key in ("path", "code")):
+            return _error_report(file_path, "path and code must be strings")
+        try:
+            return await self._analyze_checked(item.get("path"), file_path, item.get("code"))
+        except Exception as e:
+            logger.error(f"Daemon failed to analyze {file_path}: {e}")
+            return _error_report(file_path, str(e) or type(e).__name__)
+
+    async def _analyze_checked(self, path: Optional[str], file_path: str, code: Optional[str]) -> AnalysisReport:
+        import asyncio
+        from .pool import AnalysisTimeout, PoolSaturated, PoolUnavailable
+        try:
+            if code is None:
+                if not path:
+                    return _error_report(file_path, "request item has neither path nor code")
+                if not os.path.exists(path):
+                    return _error_report(file_path, "File not found")
+                if self.max_size is not None and os.path.getsize(path) > self.max_size:
+                    report = await self.pool.analyze_file(path, max_size=self.max_size)
+                    return replace(report, file_path=file_path)
+                code = await asyncio.to_thread(self._read, path)
+            key = self._key(code)
+            report = await asyncio.to_thread(self.cache.get, key, file_path)
+            if report is not None:
+                return report
+            report = await self.pool.analyze_text(code, file_path)
+            await asyncio.to_thread(self.cache.put, key, report)
+        except (PoolSaturated, PoolUnavailable, AnalysisTimeout) as e:
+            return _error_report(file_path, str(e))
+        if report.partial:
+            logger.warning(f"Partial analysis of {file_path}, skipped stages: {', '.join(report.skipped_stages)}")
+        return report
+
+    def _key(self, code: str) -> str:
+        from .cache import content_hash
+        return content_hash(code, self.cache_variant)
+
+    @staticmethod
+    def _read(path: str) -> str:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
@@ -1,14 +1,13 @@
-import base64
-import binascii
-import zlib
-import bz2
-import re
-import ast
+from typing import List, Optional
+from .context import AnalysisContext
+from .layers import Layer, LayerDecoder
+from .scanner import CHR
 
 class SafeDeobfuscator:
     def __init__(self):
         # Limit preview size
         self.max_preview_len = 1000
+        self.layer_decoder = LayerDecoder()
 
     def _safe_decode_bytes(self, data: bytes) -> str:
         """Try to decode bytes to utf-8 or latin-1 if it looks like text."""
@@ -30,69 +29,69 @@ class SafeDeobfuscator:
             pass
         return f"<Binary Data: {len(data)} bytes>"
 
-    def try_deobfuscate(self, text: str) -> str:
-        """Attempt multiple layers of decoding on the input string."""
-        preview = ""
-        
-        # Base64
-        # We search for the largest suspicious b64-like blob to decode
-        b64_pattern = re.compile(r'(?:[A-Za-z0-9+/]{4}){20,}(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?')
-        matches = b64_pattern.findall(text)
-        if matches:
-            # Take the longest match
-            blob = max(matches, key=len)
-            try:
-                decoded = base64.b64decode(blob)
-                
-                # Check for zlib/bz2 inside the decoded data
-                try:
-                    decoded = zlib.decompress(decoded)
-                    preview += " [Base64 -> Zlib] "
-                except zlib.error:
-                    try:
-                        decoded = bz2.decompress(decoded)
-                        preview += " [Base64 -> Bz2] "
-                    except Exception:
-                        preview += " [Base64] "
-                
-                preview += self._safe_decode_bytes(decoded)
-                return preview[:self.max_preview_len]
-            except Exception:
-                pass
+    def peel_layers(self, data, deadline: Optional[float] = None, max_bytes: Optional[int] = None) -> List[Layer]:
+        """Every payload reachable through nested base64/hex/compression layers (data: bytes, str or SpanTable)."""
+        return self.layer_decoder.peel(data, deadline, max_bytes)
 
-        # Hex (\xNN)
-        # Find long hex strings
-        hex_pattern = re.compile(r'(?:\\x[0-9a-fA-F]{2}){10,}')
-        hex_matches = hex_pattern.findall(text)
-        if hex_matches:
-            blob = max(hex_matches, key=len)
-            # clean \x
-            clean_hex = blob.replace('\\x', '')
-            try:
-                decoded = binascii.unhexlify(clean_hex)
-                preview += " [Hex] " + self._safe_decode_bytes(decoded)
-                return preview[:self.max_preview_len]
-            except Exception:
-                pass
+    def format_layer(self, layer: Layer) -> str:
+        if layer.kind == "marshal":
+            body = f"<Marshalled Code: {len(layer.data)} bytes>"
+        else:
+            body = self._safe_decode_bytes(layer.data) if layer.data else ""
+        return (f" [{layer.label}] " + body)[:self.max_preview_len]
 
-        try:
-            tree = ast.parse(text)
-            char_accum = []
+    def best_layer(self, layers: List[Layer]) -> Optional[Layer]:
+        """Decoded Python first, then the most deeply nested, then the largest payload."""
+        if not layers:
+            return None
+        return max(layers, key=lambda l: (l.kind == "python", len(l.chain), len(l.data)))
+
+    def preview_base64(self, blob) -> Optional[str]:
+        """Peel a base64 blob and whatever it wraps; None if it doesn't decode."""
+        if isinstance(blob, str):
+            blob = blob.encode('ascii', errors='ignore')
+        layer = self.best_layer(self.layer_decoder.decode_blob(blob, "Base64"))
+        return self.format_layer(layer) if layer else None
 
-            
-            chr_matches = list(re.finditer(r'chr\((\d+)\)', text))
-            if len(chr_matches) > 5:
-                # reconstruct
-                chars = []
-                for m in chr_matches:
-                    try:
-                        val = int(m.group(1))
-                        chars.append(chr(val))
-                    except ValueError:
-                        pass
-                if chars:
-                    preview += " [Chr Assembly] " + "".join(chars)
-                    return preview[:self.max_preview_len]
+    def preview_hex(self, blob: str) -> Optional[str]:
+        """Peel a run of \\xNN escapes; None if it doesn't unhexlify."""
+        layer = self.best_layer(self.layer_decoder.decode_blob(blob.encode('ascii', errors='ignore'), "Hex"))
+        return self.format_layer(layer) if layer else None
+
+    def try_deobfuscate(self, text: str, context: Optional[AnalysisContext] = None,
+                        layers: Optional[List[Layer]] = None) -> str:
+        """Preview of the most revealing decoded layer, falling back to chr() reassembly."""
+        context = context or AnalysisContext(text)
+        if layers is None:
+            layers = self.peel_layers(context.spans)
+        layer = self.best_layer(layers)
+        if layer is not None:
+            return self.format_layer(layer)
+        return self.preview_chr(text, context)
+
+    def preview_chr(self, text: str, context: AnalysisContext) -> str:
+        """Reassemble chr(N) sequences; only attempted on source that parses."""
+        preview = ""
+        if context.tree is None:
+            return ""
+
+        try:
+            # the preview is capped anyway, so stop assembling once it's full
+            # instead of materializing a huge chr() chain
+            chars = []
+            matches = 0
+            for span in context.spans.of_kind(CHR):
+                matches += 1
+                try:
+                    val = int(span.text)
+                    chars.append(chr(val))
+                except ValueError:
+                    pass
+                if len(chars) >= self.max_preview_len:
+                    break
+            if matches > 5 and chars:
+                preview += " [Chr Assembly] " + "".join(chars)
+                return preview[:self.max_preview_len]
 
         except Exception:
             pass
@@ -1,13 +1,16 @@
 import ast
-from typing import List, Dict, Set, Any
+from typing import List, Dict, Set, Any, Optional
 from ..models import Finding
+from ..context import AnalysisContext
+from .walker import walk
 
-class ASTDetector(ast.NodeVisitor):
+class ASTDetector:
     def __init__(self):
         self.findings: List[Finding] = []
         self.imports: Dict[str, str] = {}  # alias -> real_name
         self.function_defs: Dict[str, List[str]] = {} # func_name -> [called_funcs]
         self.current_func: str = "global"
+        self._func_stack: List[str] = []
         self.call_graph: Dict[str, List[str]] = {} # caller -> [callees]
         
     def _get_confidence(self, score: int) -> str:
@@ -21,7 +24,7 @@ class ASTDetector(ast.NodeVisitor):
             technique=technique,
             score=score,
             confidence=self._get_confidence(score),
-            location=f"Line {getattr(node, 'lineno', '?')}",
+            line=getattr(node, 'lineno', 0),
             snippet=snippet
         ))
 
@@ -35,7 +38,6 @@ class ASTDetector(ast.NodeVisitor):
             # suspicious imports
             if real_name in {'marshal', 'subprocess', 'os', 'sys', 'platform'}:
                 self._add_finding("Import", f"Suspicious import: {real_name}", 1, node, f"import {real_name}")
-        self.generic_visit(node)
 
     def visit_ImportFrom(self, node: ast.ImportFrom):
         module = node.module or ""
@@ -46,17 +48,15 @@ class ASTDetector(ast.NodeVisitor):
             
             if module in {'marshal', 'subprocess', 'os', 'sys'} or alias.name == 'system':
                 self._add_finding("Import", f"Suspicious import: {real_name}", 1, node, f"from {module} import {alias.name}")
-        self.generic_visit(node)
 
     def visit_FunctionDef(self, node: ast.FunctionDef):
-        # track current scope for call graph
-        prev_func = self.current_func
+        # track current scope for call graph (restored in leave_FunctionDef)
+        self._func_stack.append(self.current_func)
         self.current_func = node.name
         self.call_graph[node.name] = []
-        
-        self.generic_visit(node)
-        
-        self.current_func = prev_func
+
+    def leave_FunctionDef(self, node: ast.FunctionDef):
+        self.current_func = self._func_stack.pop()
 
     def visit_Call(self, node: ast.Call):
         # resolve function name handling aliases (e.g. b64decode) and attributes (e.g. os.system)
@@ -82,8 +82,6 @@ class ASTDetector(ast.NodeVisitor):
         if func_name == '__import__':
             self._add_finding("Dynamic", "__import__ dynamic loading", 2, node, "__import__(...)")
 
-        self.generic_visit(node)
-
     def _resolve_name(self, node: ast.AST) -> str:
         # handle simple names: 'exec'
         if isinstance(node, ast.Name):
@@ -96,31 +94,40 @@ class ASTDetector(ast.NodeVisitor):
             
         return "unknown"
 
-    def analyze(self, code: str) -> List[Finding]:
+    def reset(self):
         self.findings = []
         self.imports = {}
         self.call_graph = {}
-        
-        try:
-            tree = ast.parse(code)
-            self.visit(tree)
-            
-            # Post-analysis: Check specifically for indirect execution patterns in graph
-            # e.g. defined function calling exec
-            for caller, callees in self.call_graph.items():
-                if any(c in {'exec', 'eval'} for c in callees):
-                    # find definition node... simplified here just to add finding
-                    # would need to store nodes in map to be precise with line number
-                    pass 
+        self.current_func = "global"
+        self._func_stack = []
 
-        except SyntaxError as e:
+    def finish(self, context: AnalysisContext) -> List[Finding]:
+        """Post-walk checks; call after the tree has been visited."""
+        error = context.parse_error
+        if error is not None:
             self.findings.append(Finding(
                 category="AST",
                 technique="Syntax Error",
                 score=0,
                 confidence="HIGH",
-                location=f"Line {e.lineno}",
+                line=getattr(error, 'lineno', None) or 0,
                 description="Code parsing failed"
             ))
-            
+            return self.findings
+
+        # Post-analysis: Check specifically for indirect execution patterns in graph
+        # e.g. defined function calling exec
+        for caller, callees in self.call_graph.items():
+            if any(c in {'exec', 'eval'} for c in callees):
+                # find definition node... simplified here just to add finding
+                # would need to store nodes in map to be precise with line number
+                pass
+
         return self.findings
+
+    def analyze(self, code: str, context: Optional[AnalysisContext] = None) -> List[Finding]:
+        context = context or AnalysisContext(code)
+        self.reset()
+        if context.tree is not None:
+            walk(context.tree, [self])
+        return self.finish(context)
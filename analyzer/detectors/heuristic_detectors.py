@@ -1,8 +1,10 @@
 import ast
 from typing import List, Dict, Set, Optional
 from ..models import Finding
+from ..context import AnalysisContext
+from .walker import walk, SKIP_CHILDREN
 
-class HeuristicDetector(ast.NodeVisitor):
+class HeuristicDetector:
     def __init__(self):
         self.findings: List[Finding] = []
         # var_name -> source_type (e.g. "input", "base64", "zlib")
@@ -21,16 +23,16 @@ class HeuristicDetector(ast.NodeVisitor):
             technique=technique,
             score=score,
             confidence=self._get_confidence(score),
-            location=f"Line {getattr(node, 'lineno', '?')}",
+            line=getattr(node, 'lineno', 0),
             snippet=snippet
         ))
 
     def visit_Assign(self, node: ast.Assign):
         # track variable assignments for taint/pipeline analysis
         # source = value
-        if not node.targets: return
+        if not node.targets: return SKIP_CHILDREN
         target = node.targets[0]
-        if not isinstance(target, ast.Name): return
+        if not isinstance(target, ast.Name): return SKIP_CHILDREN
         
         var_name = target.id
         self.total_vars += 1
@@ -41,8 +43,6 @@ class HeuristicDetector(ast.NodeVisitor):
         if source_type:
             self.tainted_vars[var_name] = source_type
 
-        self.generic_visit(node)
-
     def visit_Call(self, node: ast.Call):
         func_name = self._get_func_name(node.func)
         
@@ -63,8 +63,6 @@ class HeuristicDetector(ast.NodeVisitor):
              if isinstance(node.func.value, ast.Constant) and node.func.value.value == '':
                   self._add_finding("Obfuscation", "String join construction", 1, node, "''.join(...)")
 
-        self.generic_visit(node)
-
     def _classify_source(self, node: ast.AST) -> Optional[str]:
         # Identify taint sources and pipeline stages
         if isinstance(node, ast.Call):
@@ -93,30 +91,34 @@ class HeuristicDetector(ast.NodeVisitor):
             return f"{self._get_func_name(node.value)}.{node.attr}"
         return "unknown"
 
-    def analyze(self, code: str) -> List[Finding]:
+    def reset(self):
         self.findings = []
         self.tainted_vars = {}
         self.single_char_vars = 0
         self.total_vars = 0
-        
-        try:
-            tree = ast.parse(code)
-            self.visit(tree)
-            
-            # Global stats analysis
-            if self.total_vars > 10:
-                ratio = self.single_char_vars / self.total_vars
-                if ratio > 0.5:
-                    self.findings.append(Finding(
-                        category="Heuristic",
-                        technique="High Single-Char Var Density",
-                        score=2,
-                        confidence="LOW",
-                        location="Global",
-                        description=f"{ratio:.1%} variables are single-char"
-                    ))
-                    
-        except SyntaxError:
-            pass 
-            
+
+    def finish(self, context: AnalysisContext) -> List[Finding]:
+        """Global stats analysis; call after the tree has been visited."""
+        if context.tree is None:
+            return self.findings
+
+        if self.total_vars > 10:
+            ratio = self.single_char_vars / self.total_vars
+            if ratio > 0.5:
+                self.findings.append(Finding(
+                    category="Heuristic",
+                    technique="High Single-Char Var Density",
+                    score=2,
+                    confidence="LOW",
+                    place="Global",
+                    description=f"{ratio:.1%} variables are single-char"
+                ))
+
         return self.findings
+
+    def analyze(self, code: str, context: Optional[AnalysisContext] = None) -> List[Finding]:
+        context = context or AnalysisContext(code)
+        self.reset()
+        if context.tree is not None:
+            walk(context.tree, [self])
+        return self.finish(context)
@@ -0,0 +1,80 @@
+import ast
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Returned by a visit_<Type> hook to stop that visitor (only) from descending
+# into the node's children, mirroring a NodeVisitor that skips generic_visit.
+SKIP_CHILDREN = object()
+
+def _timed(hook: Callable, spent: List[float], i: int) -> Callable:
+    def run(node):
+        t = time.perf_counter()
+        try:
+            return hook(node)
+        finally:
+            spent[i] += time.perf_counter() - t
+    return run
+
+def walk(tree: ast.AST, visitors: Sequence[object], max_nodes: int = 0,
+         deadline: Optional[float] = None, stats: Optional[Dict[str, Any]] = None) -> bool:
+    """Single pre-order traversal dispatching to several detectors at once.
+
+    For every node, each visitor's ``visit_<Type>`` hook runs before the node's
+    children are walked and its ``leave_<Type>`` hook (if any) runs after them.
+    Hooks must not recurse themselves. Iterative so deep trees don't hit the
+    recursion limit.
+
+    Stops early after max_nodes nodes (0 = no limit) or once deadline
+    (time.monotonic()) passes; returns False if it did. With a stats dict,
+    also records "nodes" visited and "hook_seconds" spent in each visitor's
+    hooks (hooks are wrapped in timers, so only pass it when instrumenting).
+    """
+    # (type name, active visitors) -> (enter hooks, leave hooks)
+    hooks: Dict[Tuple[str, Tuple[int, ...]], Tuple[List[Tuple[int, Callable]], List[Callable]]] = {}
+    spent = [0.0] * len(visitors) if stats is not None else None
+
+    def hook_of(i: int, name: str) -> Callable:
+        hook = getattr(visitors[i], name)
+        return hook if spent is None else _timed(hook, spent, i)
+
+    all_active = tuple(range(len(visitors)))
+    stack: List[Tuple[ast.AST, Tuple[int, ...], bool]] = [(tree, all_active, False)]
+    visited = 0
+    try:
+        while stack:
+            node, active, leaving = stack.pop()
+            key = (node.__class__.__name__, active)
+            entry = hooks.get(key)
+            if entry is None:
+                enter = [(i, hook_of(i, 'visit_' + key[0])) for i in active
+                         if hasattr(visitors[i], 'visit_' + key[0])]
+                leave = [hook_of(i, 'leave_' + key[0]) for i in active
+                         if hasattr(visitors[i], 'leave_' + key[0])]
+                entry = hooks[key] = (enter, leave)
+
+            if leaving:
+                for hook in entry[1]:
+                    hook(node)
+                continue
+
+            visited += 1
+            if max_nodes and visited > max_nodes:
+                return False
+            if deadline is not None and not visited & 1023 and time.monotonic() > deadline:
+                return False
+
+            child_active = active
+            for i, hook in entry[0]:
+                if hook(node) is SKIP_CHILDREN:
+                    child_active = tuple(j for j in child_active if j != i)
+            if entry[1]:
+                stack.append((node, active, True))
+            if not child_active:
+                continue
+            # push children reversed so they pop in source order
+            stack.extend((child, child_active, False) for child in reversed(list(ast.iter_child_nodes(node))))
+        return True
+    finally:
+        if stats is not None:
+            stats["nodes"] = visited
+            stats["hook_seconds"] = spent
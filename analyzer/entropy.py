@@ -0,0 +1,233 @@
+import math
+from collections import Counter
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+# NumPy is optional and slow to import, so it's loaded on first use
+_np = None
+_np_checked = False
+
+def _numpy():
+    """The numpy module, or None if it isn't installed."""
+    global _np, _np_checked
+    if not _np_checked:
+        _np_checked = True
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            pass
+    return _np
+
+def shannon_entropy(data: bytes) -> float:
+    """Shannon entropy (bits/byte) in a single counting pass."""
+    if not data:
+        return 0.0
+    length = len(data)
+    return -sum((n / length) * math.log2(n / length) for n in Counter(data).values())
+
+class RollingEntropy:
+    """Entropy of a fixed-size window kept up to date in O(1) per byte shift.
+
+    Keeps a byte histogram and the running sum of c*log2(c) over its counts,
+    so H = log2(w) - sum/w can be read at any time without rescanning.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.counts = [0] * 256
+        # c*log2(c) for every count a window can hold
+        self._clog = [0.0] + [c * math.log2(c) for c in range(1, window + 1)]
+        self._sum = 0.0
+        self._log_w = math.log2(window) if window else 0.0
+
+    def fill(self, data: bytes):
+        """Load the initial window (len(data) must equal window)."""
+        self.counts = [0] * 256
+        for b, n in Counter(data).items():
+            self.counts[b] = n
+        self._sum = sum(self._clog[n] for n in self.counts if n)
+
+    def slide(self, out_byte: int, in_byte: int):
+        """Drop out_byte from the window and add in_byte."""
+        if out_byte == in_byte:
+            return
+        counts, clog = self.counts, self._clog
+        c = counts[out_byte]
+        self._sum += clog[c - 1] - clog[c]
+        counts[out_byte] = c - 1
+        c = counts[in_byte]
+        self._sum += clog[c + 1] - clog[c]
+        counts[in_byte] = c + 1
+
+    @property
+    def entropy(self) -> float:
+        return max(0.0, self._log_w - self._sum / self.window)
+
+def window_entropies(data: bytes, window: int, step: int = 1) -> Iterator[Tuple[int, float]]:
+    """Yield (offset, entropy) for windows starting at 0, step, 2*step, ... (total O(n))."""
+    n = len(data)
+    if window <= 0 or n < window:
+        return
+    roller = RollingEntropy(window)
+    roller.fill(data[:window])
+    offset = 0
+    yield offset, roller.entropy
+    while offset + step + window <= n:
+        for k in range(offset, offset + step):
+            roller.slide(data[k], data[k + window])
+        offset += step
+        yield offset, roller.entropy
+
+def entropy_profile(data: bytes, window: int, step: int = 1) -> Tuple[Sequence[int], Sequence[float]]:
+    """Windowed entropy series as (offsets, entropies).
+
+    With NumPy and step 1 the whole series is computed in bulk: per-value
+    cumulative counts (occurrence ranks) give every window's histogram
+    update at once in O(n log n) with O(n) memory. With a larger step only
+    the sampled windows are counted (see _sampled_entropies). Without NumPy
+    it falls back to the pure-Python rolling engine.
+    """
+    n = len(data)
+    if window <= 0 or n < window:
+        return [], []
+
+    np = _numpy()
+    if np is None:
+        offsets, entropies = [], []
+        for offset, e in window_entropies(data, window, step):
+            offsets.append(offset)
+            entropies.append(e)
+        return offsets, entropies
+
+    clog = np.zeros(window + 2)
+    clog[1:window + 1] = np.arange(1, window + 1) * np.log2(np.arange(1, window + 1))
+    if step > 1:
+        return _sampled_entropies(np, data, window, step, clog)
+
+    arr = np.frombuffer(data, dtype=np.uint8).astype(np.int64)
+
+    # Occurrences of byte value v before position p, for whole arrays of
+    # (v, p) at once: sort positions by (value, index) and binary search.
+    order = np.argsort(arr, kind='stable')
+    keys = arr[order] * (n + 1) + order
+    group_start = np.searchsorted(keys, np.arange(256) * (n + 1))
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n) - group_start[arr[order]]
+
+    def before(values, positions):
+        return np.searchsorted(keys, values * (n + 1) + positions) - group_start[values]
+
+    # sum(c*log2(c)) changes at each one-byte shift only through the counts
+    # of the outgoing and incoming byte values
+    shifts = np.arange(n - window)
+    out_b = arr[shifts]
+    in_b = arr[shifts + window]
+    c_out = before(out_b, shifts + window) - rank[shifts]
+    c_in = rank[shifts + window] - before(in_b, shifts + 1)
+    delta = clog[c_out - 1] - clog[c_out] + clog[c_in + 1] - clog[c_in]
+
+    sums = np.empty(n - window + 1)
+    sums[0] = clog[np.bincount(arr[:window], minlength=256)].sum()
+    np.cumsum(delta, out=sums[1:])
+    sums[1:] += sums[0]
+
+    starts = np.arange(0, n - window + 1, step)
+    entropies = np.maximum(math.log2(window) - sums[starts] / window, 0.0)
+    return starts, entropies
+
+# byte indices gathered per batch of windows in _sampled_entropies (8 MB of intp)
+_GATHER_BATCH = 1 << 20
+
+def _sampled_entropies(np, data: bytes, window: int, step: int, clog):
+    """Histograms of only the windows starting at 0, step, 2*step, ...
+
+    Reads window/step bytes per input byte (2 for the detectors' 256/128),
+    where the rank-based bulk path sorts all n positions to keep 1/step of
+    them. Windows are counted in batches so memory stays bounded.
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    starts = np.arange(0, len(data) - window + 1, step)
+    entropies = np.empty(len(starts))
+    lane = np.arange(window)
+    batch = max(1, _GATHER_BATCH // window)
+    for i in range(0, len(starts), batch):
+        rows = starts[i:i + batch]
+        codes = arr[rows[:, None] + lane].astype(np.intp)
+        codes += np.arange(len(rows))[:, None] * 256
+        hist = np.bincount(codes.ravel(), minlength=len(rows) * 256).reshape(len(rows), 256)
+        entropies[i:i + batch] = clog[hist].sum(axis=1)
+    return starts, np.maximum(math.log2(window) - entropies / window, 0.0)
+
+def percentiles(values: Sequence[float], qs: Sequence[float]) -> List[float]:
+    """Linear-interpolated percentiles (0-100) of values."""
+    if len(values) == 0:
+        return [0.0 for _ in qs]
+    np = _numpy()
+    if np is not None:
+        return [float(v) for v in np.percentile(values, qs)]
+    ordered = sorted(values)
+    result = []
+    for q in qs:
+        pos = (len(ordered) - 1) * q / 100
+        lo = int(pos)
+        hi = min(lo + 1, len(ordered) - 1)
+        result.append(ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo))
+    return result
+
+def segment_profile(offsets: Sequence[int], entropies: Sequence[float], window: int,
+                    edges: Sequence[float], min_length: int = 0) -> List[Tuple[int, int, int, float]]:
+    """Split a profile into contiguous regions by entropy band.
+
+    edges are ascending band boundaries; band 0 is below edges[0], band
+    len(edges) is above the last one. Regions shorter than min_length are
+    folded into the preceding region to suppress flicker around an edge.
+    Returns (start, end, band, peak).
+    """
+    regions: List[Tuple[int, int, int, float]] = []
+    for offset, e in zip(offsets, entropies):
+        offset, e = int(offset), float(e)
+        band = sum(1 for edge in edges if e > edge)
+        if regions and regions[-1][2] == band:
+            start, _, _, peak = regions[-1]
+            regions[-1] = (start, offset + window, band, max(peak, e))
+        else:
+            if regions:
+                # new band starts where this window starts
+                start, end, prev_band, peak = regions[-1]
+                regions[-1] = (start, min(end, offset), prev_band, peak)
+            regions.append((offset, offset + window, band, e))
+
+    if min_length <= 0:
+        return regions
+    merged: List[Tuple[int, int, int, float]] = []
+    for region in regions:
+        if merged and (region[1] - region[0] < min_length or merged[-1][2] == region[2]):
+            start, _, band, peak = merged[-1]
+            merged[-1] = (start, region[1], band, max(peak, region[3]) if band == region[2] else peak)
+        else:
+            merged.append(region)
+    return merged
+
+def high_entropy_regions(data: bytes, window: int, step: int, threshold: float) -> List[Tuple[int, int, float]]:
+    """Merge consecutive windows above threshold into (start, end, max_entropy) byte ranges."""
+    offsets, entropies = entropy_profile(data, window, step)
+    return merge_hot_windows(zip(offsets, entropies), window, threshold)
+
+def merge_hot_windows(windows: Iterable[Tuple[int, float]], window: int, threshold: float) -> List[Tuple[int, int, float]]:
+    """Merge overlapping/adjacent (offset, entropy) windows above threshold, in offset order."""
+    regions: List[Tuple[int, int, float]] = []
+    start = end = -1
+    peak = 0.0
+    for offset, e in windows:
+        offset, e = int(offset), float(e)
+        if e > threshold:
+            if start >= 0 and offset <= end:
+                end = offset + window
+                peak = max(peak, e)
+            else:
+                if start >= 0:
+                    regions.append((start, end, peak))
+                start, end, peak = offset, offset + window, e
+    if start >= 0:
+        regions.append((start, end, peak))
+    return regions
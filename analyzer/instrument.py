@@ -0,0 +1,89 @@
+import time
+import heapq
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import AnalysisReport, StageTiming
+
+class StageRecorder:
+    """Wall/CPU time and work counters per stage for one analysis (Analyzer(instrument=True)).
+
+    Timing the same stage again adds to it. Decoded layers record into the
+    same table through child("layer."), so "layers" includes every
+    "layer.*" stage; the other top-level stages don't overlap.
+    """
+
+    def __init__(self, prefix: str = "", stages: Optional[Dict[str, StageTiming]] = None):
+        self.prefix = prefix
+        self._stages: Dict[str, StageTiming] = stages if stages is not None else {}
+
+    def child(self, prefix: str) -> "StageRecorder":
+        return StageRecorder(self.prefix + prefix, self._stages)
+
+    def get(self, name: str) -> StageTiming:
+        name = self.prefix + name
+        timing = self._stages.get(name)
+        if timing is None:
+            timing = self._stages[name] = StageTiming(stage=name)
+        return timing
+
+    @contextmanager
+    def stage(self, name: str, nbytes: int = 0) -> Iterator[StageTiming]:
+        timing = self.get(name)
+        timing.bytes += nbytes
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield timing
+        finally:
+            timing.wall_ms += (time.perf_counter() - wall) * 1000
+            timing.cpu_ms += (time.process_time() - cpu) * 1000
+
+    def timings(self) -> List[StageTiming]:
+        """Recorded stages in the order they first ran, times rounded to microseconds."""
+        for timing in self._stages.values():
+            timing.wall_ms = round(timing.wall_ms, 3)
+            timing.cpu_ms = round(timing.cpu_ms, 3)
+        return list(self._stages.values())
+
+def stage(recorder: Optional[StageRecorder], name: str, nbytes: int = 0):
+    """recorder.stage(...), or a no-op context when not instrumenting."""
+    return recorder.stage(name, nbytes) if recorder is not None else nullcontext()
+
+class TimingSummary:
+    """Aggregates report.stages over a batch: the top slowest files and where the time went."""
+
+    def __init__(self, top: int = 10):
+        self.top = top
+        self.files: List[Tuple[float, str]] = []  # min-heap of the top slowest (total wall ms, path)
+        self.stages: Dict[str, StageTiming] = {}
+        self.count = 0
+
+    def add(self, report: AnalysisReport):
+        if not report.stages:
+            return
+        self.count += 1
+        for timing in report.stages:
+            if timing.stage == "total":
+                entry = (timing.wall_ms, report.file_path)
+                if len(self.files) < self.top:
+                    heapq.heappush(self.files, entry)
+                else:
+                    heapq.heappushpop(self.files, entry)
+                continue
+            if timing.stage.startswith("layer."):
+                continue  # already inside "layers"
+            total = self.stages.get(timing.stage)
+            if total is None:
+                total = self.stages[timing.stage] = StageTiming(stage=timing.stage)
+            total.wall_ms += timing.wall_ms
+            total.cpu_ms += timing.cpu_ms
+            total.bytes += timing.bytes
+            total.ast_nodes += timing.ast_nodes
+            total.regex_matches += timing.regex_matches
+            total.decoded_bytes += timing.decoded_bytes
+
+    def slowest_files(self, n: Optional[int] = None) -> List[Tuple[float, str]]:
+        """Up to n (at most top) slowest files, slowest first."""
+        return heapq.nlargest(self.top if n is None else n, self.files)
+
+    def slowest_stages(self) -> List[StageTiming]:
+        return sorted(self.stages.values(), key=lambda t: t.wall_ms, reverse=True)
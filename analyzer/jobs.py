@@ -0,0 +1,195 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from .archives import ArchiveLimits, decode_member, iter_members
+from .models import AnalysisReport, ArchiveSummary
+from .pool import PoolSaturated
+
+logger = logging.getLogger("analyzer")
+
+# async (code, file_path) -> report, e.g. AnalysisPool.analyze_text
+AnalyzeFn = Callable[[str, str], Awaitable[AnalysisReport]]
+
+def _error_report(file_path: str, error: str) -> AnalysisReport:
+    return AnalysisReport(file_path=file_path, total_score=0, obfuscation_level="ERROR", error=error)
+
+class JobManager:
+    """Runs asynchronous scan jobs (archives or server-side paths) against an async analyze function.
+
+    Job state and results live in SQLiteStorage, so unfinished jobs pick up
+    where they stopped when resume() is called after a restart.
+    """
+
+    def __init__(self, storage, analyze: AnalyzeFn, jobs_dir: str = "jobs", concurrency: int = 4,
+                 batch_size: int = 50, max_file_size: int = 5 * 1024 * 1024,
+                 allowed_roots: Optional[List[str]] = None, archive_limits: Optional[ArchiveLimits] = None):
+        self.storage = storage
+        self.analyze = analyze
+        self.jobs_dir = jobs_dir
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_file_size = max_file_size
+        # archive jobs open nested archives and stop at the same caps as --archives scans
+        self.archive_limits = archive_limits or ArchiveLimits(max_member_bytes=max_file_size)
+        # server-side path jobs are refused unless roots are configured
+        self.allowed_roots = [os.path.realpath(r) for r in (allowed_roots or [])]
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # per-job (session start, items done this session) for live throughput
+        self._progress: Dict[str, List[float]] = {}
+
+    def new_job_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def upload_path(self, job_id: str, filename: str) -> str:
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        return os.path.join(job_dir, "upload_" + os.path.basename(filename or "archive"))
+
+    def create_archive_job(self, job_id: str, archive_path: str, name: str, save: bool = False) -> Dict[str, Any]:
+        """One item per .py member, nested archives included (listing reads the whole archive once)."""
+        summary = ArchiveSummary(archive=archive_path)
+        members = [label for label, _, _ in iter_members(archive_path, self.archive_limits, summary, label=name)]
+        if summary.error and len(members) == 1:
+            raise ValueError(summary.error)
+        source = {"type": "archive", "archive": archive_path, "name": name}
+        self.storage.create_job(job_id, source, members, save)
+        return self.storage.get_job(job_id)
+
+    def create_paths_job(self, job_id: str, paths: List[str], save: bool = False) -> Dict[str, Any]:
+        if not self.allowed_roots:
+            raise PermissionError("Server-side path scanning is disabled")
+        files: List[str] = []
+        for path in paths:
+            real = os.path.realpath(path)
+            if not any(real == root or real.startswith(root + os.sep) for root in self.allowed_roots):
+                raise PermissionError(f"Path outside allowed roots: {path}")
+            if os.path.isdir(real):
+                for root, _, names in os.walk(real):
+                    files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith(".py"))
+            elif os.path.isfile(real):
+                files.append(real)
+            else:
+                raise FileNotFoundError(f"Path not found: {path}")
+        self.storage.create_job(job_id, {"type": "paths", "paths": paths}, files, save)
+        return self.storage.get_job(job_id)
+
+    def start(self, job_id: str):
+        if job_id not in self._tasks:
+            self._tasks[job_id] = asyncio.get_running_loop().create_task(self._run(job_id))
+
+    async def resume(self):
+        """Restart every job that was queued or running when the server stopped."""
+        for job_id in await asyncio.to_thread(self.storage.list_unfinished_jobs):
+            logger.info(f"Resuming job {job_id}")
+            self.start(job_id)
+
+    async def shutdown(self):
+        # jobs stay 'running' in the DB and are resumed on next start
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    def status(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Progress and throughput for a job row from storage."""
+        status = dict(job)
+        rate = 0.0
+        progress = self._progress.get(job["id"])
+        if progress:
+            elapsed = time.monotonic() - progress[0]
+            rate = progress[1] / elapsed if elapsed > 0 else 0.0
+        status["files_per_sec"] = round(rate, 2)
+        remaining = job["total"] - job["done"]
+        status["eta_seconds"] = round(remaining / rate, 1) if rate > 0 and job["status"] == "running" else None
+        return status
+
+    def _iter_items(self, job: Dict[str, Any], pending: List[Tuple[int, str]]) -> Iterator[Tuple[int, str, Optional[str], Optional[str]]]:
+        """Yield (seq, file_path, code, error) for pending items; blocking I/O, run in a thread."""
+        source = job["source"]
+        if source["type"] == "archive":
+            # items were listed by the same walk, so seq is the member's position in it
+            # (members sharing a name stay apart)
+            wanted = {seq for seq, _ in pending}
+            summary = ArchiveSummary(archive=source["archive"])
+            members = iter_members(source["archive"], self.archive_limits, summary, label=source["name"])
+            for seq, (label, data, error) in enumerate(members):
+                if seq in wanted:
+                    yield seq, label, decode_member(data) if data is not None else None, error
+            return
+
+        for seq, path in pending:
+            try:
+                if os.path.getsize(path) > self.max_file_size:
+                    yield seq, path, None, "File too large"
+                    continue
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    yield seq, path, f.read(), None
+            except OSError as e:
+                yield seq, path, None, str(e)
+
+    async def _analyze_item(self, code: str, file_path: str) -> AnalysisReport:
+        while True:
+            try:
+                return await self.analyze(code, file_path)
+            except PoolSaturated:
+                # interactive requests have priority; back off and retry
+                await asyncio.sleep(0.5)
+            except Exception as e:
+                return _error_report(file_path, str(e))
+
+    async def _run(self, job_id: str):
+        job = await asyncio.to_thread(self.storage.get_job, job_id)
+        if job is None:
+            return
+        try:
+            pending = await asyncio.to_thread(self.storage.pending_job_items, job_id)
+            await asyncio.to_thread(self.storage.set_job_status, job_id, "running")
+            self._progress[job_id] = [time.monotonic(), 0]
+
+            items = self._iter_items(job, pending)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+            batch: List[Tuple[int, AnalysisReport]] = []
+            flush_lock = asyncio.Lock()
+
+            async def flush():
+                nonlocal batch
+                async with flush_lock:
+                    if not batch:
+                        return
+                    current, batch = batch, []
+                    await asyncio.to_thread(self.storage.record_job_results, job_id, current, job["save"])
+                    self._progress[job_id][1] += len(current)
+
+            async def produce():
+                while True:
+                    item = await asyncio.to_thread(next, items, None)
+                    if item is None:
+                        break
+                    await queue.put(item)
+                for _ in range(self.concurrency):
+                    await queue.put(None)
+
+            async def consume():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    seq, file_path, code, error = item
+                    report = _error_report(file_path, error) if error else await self._analyze_item(code, file_path)
+                    batch.append((seq, report))
+                    if len(batch) >= self.batch_size:
+                        await flush()
+
+            await asyncio.gather(produce(), *(consume() for _ in range(self.concurrency)))
+            await flush()
+            await asyncio.to_thread(self.storage.set_job_status, job_id, "done")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await asyncio.to_thread(self.storage.set_job_status, job_id, "failed", str(e))
+        finally:
+            self._tasks.pop(job_id, None)
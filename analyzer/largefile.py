@@ -0,0 +1,109 @@
+import os
+import mmap
+import math
+from collections import Counter
+from typing import List, Optional, Tuple
+from .models import Finding
+from .entropy import entropy_profile, merge_hot_windows
+from .budget import BudgetTracker
+from .scanner import BASE64, HEX_ESCAPE, scan
+
+class LargeFileScanner:
+    """Static stage for files too big to load whole.
+
+    Walks an mmap of the file in overlapping chunks so memory stays bounded
+    by chunk_size + overlap. Covers everything StaticDetector does (file and
+    windowed entropy, base64/hex blobs) plus the deobfuscator's longest-blob
+    search. Blobs longer than the overlap are seen truncated.
+    """
+
+    WINDOW = 256
+    STEP = 128
+
+    def __init__(self, static_detector, deobfuscator, chunk_size: int = 4 * 1024 * 1024, overlap: int = 64 * 1024):
+        if chunk_size % self.STEP:
+            raise ValueError(f"chunk_size must be a multiple of {self.STEP}")
+        if overlap < self.WINDOW:
+            raise ValueError(f"overlap must be at least {self.WINDOW}")
+        self.static_detector = static_detector
+        self.deobfuscator = deobfuscator
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def scan(self, path: str, budget: Optional[BudgetTracker] = None) -> Tuple[List[Finding], Optional[str]]:
+        """Return (static findings, safe preview) for the file at path.
+
+        With a budget, chunks past its deadline are skipped (stage "static" cut).
+        """
+        size = os.path.getsize(path)
+        if size == 0:
+            return [], None
+
+        counts: Counter = Counter()
+        regions: List[Tuple[int, int, float]] = []
+        b64_findings: List[Finding] = []
+        hex_findings: List[Finding] = []
+        longest_b64 = b''
+        longest_hex = b''
+        b64_seen_until = hex_seen_until = 0
+        scanned = 0
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, size, self.chunk_size):
+                if budget is not None and budget.expired():
+                    budget.cut_stage("static")
+                    break
+                buf = mm[start:start + self.chunk_size + self.overlap]
+                # matches/windows starting past `primary` belong to the next chunk
+                primary = min(self.chunk_size, size - start)
+                counts.update(buf[:primary])
+                scanned = start + primary
+
+                # Sliding window entropy, stitched onto regions from earlier chunks
+                offsets, entropies = entropy_profile(buf, self.WINDOW, self.STEP)
+                windows = ((start + int(o), e) for o, e in zip(offsets, entropies) if o < primary)
+                for region in merge_hot_windows(windows, self.WINDOW, 7.5):
+                    if regions and region[0] <= regions[-1][1]:
+                        prev = regions[-1]
+                        regions[-1] = (prev[0], region[1], max(prev[2], region[2]))
+                    else:
+                        regions.append(region)
+
+                # a span starting before *_seen_until is the tail of a run
+                # already reported from the previous chunk
+                for span in scan(buf):
+                    if span.start >= primary:
+                        break
+                    blob = span.text
+                    if span.kind == BASE64:
+                        seen, b64_seen_until = b64_seen_until, max(b64_seen_until, start + span.end)
+                        if start + span.start < seen:
+                            continue
+                        self.static_detector.check_base64_blob(b64_findings, blob, start + span.start)
+                        if len(blob) >= 80 and len(blob) > len(longest_b64):
+                            longest_b64 = blob
+                    elif span.kind == HEX_ESCAPE:
+                        seen, hex_seen_until = hex_seen_until, max(hex_seen_until, start + span.end)
+                        if start + span.start < seen:
+                            continue
+                        self.static_detector.check_hex_blob(hex_findings, blob.decode('ascii'), start + span.start)
+                        if len(blob) > len(longest_hex):
+                            longest_hex = blob
+
+        findings: List[Finding] = []
+        add = self.static_detector._add_finding
+        # entropy over the bytes actually read (all of them unless the budget ran out)
+        file_entropy = -sum((n / scanned) * math.log2(n / scanned) for n in counts.values())
+        if file_entropy > 5.5:
+            add(findings, "Static", "High Entropy", 2, None, f"Entropy: {file_entropy:.2f}", place="Whole File")
+        for region_start, region_end, e in regions:
+            add(findings, "Static", "Packed Code Block", 3, region_start, f"Local Entropy: {e:.2f}", end=region_end)
+        findings.extend(b64_findings)
+        findings.extend(hex_findings)
+
+        preview = None
+        if longest_b64:
+            preview = self.deobfuscator.preview_base64(longest_b64)
+        if preview is None and longest_hex:
+            preview = self.deobfuscator.preview_hex(longest_hex.decode('ascii'))
+        return findings, preview
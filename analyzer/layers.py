@@ -0,0 +1,269 @@
+import ast
+import binascii
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from .scanner import BASE64, HEX, HEX_ESCAPE, SpanTable
+
+# base64 blobs shorter than this aren't worth peeling
+MIN_BASE64_LENGTH = 80
+
+# (start, blob, "Base64"/"Hex", already-decoded bytes or None)
+Candidate = Tuple[int, bytes, str, Optional[bytes]]
+
+# (method, magic prefix); zlib is matched on its two-byte headers below
+_COMPRESSION = [
+    ("Gzip", b'\x1f\x8b'),
+    ("Bz2", b'BZh'),
+    ("Lzma", b'\xfd7zXZ\x00'),  # .xz
+    ("Lzma", b'\x5d\x00\x00'),  # legacy .lzma
+]
+_ZLIB_HEADERS = (b'\x78\x01', b'\x78\x5e', b'\x78\x9c', b'\x78\xda')
+
+class DecodeBudgetExceeded(Exception):
+    """A decoder produced more output than it was allowed (e.g. a decompression bomb)."""
+
+def inflate(data: bytes, method: str, limit: int) -> bytes:
+    """Decompress one complete stream, never producing more than limit bytes.
+
+    method is Zlib, Gzip, Deflate (raw), Bz2 or Lzma. Raises
+    DecodeBudgetExceeded past the limit and ValueError on invalid or
+    truncated input.
+    """
+    # bz2/lzma load native libraries; most sources never need them
+    import bz2, lzma
+    try:
+        if method in ("Zlib", "Gzip", "Deflate"):
+            d = zlib.decompressobj({"Zlib": 15, "Gzip": 31, "Deflate": -15}[method])
+            out = d.decompress(data, limit + 1)
+            done = d.eof
+        elif method == "Bz2":
+            d = bz2.BZ2Decompressor()
+            out = d.decompress(data, max_length=limit + 1)
+            done = d.eof
+        elif method == "Lzma":
+            d = lzma.LZMADecompressor()
+            out = d.decompress(data, max_length=limit + 1)
+            done = d.eof
+        else:
+            raise ValueError(f"unknown method {method}")
+    except (zlib.error, OSError, EOFError, lzma.LZMAError) as e:
+        raise ValueError(str(e))
+    if len(out) > limit:
+        raise DecodeBudgetExceeded(f"{method} output exceeds {limit} bytes")
+    if not done:
+        raise ValueError("truncated stream")
+    return out
+
+def looks_like_python(data: bytes) -> bool:
+    """Decoded bytes are UTF-8 source that parses to more than a bare name/constant."""
+    try:
+        text = data.decode('utf-8')
+        tree = ast.parse(text)
+    except (UnicodeDecodeError, SyntaxError, ValueError, RecursionError, MemoryError):
+        return False
+    return any(
+        not (isinstance(node, ast.Expr) and isinstance(node.value, (ast.Name, ast.Constant)))
+        for node in tree.body
+    )
+
+@dataclass
+class Layer:
+    """One decoded payload: the chain of decoders applied and what came out."""
+    chain: List[str]  # e.g. ["Base64", "Zlib"], outermost first
+    data: bytes
+    kind: str  # "python", "marshal", "text" or "binary"
+    offset: int  # byte offset of the outermost blob in the input
+
+    @property
+    def label(self) -> str:
+        return " -> ".join(self.chain)
+
+class LayerDecoder:
+    """Recursively peels base64/hex/zlib/gzip/bz2/lzma/raw-deflate layers.
+
+    Every candidate blob is tried, not just the longest. Decompression is
+    streamed with a per-layer output cap and a total output budget per
+    peel(), and each blob's decode result is memoized by hash so a layer
+    repeated within or across inputs is only decoded once.
+    """
+
+    def __init__(self, max_depth: int = 8, max_layer_bytes: int = 4 * 1024 * 1024,
+                 max_total_bytes: int = 32 * 1024 * 1024, max_candidates: int = 64,
+                 memo_bytes: int = 16 * 1024 * 1024):
+        self.max_depth = max_depth
+        self.max_layer_bytes = max_layer_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_candidates = max_candidates
+        self.memo_bytes = memo_bytes
+        # sha1(kind + blob) -> (decoder chain, payload) or None when it doesn't decode;
+        # LRU bounded by total payload size
+        self._memo: "OrderedDict[bytes, Optional[Tuple[List[str], bytes]]]" = OrderedDict()
+        self._memo_size = 0
+        self._budget = 0
+        self._deadline: Optional[float] = None
+        self.timed_out = False
+        self.exhausted = False
+        self.bombs = 0
+        self.decoded_bytes = 0
+
+    def _start(self, deadline: Optional[float], max_bytes: Optional[int]):
+        self._budget = self.max_total_bytes if max_bytes is None else min(max_bytes, self.max_total_bytes)
+        self._deadline = deadline
+        self.timed_out = False
+        self.exhausted = False
+        self.bombs = 0
+        self.decoded_bytes = 0
+
+    def peel(self, data, deadline: Optional[float] = None, max_bytes: Optional[int] = None) -> List[Layer]:
+        """All distinct payloads reachable from blobs in data, in input order.
+
+        data is bytes, str, or a SpanTable already built for the input
+        (whose base64 decodes are then reused). Python payloads are
+        returned as-is (not searched further); the caller analyzes them as
+        source. Stops early once deadline (time.monotonic()) passes,
+        setting timed_out, or once max_bytes of output have been decoded,
+        setting exhausted. decoded_bytes holds the output actually produced.
+        """
+        self._start(deadline, max_bytes)
+        layers: List[Layer] = []
+        table = data if isinstance(data, SpanTable) else SpanTable(data)
+        self._peel_candidates(self._candidates(table), [], 0, None, layers, set())
+        return layers
+
+    def decode_blob(self, blob: bytes, kind: str, deadline: Optional[float] = None,
+                    max_bytes: Optional[int] = None) -> List[Layer]:
+        """Peel a single known blob ("Base64" or "Hex"), e.g. one found by a chunked scan."""
+        self._start(deadline, max_bytes)
+        layers: List[Layer] = []
+        self._peel_blob(blob, kind, [], 0, 0, layers, set())
+        return layers
+
+    def _spend(self, n: int):
+        self._budget -= n
+        self.decoded_bytes += n
+
+    def _candidates(self, table: SpanTable) -> List[Candidate]:
+        found: List[Candidate] = []
+        for span in table.spans:
+            if len(found) >= self.max_candidates:
+                break
+            text = span.text.encode('ascii') if isinstance(span.text, str) else span.text
+            if span.kind == BASE64 and span.end - span.start >= MIN_BASE64_LENGTH:
+                decoded = table.decode_base64(span)
+                if decoded is not None:
+                    found.append((span.start, text, "Base64", decoded))
+            elif span.kind in (HEX_ESCAPE, HEX):
+                found.append((span.start, text, "Hex", None))
+        return found
+
+    def _out_of_time(self) -> bool:
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            self.timed_out = True
+        return self.timed_out
+
+    def _peel_candidates(self, candidates: List[Candidate], chain: List[str], depth: int, offset: Optional[int],
+                         layers: List[Layer], seen: set):
+        for start, blob, kind, decoded in candidates:
+            if self._out_of_time() or self.exhausted:
+                return
+            self._peel_blob(blob, kind, chain, depth, start if offset is None else offset, layers, seen, decoded)
+
+    def _peel_blob(self, blob: bytes, kind: str, chain: List[str], depth: int, offset: int,
+                   layers: List[Layer], seen: set, raw: Optional[bytes] = None):
+        if depth >= self.max_depth:
+            return
+        decoded = self._decode(blob, kind, raw)
+        if decoded is None:
+            return
+        steps, payload = decoded
+        import hashlib  # deferred: loading OpenSSL is a noticeable share of CLI startup
+        digest = hashlib.sha1(payload).digest()
+        if digest in seen:
+            return
+        seen.add(digest)
+
+        chain = chain + steps
+        if looks_like_python(payload):
+            layers.append(Layer(chain, payload, "python", offset))
+            return
+        if payload[:1] in (b'\xe3', b'\x63') and payload[2:5] == b'\x00\x00\x00' and len(payload) > 16:
+            # marshalled code object (type byte, small argcount); loading untrusted marshal data isn't safe, so stop here
+            layers.append(Layer(chain, payload, "marshal", offset))
+            return
+
+        before = len(layers)
+        if depth + len(steps) < self.max_depth:
+            self._peel_candidates(self._candidates(SpanTable(payload)), chain, depth + len(steps), offset, layers, seen)
+        if len(layers) == before:
+            text_like = payload and sum(32 <= b < 127 or b in (9, 10, 13) for b in payload[:4096]) / len(payload[:4096]) > 0.9
+            layers.append(Layer(chain, payload, "text" if text_like else "binary", offset))
+
+    def _decode(self, blob: bytes, kind: str, raw: Optional[bytes] = None) -> Optional[Tuple[List[str], bytes]]:
+        """(decoder chain, payload) for a blob; raw is its already-decoded base64/hex form, if known."""
+        import hashlib
+        key = hashlib.sha1(kind.encode() + b':' + blob).digest()
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+
+        try:
+            if raw is not None:
+                data = raw
+            elif kind == "Base64":
+                data = binascii.a2b_base64(blob)
+            else:
+                data = binascii.unhexlify(blob.replace(b'\\x', b''))
+            if len(data) > self._budget:
+                self.exhausted = True
+                return None
+            self._spend(len(data))
+            steps = [kind]
+            result: Optional[Tuple[List[str], bytes]] = (steps, self._unwrap(data, steps))
+        except (binascii.Error, ValueError):
+            result = None
+        except DecodeBudgetExceeded:
+            # not memoized: the limit hit may have been this peel's remaining budget
+            if self._budget < self.max_layer_bytes:
+                self.exhausted = True
+            else:
+                self.bombs += 1
+            return None
+
+        self._memo[key] = result
+        self._memo_size += len(result[1]) if result else 0
+        while self._memo_size > self.memo_bytes and self._memo:
+            _, evicted = self._memo.popitem(last=False)
+            self._memo_size -= len(evicted[1]) if evicted else 0
+        return result
+
+    def _unwrap(self, data: bytes, steps: List[str]) -> bytes:
+        """Peel compression layers identified by their headers (raw deflate as a last resort)."""
+        while len(steps) < self.max_depth:
+            method = None
+            if data[:2] in _ZLIB_HEADERS:
+                method = "Zlib"
+            else:
+                for name, magic in _COMPRESSION:
+                    if data.startswith(magic):
+                        method = name
+                        break
+            candidates = [method] if method else []
+            if not method and data and not data.isascii():
+                candidates = ["Deflate"]
+            unwrapped = None
+            for name in candidates:
+                limit = min(self.max_layer_bytes, self._budget)
+                try:
+                    unwrapped = inflate(data, name, limit)
+                except ValueError:
+                    continue
+                self._spend(len(unwrapped))
+                steps.append(name)
+                break
+            if unwrapped is None:
+                return data
+            data = unwrapped
+        return data
@@ -0,0 +1,115 @@
+import os
+import json
+import hashlib
+import logging
+from dataclasses import replace
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import AnalysisReport
+
+logger = logging.getLogger("analyzer")
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+class ScanPlan:
+    """What an incremental scan of one tree has to do."""
+
+    def __init__(self):
+        self.changed: List[str] = []  # new or modified files, to analyze
+        self.unchanged: List[str] = []  # stored reports can be reused
+        self.deleted: List[str] = []  # manifest entries whose file is gone
+        # path as given -> (manifest key, size, mtime_ns, content hash)
+        self.files: Dict[str, Tuple[str, int, int, Optional[str]]] = {}
+        # unchanged content with a new size/mtime (e.g. touched or re-checked-out)
+        self.touched: List[Tuple[str, int, int]] = []
+
+class Manifest:
+    """Remembers what was analyzed per path, so a rescan only analyzes what changed.
+
+    Entries live in SQLiteStorage's manifest table, keyed by absolute path,
+    with size, mtime, content hash and the analyzer fingerprint. A file is
+    unchanged when size and mtime match, or failing that when its content
+    hash does; a new fingerprint (rules or options changed) invalidates all.
+    """
+
+    def __init__(self, storage, fingerprint: str, batch_size: int = 500):
+        self.storage = storage
+        self.fingerprint = fingerprint
+        self.batch_size = batch_size
+        self._pending: List[Tuple[str, int, int, str, str, str]] = []
+        self.recorded = 0
+
+    def plan(self, root: str, paths: List[str]) -> ScanPlan:
+        """Sort the files found under root into changed/unchanged, and find deleted ones."""
+        plan = ScanPlan()
+        known = self.storage.get_manifest(os.path.abspath(root))
+        present = set()
+        for path in paths:
+            key = os.path.abspath(path)
+            present.add(key)
+            try:
+                st = os.stat(path)
+            except OSError:
+                plan.changed.append(path)  # let the analyzer report the error
+                continue
+            entry = known.get(key)
+            if (entry is not None and entry[4] is None and entry[3] == self.fingerprint
+                    and entry[0] == st.st_size and entry[1] == st.st_mtime_ns):
+                plan.unchanged.append(path)
+                plan.files[path] = (key, st.st_size, st.st_mtime_ns, entry[2])
+                continue
+            try:
+                digest = file_hash(path)
+            except OSError:
+                plan.changed.append(path)
+                continue
+            plan.files[path] = (key, st.st_size, st.st_mtime_ns, digest)
+            if entry is not None and entry[4] is None and entry[3] == self.fingerprint and entry[2] == digest:
+                plan.unchanged.append(path)
+                plan.touched.append((key, st.st_size, st.st_mtime_ns))
+            else:
+                plan.changed.append(path)
+        plan.deleted = [key for key, entry in known.items() if key not in present and entry[4] is None]
+        return plan
+
+    def reused(self, plan: ScanPlan) -> Iterator[AnalysisReport]:
+        """Stored reports of the unchanged files, relabelled with their current paths."""
+        for i in range(0, len(plan.unchanged), self.batch_size):
+            chunk = plan.unchanged[i:i + self.batch_size]
+            stored = self.storage.get_manifest_reports([plan.files[path][0] for path in chunk])
+            for path in chunk:
+                data = stored.get(plan.files[path][0])
+                if data is not None:
+                    yield replace(AnalysisReport.from_dict(data), file_path=path)
+
+    def record(self, plan: ScanPlan, report: AnalysisReport):
+        """Remember a fresh report; errors and partial reports are retried next scan."""
+        info = plan.files.get(report.file_path)
+        if info is None or info[3] is None or report.error or report.partial:
+            return
+        key, size, mtime_ns, digest = info
+        if report.stages:
+            report = replace(report, stages=[])  # a reused report wasn't timed
+        self._pending.append((key, size, mtime_ns, digest, self.fingerprint, json.dumps(report.to_dict())))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.storage.put_manifest(self._pending)
+            self.recorded += len(self._pending)
+            self._pending = []
+
+    def finish(self, plan: ScanPlan):
+        """Write what's left: pending reports, refreshed stats and deletions."""
+        self.flush()
+        if plan.touched:
+            self.storage.touch_manifest(plan.touched)
+        if plan.deleted:
+            self.storage.mark_manifest_deleted(plan.deleted)
+            logger.info(f"Marked {len(plan.deleted)} deleted files in the manifest")
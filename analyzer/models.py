@@ -1,23 +1,82 @@
-from dataclasses import dataclass, field
-from typing import List, Optional, Any
+import re
+import sys
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional, Any, Dict
 
-@dataclass
+# "Line 12", "Line ?", "Offset 40" or "Offset 40-96": the location strings of stored reports
+_LOCATION = re.compile(r"(?:Line (?P<line>\d+|\?|None)|Offset (?P<offset>\d+)(?:-(?P<end>\d+))?)\Z")
+
+@dataclass(slots=True)
 class Finding:
+    """One detection; slotted and compact, since big batches hold millions.
+
+    Repeated strings are interned, and the location is kept as numbers and
+    only formatted (see location) when a report is printed or stored.
+    """
+
     category: str  # e.g., "AST", "String", "Heuristic"
     technique: str  # e.g., "Exec Usage", "Base64 Blob"
     confidence: str  # "LOW", "MEDIUM", "HIGH"
-    location: str  # Line number or description of where it was found
+    line: Optional[int] = None  # source line; 0 when the node had none
+    offset: Optional[int] = None  # character offset of the match (start of a range)
+    end: Optional[int] = None  # end offset of a range
+    place: str = ""  # where, when not a line or offset: "Whole File", "Global"
+    layer: str = ""  # decoded layer(s) the finding is in, outermost first
     snippet: Optional[str] = None
     score: int = 0
     description: str = ""
 
-@dataclass
+    def __post_init__(self):
+        self.category = sys.intern(self.category)
+        self.technique = sys.intern(self.technique)
+        self.confidence = sys.intern(self.confidence)
+
+    @property
+    def location(self) -> str:
+        """Human-readable location, e.g. "Line 12" or "Base64 layer at offset 40: Offset 4096"."""
+        if self.line is not None:
+            where = f"Line {self.line or '?'}"
+        elif self.offset is not None:
+            where = f"Offset {self.offset}" if self.end is None else f"Offset {self.offset}-{self.end}"
+        else:
+            where = self.place
+        return f"{self.layer}: {where}" if self.layer else where
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Finding":
+        data = dict(data)
+        location = data.pop("location", None)
+        if location is not None:
+            # stored before locations were structured
+            layer, _, where = location.rpartition(": ")
+            m = _LOCATION.match(where)
+            data["layer"] = layer
+            if m is None:
+                data["place"] = where
+            elif m.group("line") is not None:
+                data["line"] = int(m.group("line")) if m.group("line").isdigit() else 0
+            else:
+                data["offset"] = int(m.group("offset"))
+                data["end"] = int(m.group("end")) if m.group("end") else None
+        return cls(**data)
+
+@dataclass(slots=True)
 class ScoreBreakdown:
     rule_name: str
     score_increment: int
     reason: str
 
 @dataclass
+class StageTiming:
+    stage: str  # detector name, or parse/scan/walk/layers/score/preview/...; decoded layers use "layer." names
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    bytes: int = 0  # input processed
+    ast_nodes: int = 0
+    regex_matches: int = 0  # blob/escape/chr() spans found by the shared scan
+    decoded_bytes: int = 0
+
+@dataclass(slots=True)
 class AnalysisReport:
     file_path: str
     total_score: int
@@ -26,3 +85,49 @@ class AnalysisReport:
     score_breakdown: List[ScoreBreakdown] = field(default_factory=list)
     safe_preview: Optional[str] = None
     error: Optional[str] = None
+    partial: bool = False  # True when some stages were skipped (see skipped_stages)
+    skipped_stages: List[str] = field(default_factory=list)
+    prefiltered: bool = False  # True for a LOW verdict from the byte-level prefilter, without full analysis
+    stages: List[StageTiming] = field(default_factory=list)  # per-stage costs, only from Analyzer(instrument=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AnalysisReport":
+        data = dict(data)
+        data["findings"] = [Finding.from_dict(f) for f in data.get("findings", [])]
+        data["score_breakdown"] = [ScoreBreakdown(**b) for b in data.get("score_breakdown", [])]
+        data["stages"] = [StageTiming(**s) for s in data.get("stages", [])]
+        return cls(**data)
+
+# obfuscation levels, least to most severe
+LEVELS = ("LOW", "MEDIUM", "HIGH")
+
+@dataclass
+class ArchiveSummary:
+    """Totals for one archive scanned in place (see analyzer.archives)."""
+    archive: str
+    size: int = 0  # bytes on disk
+    members: int = 0  # .py members analyzed
+    skipped: int = 0  # members and nested archives not analyzed: over a limit, too deep or unreadable
+    nested: int = 0  # nested archives opened
+    bytes_read: int = 0  # decompressed bytes read out of the archive
+    max_score: int = 0
+    level: str = "LOW"  # most severe member level
+    levels: Dict[str, int] = field(default_factory=dict)  # analyzed members per level
+    error: Optional[str] = None  # why the scan stopped early, if it did
+
+    def add(self, report: AnalysisReport):
+        if report.error:
+            self.skipped += 1
+            if self.error and not self.members:
+                # the archive itself couldn't be scanned
+                self.level = "ERROR"
+            return
+        self.members += 1
+        level = report.obfuscation_level
+        self.levels[level] = self.levels.get(level, 0) + 1
+        self.max_score = max(self.max_score, report.total_score)
+        if level in LEVELS and LEVELS.index(level) > LEVELS.index(self.level):
+            self.level = level
@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .models import AnalysisReport, ArchiveSummary
+from .archives import ArchiveLimits, scan_archive
+
+# Per-process analyzer, created once by the pool initializer and reused for every chunk
+_worker_analyzer = None
+
+def _init_worker(cache_entries: Optional[int], analyzer_options: Dict[str, Any], cache_db: Optional[str] = None):
+    global _worker_analyzer
+    from .core import Analyzer
+    from .cache import ResultCache
+    from .budget import AnalysisBudget, limit_process_memory
+    cache = None
+    if cache_entries:
+        # each worker opens its own connection to the persistent tier (WAL allows concurrent writers)
+        storage = None
+        if cache_db is not None:
+            from .storage import SQLiteStorage
+            storage = SQLiteStorage(cache_db)
+        cache = ResultCache(max_entries=cache_entries, storage=storage)
+    _worker_analyzer = Analyzer(cache=cache, **analyzer_options)
+    limit_process_memory((analyzer_options.get("budget") or AnalysisBudget()).max_memory_mb)
+
+def _analyze_chunk(paths: List[str], max_size: Optional[int]) -> List[AnalysisReport]:
+    reports = []
+    for path in paths:
+        try:
+            reports.append(_worker_analyzer.analyze_file(path, max_size=max_size))
+        except Exception as e:
+            # one bad file must not take the rest of the chunk down with it
+            reports.append(AnalysisReport(file_path=path, total_score=0, obfuscation_level="ERROR", error=str(e)))
+    return reports
+
+def _analyze_member(code: str, file_path: str) -> AnalysisReport:
+    try:
+        return _worker_analyzer.analyze_text(code, file_path)
+    except Exception as e:
+        return AnalysisReport(file_path=file_path, total_score=0, obfuscation_level="ERROR", error=str(e))
+
+def _scan_archive(path: str, limits: ArchiveLimits) -> Tuple[List[AnalysisReport], ArchiveSummary]:
+    return scan_archive(_analyze_member, path, limits)
+
+def chunk_paths(paths: Iterable[str], chunk_bytes: int, max_chunk: int) -> Iterator[List[str]]:
+    """Group paths so each chunk holds roughly chunk_bytes of source.
+
+    Tiny files get batched together so per-task pickling/IPC overhead is
+    amortized; a single large file still forms its own chunk.
+    """
+    chunk: List[str] = []
+    size = 0
+    for path in paths:
+        chunk.append(path)
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+        if size >= chunk_bytes or len(chunk) >= max_chunk:
+            yield chunk
+            chunk = []
+            size = 0
+    if chunk:
+        yield chunk
+
+def _fan_out(fn: Callable, tasks: Iterable[tuple], workers: int, cache_entries: Optional[int],
+             analyzer_options: Optional[Dict[str, Any]], cache_db: Optional[str]) -> Iterator[Any]:
+    """fn(*task) for every task on a pool of warm analyzers, yielding results as they complete."""
+    # bound the number of queued tasks so huge path generators aren't drained up front
+    max_inflight = workers * 4
+    tasks = iter(tasks)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_entries, analyzer_options or {}, cache_db)) as pool:
+        pending = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_inflight:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(fn, *task))
+
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def analyze_parallel(paths: Iterable[str], workers: int, max_size: Optional[int] = None,
+                     cache_entries: Optional[int] = None, analyzer_options: Optional[Dict[str, Any]] = None,
+                     chunk_bytes: int = 256 * 1024, max_chunk: int = 64, cache_db: Optional[str] = None) -> Iterator[AnalysisReport]:
+    """Fan paths out over a process pool, yielding reports as chunks complete."""
+    tasks = ((chunk, max_size) for chunk in chunk_paths(paths, chunk_bytes, max_chunk))
+    for reports in _fan_out(_analyze_chunk, tasks, workers, cache_entries, analyzer_options, cache_db):
+        yield from reports
+
+def scan_archives_parallel(paths: Iterable[str], workers: int, limits: ArchiveLimits, cache_entries: Optional[int] = None,
+                           analyzer_options: Optional[Dict[str, Any]] = None,
+                           cache_db: Optional[str] = None) -> Iterator[Tuple[List[AnalysisReport], ArchiveSummary]]:
+    """One archive per pool task, yielding (member reports, summary) as archives complete."""
+    yield from _fan_out(_scan_archive, ((path, limits) for path in paths), workers, cache_entries, analyzer_options, cache_db)
@@ -0,0 +1,201 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from .models import AnalysisReport
+
+logger = logging.getLogger("analyzer")
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the wait queue is full."""
+
+class PoolUnavailable(Exception):
+    """The pool is shut down or no worker freed up in time."""
+
+class AnalysisTimeout(Exception):
+    """An analysis exceeded its time limit; its worker was killed."""
+
+def _worker_main(conn, analyzer_options: Dict[str, Any]):
+    # runs in the child: one warm Analyzer serving requests until told to stop
+    from .core import Analyzer
+    from .budget import AnalysisBudget, limit_process_memory
+    analyzer = Analyzer(**analyzer_options)
+    limit_process_memory((analyzer_options.get("budget") or AnalysisBudget()).max_memory_mb)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        code, file_path, max_size = message
+        try:
+            if code is None:
+                # whole file, read in the worker (large files get large-file mode)
+                report = analyzer.analyze_file(file_path, max_size=max_size)
+            else:
+                report = analyzer.analyze_text(code, file_path)
+        except Exception as e:
+            report = AnalysisReport(file_path=file_path, total_score=0, obfuscation_level="ERROR", error=str(e))
+        conn.send(report)
+
+class _Worker:
+    def __init__(self, ctx, analyzer_options: Dict[str, Any]):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, analyzer_options), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def call(self, code: Optional[str], file_path: str, max_size: Optional[int] = None) -> AnalysisReport:
+        self.conn.send((code, file_path, max_size))
+        return self.conn.recv()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self, timeout: float = 5.0):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+class AnalysisPool:
+    """Process pool for running analyses off the asyncio event loop.
+
+    Each worker process keeps one Analyzer. Requests wait for a free worker
+    in a bounded queue: PoolSaturated is raised when the queue is full and
+    PoolUnavailable when no worker frees up within queue_timeout. A request
+    running longer than timeout has its worker killed and replaced, and
+    AnalysisTimeout is raised.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queue: int = 64, timeout: float = 30.0,
+                 queue_timeout: float = 30.0, analyzer_options: Optional[Dict[str, Any]] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.analyzer_options = analyzer_options or {}
+        # spawn: the API process runs threads (DB writer), which fork doesn't mix well with
+        self._ctx = multiprocessing.get_context("spawn")
+        self._all: List[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        # per worker: one thread blocked on its pipe, one to kill and respawn it when
+        # that call times out (the stuck thread only frees once the worker is killed)
+        self._io = ThreadPoolExecutor(max_workers=2 * self.workers, thread_name_prefix="analysis-io")
+        self.queued = 0
+        self.in_flight = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self._closed = True
+
+    def start(self):
+        self._idle = asyncio.Queue()
+        for _ in range(self.workers):
+            self._idle.put_nowait(self._spawn())
+        self._closed = False
+        logger.info(f"Analysis pool started with {self.workers} workers")
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.analyzer_options)
+        self._all.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        self._all.remove(worker)
+        return self._spawn()
+
+    def _recycle(self, loop, worker: _Worker):
+        """Kill worker and put a fresh one on the idle queue, off the event loop.
+
+        For workers whose call didn't complete: their pipe may still carry a
+        late reply, so they are never handed to another request.
+        """
+        def replace():
+            try:
+                fresh = self._replace(worker)
+            except Exception as e:
+                logger.error(f"Could not replace analysis worker: {e}")
+                return
+            loop.call_soon_threadsafe(self._release, fresh)
+        loop.run_in_executor(self._io, replace)
+
+    def _release(self, worker: _Worker):
+        if self._closed:
+            worker.stop()
+        else:
+            self._idle.put_nowait(worker)
+
+    async def analyze_text(self, code: str, file_path: str = "Input Text") -> AnalysisReport:
+        return await self._run(code, file_path, None)
+
+    async def analyze_file(self, file_path: str, max_size: Optional[int] = None) -> AnalysisReport:
+        """Analyze a file read by the worker; files over max_size use large-file mode."""
+        return await self._run(None, file_path, max_size)
+
+    async def _run(self, code: Optional[str], file_path: str, max_size: Optional[int]) -> AnalysisReport:
+        if self._closed:
+            raise PoolUnavailable("analysis pool is not running")
+        if self.queued + self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturated(f"{self.in_flight} analyses running, {self.queued} queued")
+
+        self.queued += 1
+        try:
+            worker = await asyncio.wait_for(self._idle.get(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise PoolUnavailable(f"no worker available within {self.queue_timeout}s")
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        completed = False
+        try:
+            report = await asyncio.wait_for(loop.run_in_executor(self._io, worker.call, code, file_path, max_size), self.timeout)
+            completed = True
+            return report
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Analysis of {file_path} exceeded {self.timeout}s, restarting worker")
+            raise AnalysisTimeout(f"analysis exceeded {self.timeout}s")
+        except (EOFError, OSError) as e:
+            # worker died (e.g. killed by the OS); replace it and report the failure
+            logger.error(f"Analysis worker crashed on {file_path}: {e}")
+            raise PoolUnavailable("analysis worker crashed")
+        finally:
+            # a cancelled caller (client gone, job stopped) leaves the call running too
+            self.in_flight -= 1
+            if not completed:
+                if not self._closed:
+                    self._recycle(loop, worker)
+            elif not self._closed:
+                self._idle.put_nowait(worker)
+
+    def close(self):
+        self._closed = True
+        for worker in self._all:
+            worker.stop()
+        self._all = []
+        self._io.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,109 @@
+import re
+from typing import List, Optional
+from .entropy import shannon_entropy
+
+# Substrings behind the rules that can reach MEDIUM (score 20) on their
+# own or in pairs: execution and dynamic loading, decode/decompress
+# pipelines, marshal/subprocess imports and shell calls
+SUSPICIOUS_TOKENS = [
+    b"exec", b"eval", b"compile", b"__import__", b"getattr",
+    b"marshal", b"b64decode", b"decompress",
+    b"subprocess", b"system", b"popen",
+]
+
+# The remaining rules are worth 5 points each (ast/heuristic weight 1,
+# scaled by 5) except single-char variable density (10), so a file is only
+# a candidate when together they can add up to MEDIUM:
+# - "from os|sys import a, b, ..." is one technique per imported name, so unbounded
+_FROM_IMPORT = rb"\bfrom[\s\\]+\.*[\s\\]*(?:os|sys|marshal|subprocess)[\s\\]+import\b"
+# - "import os, sys, platform" is one technique per module
+_IMPORT = rb"\bimport\b((?:[^\n;#\\]|\\\r?\n)*)"
+_IMPORT_NAMES = rb"\b(os|sys|platform)\b"
+# - chr() assembly and ''.join() construction, once each
+_CHR = rb"\bchr\b"
+_JOIN = b"join"
+# - single-char density needs 11+ assignments, over half of them to one-letter
+#   names; this over-counts (keyword arguments on their own line match too)
+_SINGLE_ASSIGN = rb"(?:^|[;:])[ \t]*(?:[A-Za-z_]|[\xc0-\xf4][\x80-\xbf]+)[ \t]*=(?!=)"
+DENSITY_MIN_SINGLE = 6
+
+MEDIUM_SCORE = 20
+
+_ASCII = bytes(range(128))
+# base64 alphabet -> 'A', backslash kept, everything else -> ' ', so blob
+# runs and \xNN escape runs become plain substring searches
+_CLASSES = bytes(
+    0x41 if chr(b).isalnum() and b < 128 or b in b"+/" else 0x5c if b == 0x5c else 0x20
+    for b in range(256)
+)
+
+class Prefilter:
+    """First analysis tier: a cheap byte-level check for whether a file needs the full pipeline.
+
+    A file is a candidate when it contains a suspicious token or a from-import
+    of a suspicious module, the weaker rules it could trigger add up to
+    MEDIUM, it has a base64-like run (the scanner's 20-char minimum) or
+    \\xNN escape run, or its byte entropy is over max_entropy. Anything else
+    is clearly benign and gets a LOW verdict without being parsed.
+    """
+
+    def __init__(self, tokens: Optional[List[bytes]] = None, min_run: int = 20, min_escapes: int = 8,
+                 max_entropy: float = 5.2, entropy_sample: int = 4096):
+        self.tokens = tokens if tokens is not None else SUSPICIOUS_TOKENS
+        self._from_import = re.compile(_FROM_IMPORT)
+        self._import = re.compile(_IMPORT)
+        self._import_names = re.compile(_IMPORT_NAMES)
+        self._chr = re.compile(_CHR)
+        self._single_assign = re.compile(_SINGLE_ASSIGN, re.MULTILINE)
+        self._run = b"A" * min_run
+        self._escapes = b"\\AAA" * min_escapes  # \xNN after the class mapping
+        self.max_entropy = max_entropy
+        self.entropy_sample = entropy_sample
+
+    def check(self, raw: bytes) -> Optional[str]:
+        """Why raw needs full analysis, or None if it is clearly benign."""
+        for token in self.tokens:
+            if token in raw:
+                return f"token {token.decode('ascii', 'replace')}"
+        if self._from_import.search(raw):
+            return "from-import of a suspicious module"
+        score = self.reachable_score(raw)
+        if score >= MEDIUM_SCORE:
+            return f"reachable score {score}"
+
+        classes = raw.translate(_CLASSES)
+        if self._run in classes:
+            return "base64-like run"
+        if self._escapes in classes:
+            return "hex escape run"
+
+        # whole-file entropy, estimated from an evenly strided sample
+        step = max(1, len(raw) // self.entropy_sample)
+        entropy = shannon_entropy(raw[::step])
+        if entropy > self.max_entropy:
+            return f"entropy {entropy:.2f}"
+        # a 256-byte window only reaches the packed-block entropy (7.5) with
+        # ~181 distinct byte values, i.e. 53+ distinct non-ASCII ones
+        if len(set(raw.translate(None, _ASCII))) >= 53:
+            return "non-ASCII byte diversity"
+        return None
+
+    def reachable_score(self, raw: bytes) -> int:
+        """Upper bound on what suspicious imports, chr(), ''.join() and single-char names can score."""
+        imported = set()
+        for statement in self._import.finditer(raw):
+            imported.update(self._import_names.findall(statement.group(1)))
+        score = 5 * len(imported)
+        if self._chr.search(raw):
+            score += 5
+        if _JOIN in raw:
+            score += 5
+        # the density check is the costly one; skip it when it can't matter
+        if score + 10 >= MEDIUM_SCORE:
+            singles = 0
+            for _ in self._single_assign.finditer(raw):
+                singles += 1
+                if singles >= DENSITY_MIN_SINGLE:
+                    score += 10
+                    break
+        return score
@@ -0,0 +1,170 @@
+import os
+import sys
+import logging
+import importlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger("analyzer")
+
+# Inputs a detector can declare. AnalysisContext builds each one lazily, so
+# an input no selected detector needs is never built (e.g. no parse at all
+# when only static checks run).
+RAW = "raw"  # UTF-8 bytes (context.raw)
+TEXT = "text"  # decoded source (context.code)
+SPANS = "spans"  # base64/hex/chr() span table (context.spans)
+TOKENS = "tokens"  # tokenize stream (context.tokens)
+AST = "ast"  # parsed module (context.tree)
+
+# Detector kinds
+VISITOR = "visitor"  # visit_*/leave_* hooks in the shared AST walk, plus reset() and finish(context) -> findings
+TEXT_SCAN = "text"  # analyze(code, context, budget) -> findings
+LAYERS = "layers"  # the deobfuscator's layer peeling, run by Analyzer itself
+
+# Relative cost; a profile runs every detector up to its cost
+CHEAP = 1
+MODERATE = 2
+EXPENSIVE = 3
+
+PROFILES: Dict[str, int] = {
+    "triage": CHEAP,  # entropy/blob checks only, no parsing
+    "standard": MODERATE,  # everything built in
+    "deep": EXPENSIVE,  # plus plugins registered as expensive
+}
+DEFAULT_PROFILE = "standard"
+
+ENTRY_POINT_GROUP = "analyzer.detectors"
+
+class DetectorSpec:
+    """How to build a detector, what it needs and what it costs.
+
+    Plugins expose one of these (or a callable returning one) under the
+    ``analyzer.detectors`` entry point group. version should change whenever
+    the plugin's output does; it is part of the result cache key. factory
+    may be a "module:attr" string, imported only when the detector is used.
+    """
+
+    def __init__(self, name: str, factory: Optional[Union[str, Callable[[], Any]]], kind: str, needs: Iterable[str],
+                 cost: int = MODERATE, version: str = "1"):
+        if kind not in (VISITOR, TEXT_SCAN, LAYERS):
+            raise ValueError(f"Unknown detector kind: {kind}")
+        self.name = name
+        self.factory = factory
+        self.kind = kind
+        self.needs: Set[str] = set(needs)
+        if kind == VISITOR:
+            self.needs.add(AST)
+        self.cost = cost
+        self.version = version
+
+    def create(self) -> Any:
+        factory = self.factory
+        if isinstance(factory, str):
+            factory = _resolve(factory)
+        return factory()
+
+    def __repr__(self) -> str:
+        return f"DetectorSpec({self.name}, {self.kind}, cost={self.cost})"
+
+# name -> spec, in registration order (which is also report finding order)
+_registry: Dict[str, DetectorSpec] = {}
+_plugins_loaded = False
+
+BUILTIN = ("ast", "static", "heuristic", "layers")
+
+def register(spec: DetectorSpec) -> DetectorSpec:
+    """Add a detector, replacing any earlier one with the same name."""
+    _registry[spec.name] = spec
+    return spec
+
+def _resolve(target: str) -> Any:
+    """Object named by "module:attr[.attr...]"."""
+    module, _, attrs = target.partition(":")
+    obj = importlib.import_module(module)
+    for attr in attrs.split(".") if attrs else ():
+        obj = getattr(obj, attr)
+    return obj
+
+def _entry_points(group: str) -> List[Tuple[str, str]]:
+    """(name, "module:attr") of every installed entry point in group.
+
+    Reads the dist-info/egg-info entry_points.txt files directly: importing
+    importlib.metadata alone takes longer than the rest of CLI startup.
+    """
+    found: Dict[str, str] = {}
+    for base in sys.path:
+        base = base or "."
+        try:
+            names = os.listdir(base)
+        except OSError:
+            continue
+        for name in names:
+            if not name.endswith((".dist-info", ".egg-info")):
+                continue
+            try:
+                with open(os.path.join(base, name, "entry_points.txt"), encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+            section = None
+            for line in lines:
+                line = line.strip()
+                if line.startswith("["):
+                    section = line.strip("[]").strip()
+                elif section == group and "=" in line and not line.startswith(("#", ";")):
+                    ep_name, _, value = line.partition("=")
+                    # first on sys.path wins, like the import system; drop any [extras]
+                    found.setdefault(ep_name.strip(), value.split("[")[0].strip())
+    return list(found.items())
+
+def load_plugins():
+    """Register detectors advertised by installed packages (once per process)."""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for name, target in _entry_points(ENTRY_POINT_GROUP):
+        try:
+            spec = _resolve(target)
+            if not isinstance(spec, DetectorSpec):
+                spec = spec()
+            register(spec)
+            logger.info(f"Loaded detector plugin {spec.name} from {target}")
+        except Exception as e:
+            # a broken plugin must not take the analyzer down
+            logger.error(f"Failed to load detector plugin {name}: {e}")
+
+def available() -> List[DetectorSpec]:
+    load_plugins()
+    return list(_registry.values())
+
+def select(profile: Optional[str] = None, names: Optional[Iterable[str]] = None) -> List[DetectorSpec]:
+    """Detectors to run: the named ones, or every one within the profile's cost."""
+    specs = available()
+    if names is not None:
+        wanted = set(names)
+        unknown = wanted - {s.name for s in specs}
+        if unknown:
+            raise ValueError(f"Unknown detectors: {', '.join(sorted(unknown))}")
+        return [s for s in specs if s.name in wanted]
+    profile = profile or DEFAULT_PROFILE
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile: {profile} (choose from {', '.join(PROFILES)})")
+    return [s for s in specs if s.cost <= PROFILES[profile]]
+
+def needs_of(specs: Iterable[DetectorSpec]) -> Set[str]:
+    needs: Set[str] = set()
+    for spec in specs:
+        needs |= spec.needs
+    return needs
+
+def variant(specs: Iterable[DetectorSpec]) -> str:
+    """Cache key suffix for a selection; empty for the built-in standard set."""
+    specs = list(specs)
+    if [s.name for s in specs] == list(BUILTIN) and all(_registry.get(s.name) is s for s in specs):
+        return ""
+    return ",".join(f"{s.name}@{s.version}" for s in specs)
+
+register(DetectorSpec("ast", "analyzer.detectors.ast_detectors:ASTDetector", VISITOR, [AST], MODERATE))
+register(DetectorSpec("static", "analyzer.detectors.static_detectors:StaticDetector", TEXT_SCAN, [RAW, TEXT, SPANS], CHEAP))
+register(DetectorSpec("heuristic", "analyzer.detectors.heuristic_detectors:HeuristicDetector", VISITOR, [AST], MODERATE))
+register(DetectorSpec("layers", None, LAYERS, [SPANS], MODERATE))
@@ -0,0 +1,120 @@
+import re
+import binascii
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+Text = Union[str, bytes]
+
+# One alternation, one left-to-right pass. chr() calls and \xNN runs are
+# zero-width lookaheads so they don't consume characters a base64 run
+# (e.g. the digits in chr(123...)) would also claim; the lookbehind keeps
+# an escape run from being re-reported at each of its inner escapes.
+_TOKENS = r'''
+    (?=chr\((?P<chr>\d+)\))
+  | (?P<b64>[A-Za-z0-9+/]{20,})
+  | (?<!\\x[0-9a-fA-F]{2})(?=(?P<esc>(?:\\x[0-9a-fA-F]{2}){10,}))
+'''
+_CHR_CALL = r'chr\((\d+)\)'
+_ALNUM_SPLIT = r'[+/]'
+_HEX_DIGITS = r'[0-9a-fA-F]+'
+
+# compiled on first scan, so importing the package stays cheap for the CLI
+_compiled: Dict[bool, Tuple["re.Pattern", ...]] = {}
+
+def _patterns(is_bytes: bool) -> Tuple["re.Pattern", ...]:
+    """(token, chr call, alnum split, hex digits) for str or bytes input."""
+    patterns = _compiled.get(is_bytes)
+    if patterns is None:
+        source = [_TOKENS, _CHR_CALL, _ALNUM_SPLIT, _HEX_DIGITS]
+        if is_bytes:
+            source = [p.encode() for p in source]
+        patterns = _compiled[is_bytes] = (re.compile(source[0], re.VERBOSE),) + tuple(re.compile(p) for p in source[1:])
+    return patterns
+
+BASE64 = "base64"  # quad-aligned base64 blob, 20+ chars
+HEX_ESCAPE = "hex_escape"  # 10+ consecutive \xNN escapes
+HEX = "hex"  # bare hex digits, 80+ chars, even length, not inside a longer word
+CHR = "chr"  # chr(N) call; text is the digits
+
+class Span:
+    __slots__ = ("start", "end", "kind", "text")
+
+    def __init__(self, start: int, end: int, kind: str, text: Text):
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"Span({self.kind}, {self.start}-{self.end})"
+
+class SpanTable:
+    """Blob-like spans of a text (str or bytes), found in a single pass.
+
+    Base64 spans follow the quad rule the detectors have always used: from
+    the start of a run of base64 alphabet, as many whole 4-char groups as
+    fit, plus trailing padding when it completes the last group. Decoded
+    base64 is cached per span so every consumer decodes a blob once.
+    """
+
+    def __init__(self, data: Text):
+        self.data = data
+        self.spans: List[Span] = scan(data)
+        self._decoded: Dict[int, Optional[bytes]] = {}
+
+    def of_kind(self, kind: str, min_length: int = 0) -> Iterator[Span]:
+        return (s for s in self.spans if s.kind == kind and s.end - s.start >= min_length)
+
+    def decode_base64(self, span: Span) -> Optional[bytes]:
+        """a2b_base64 of a base64 span (None if it doesn't decode), computed once."""
+        if span.start not in self._decoded:
+            try:
+                self._decoded[span.start] = binascii.a2b_base64(span.text)
+            except binascii.Error:
+                self._decoded[span.start] = None
+        return self._decoded[span.start]
+
+def scan(data: Text) -> List[Span]:
+    """Spans of every kind in data, ordered by start offset."""
+    is_bytes = isinstance(data, (bytes, bytearray))
+    token, chr_call, _, _ = _patterns(is_bytes)
+    eq, pad2 = (b'=', b'==') if is_bytes else ('=', '==')
+    spans: List[Span] = []
+
+    for m in token.finditer(data):
+        if m.group("chr") is not None:
+            spans.append(Span(m.start(), m.end("chr") + 1, CHR, m.group("chr")))
+        elif m.group("esc") is not None:
+            spans.append(Span(m.start(), m.end("esc"), HEX_ESCAPE, m.group("esc")))
+        else:
+            start, run_end = m.span("b64")
+            length = run_end - start
+            end = start + length - length % 4
+            if length % 4 == 2 and data[run_end:run_end + 2] == pad2:
+                end = run_end + 2
+            elif length % 4 == 3 and data[run_end:run_end + 1] == eq:
+                end = run_end + 1
+            spans.append(Span(start, end, BASE64, data[start:end]))
+            if length >= 80:
+                _hex_segments(data, start, run_end, is_bytes, spans)
+            # a run swallowing the name of a trailing chr( call
+            tail = chr_call.match(data, run_end - 3)
+            if tail is not None:
+                spans.append(Span(tail.start(), tail.end(), CHR, tail.group(1)))
+
+    spans.sort(key=lambda s: s.start)
+    return spans
+
+def _hex_segments(data: Text, start: int, end: int, is_bytes: bool, spans: List[Span]):
+    # bare hex = a whole alphanumeric word of hex digits; '+' and '/' are the
+    # only non-alphanumerics inside a base64 run
+    _, _, split, hex_digits = _patterns(is_bytes)
+    pos = start
+    for sep in split.finditer(data, start, end):
+        _add_hex(data, pos, sep.start(), hex_digits, spans)
+        pos = sep.end()
+    _add_hex(data, pos, end, hex_digits, spans)
+
+def _add_hex(data: Text, start: int, end: int, hex_digits, spans: List[Span]):
+    length = end - start
+    if length >= 80 and length % 2 == 0 and hex_digits.fullmatch(data, start, end):
+        spans.append(Span(start, end, HEX, data[start:end]))
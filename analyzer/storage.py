@@ -1,20 +1,144 @@
+import os
 import sqlite3
 import json
+import time
+import queue
+import logging
+import threading
+import functools
+from concurrent.futures import Future
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from .models import AnalysisReport, Finding
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+from .models import AnalysisReport, ArchiveSummary, Finding
+from .metrics import REGISTRY
+
+logger = logging.getLogger("analyzer")
+
+DB_WRITE_SECONDS = REGISTRY.histogram("analyzer_db_write_seconds", "SQLite write transaction latency", ("operation",))
+DB_WRITE_FAILURES = REGISTRY.counter("analyzer_db_write_failures_total", "SQLite write transactions that raised", ("operation",))
+
+def _metered(method):
+    """Time a write method into analyzer_db_write_seconds and count its failures."""
+    operation = method.__name__
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            DB_WRITE_FAILURES.inc(operation)
+            raise
+        finally:
+            DB_WRITE_SECONDS.observe(time.perf_counter() - start, operation)
+    return timed
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version.
+# Append new steps; never edit one that has shipped.
+MIGRATIONS = [
+    # 1: secondary indexes for run lookups, filters and pagination
+    [
+        "CREATE INDEX IF NOT EXISTS idx_findings_run_id ON findings(run_id)",
+        "CREATE INDEX IF NOT EXISTS idx_findings_technique ON findings(technique)",
+        "CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_runs_level_score ON runs(level, total_score)",
+    ],
+    # 2: asynchronous scan jobs (see analyzer.jobs.JobManager)
+    [
+        """CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            source TEXT NOT NULL,
+            save INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            done INTEGER NOT NULL DEFAULT 0,
+            errors INTEGER NOT NULL DEFAULT 0,
+            created TEXT NOT NULL,
+            started TEXT,
+            finished TEXT,
+            error TEXT
+        )""",
+        """CREATE TABLE IF NOT EXISTS job_items (
+            job_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, seq)
+        )""",
+        """CREATE TABLE IF NOT EXISTS job_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            run_id INTEGER,
+            report TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_job_results_job ON job_results(job_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)",
+    ],
+    # 3: per-path manifest for incremental batch scans (see analyzer.manifest)
+    [
+        """CREATE TABLE IF NOT EXISTS manifest (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            report TEXT NOT NULL,
+            scanned TEXT NOT NULL,
+            deleted TEXT
+        )""",
+    ],
+    # 4: one summary per archive scanned in place (see analyzer.archives); members are ordinary runs
+    [
+        """CREATE TABLE IF NOT EXISTS archive_scans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            members INTEGER NOT NULL,
+            skipped INTEGER NOT NULL,
+            nested INTEGER NOT NULL,
+            bytes_read INTEGER NOT NULL,
+            max_score INTEGER NOT NULL,
+            level TEXT NOT NULL,
+            levels TEXT NOT NULL,
+            error TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_archive_scans_path ON archive_scans(path, id)",
+    ],
+]
 
 class SQLiteStorage:
     def __init__(self, db_path: str = "analysis.db"):
         self.db_path = db_path
+        self._local = threading.local()
         self.init_db()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        """Long-lived connection for the calling thread (reopened after a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            # WAL is persistent in the file; NORMAL sync is durable under WAL
+            # except on power loss, and avoids an fsync per transaction
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-16000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
 
     def init_db(self):
         """Initialize database schema."""
         with self.get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
             cursor = conn.cursor()
             
             # Runs table
@@ -44,57 +168,132 @@ class SQLiteStorage:
                     FOREIGN KEY(run_id) REFERENCES runs(id)
                 )
             """)
+
+            # Result cache (see analyzer.cache.ResultCache)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS result_cache (
+                    content_hash TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    report TEXT NOT NULL,
+                    created TEXT NOT NULL,
+                    PRIMARY KEY (content_hash, fingerprint)
+                )
+            """)
+            conn.commit()
+            self.migrate(conn)
+
+    def migrate(self, conn: sqlite3.Connection):
+        """Apply any migrations newer than the database's user_version."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            logger.info(f"Applying database migration {number}")
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
             conn.commit()
 
+    @_metered
     def save_run(self, report: AnalysisReport) -> int:
         """Save analysis report to DB and return run ID."""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Insert run
-            cursor.execute("""
-                INSERT INTO runs (timestamp, file_path, total_score, level, error)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                datetime.now().isoformat(),
-                report.file_path,
-                report.total_score,
-                report.obfuscation_level,
-                report.error
-            ))
-            
-            run_id = cursor.lastrowid
-            
-            # Insert findings
-            if report.findings:
-                findings_data = [
-                    (
-                        run_id,
-                        f.category,
-                        f.technique,
-                        f.confidence,
-                        f.score,
-                        str(f.location),
-                        f.snippet,
-                        f.description
-                    ) for f in report.findings
-                ]
-                
-                cursor.executemany("""
-                    INSERT INTO findings (run_id, category, technique, confidence, score, location, snippet, description)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, findings_data)
-            
+            run_id = self._insert_run(conn.cursor(), report)
             conn.commit()
             return run_id
 
-    def list_runs(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """List recent runs."""
+    @_metered
+    def save_runs(self, reports: Iterable[AnalysisReport], batch_size: int = 500) -> List[int]:
+        """Save many reports, committing once per batch_size reports. Returns run IDs in order."""
+        run_ids: List[int] = []
+        conn = self.get_connection()
+        pending = 0
+        with conn:
+            cursor = conn.cursor()
+            for report in reports:
+                run_ids.append(self._insert_run(cursor, report))
+                pending += 1
+                if pending >= batch_size:
+                    conn.commit()
+                    pending = 0
+            conn.commit()
+        return run_ids
+
+    def _insert_run(self, cursor: sqlite3.Cursor, report: AnalysisReport) -> int:
+        """Insert one run and its findings without committing."""
+        # Insert run
+        cursor.execute("""
+            INSERT INTO runs (timestamp, file_path, total_score, level, error)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            datetime.now().isoformat(),
+            report.file_path,
+            report.total_score,
+            report.obfuscation_level,
+            report.error
+        ))
+        
+        run_id = cursor.lastrowid
+        
+        # Insert findings
+        if report.findings:
+            findings_data = [
+                (
+                    run_id,
+                    f.category,
+                    f.technique,
+                    f.confidence,
+                    f.score,
+                    str(f.location),
+                    f.snippet,
+                    f.description
+                ) for f in report.findings
+            ]
+            
+            cursor.executemany("""
+                INSERT INTO findings (run_id, category, technique, confidence, score, location, snippet, description)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, findings_data)
+        
+        return run_id
+
+    def list_runs(self, limit: int = 50, cursor: Optional[int] = None, level: Optional[str] = None,
+                  min_score: Optional[int] = None, max_score: Optional[int] = None,
+                  technique: Optional[str] = None, since: Optional[str] = None,
+                  until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List runs newest first, optionally filtered.
+
+        Keyset pagination: pass the id of the last run of the previous page as
+        cursor. since/until are ISO timestamps bounding the run time.
+        """
+        clauses = []
+        params: List[Any] = []
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+        if level is not None:
+            clauses.append("level = ?")
+            params.append(level)
+        if min_score is not None:
+            clauses.append("total_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("total_score <= ?")
+            params.append(max_score)
+        if technique is not None:
+            clauses.append("id IN (SELECT run_id FROM findings WHERE technique = ?)")
+            params.append(technique)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
         with self.get_connection() as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,))
-            rows = cursor.fetchall()
+            cur = conn.cursor()
+            cur.execute(f"SELECT * FROM runs {where}ORDER BY id DESC LIMIT ?", (*params, limit))
+            rows = cur.fetchall()
             return [dict(row) for row in rows]
 
     def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
@@ -117,3 +316,294 @@ class SQLiteStorage:
             run_data["findings"] = [dict(row) for row in findings_rows]
             
             return run_data
+
+    def get_cached_report(self, content_hash: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Fetch a cached report dict for the given content hash and rules fingerprint."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT report FROM result_cache WHERE content_hash = ? AND fingerprint = ?",
+                (content_hash, fingerprint)
+            )
+            row = cursor.fetchone()
+            return json.loads(row[0]) if row else None
+
+    @_metered
+    def put_cached_report(self, content_hash: str, fingerprint: str, report: AnalysisReport):
+        """Store a report in the persistent cache tier."""
+        with self.get_connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO result_cache (content_hash, fingerprint, report, created)
+                VALUES (?, ?, ?, ?)
+            """, (content_hash, fingerprint, json.dumps(report.to_dict()), datetime.now().isoformat()))
+            conn.commit()
+
+    @_metered
+    def purge_cache(self, fingerprint: str) -> int:
+        """Delete cache rows produced by any other rules fingerprint."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM result_cache WHERE fingerprint != ?", (fingerprint,))
+            conn.commit()
+            return cursor.rowcount
+
+    def get_manifest(self, root: str) -> Dict[str, Tuple[int, int, str, str, Optional[str]]]:
+        """path -> (size, mtime_ns, content_hash, fingerprint, deleted) for every entry under root."""
+        prefix = os.path.join(root, "")
+        # prefix range on the primary key: every path starting with prefix
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self.get_connection() as conn:
+            rows = conn.execute("""
+                SELECT path, size, mtime_ns, content_hash, fingerprint, deleted FROM manifest
+                WHERE path >= ? AND path < ?
+            """, (prefix, upper)).fetchall()
+            return {row[0]: tuple(row[1:]) for row in rows}
+
+    def get_manifest_reports(self, paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored report dicts for the given manifest paths."""
+        reports: Dict[str, Dict[str, Any]] = {}
+        with self.get_connection() as conn:
+            # stay under SQLite's bound-parameter limit
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT path, report FROM manifest WHERE path IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                reports.update((row[0], json.loads(row[1])) for row in rows)
+        return reports
+
+    @_metered
+    def put_manifest(self, entries: List[Tuple[str, int, int, str, str, str]]):
+        """Upsert (path, size, mtime_ns, content_hash, fingerprint, report_json) rows in one transaction."""
+        now = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO manifest (path, size, mtime_ns, content_hash, fingerprint, report, scanned, deleted)
+                VALUES (?, ?, ?, ?, ?, ?, ?, NULL)
+            """, [entry + (now,) for entry in entries])
+            conn.commit()
+
+    @_metered
+    def save_archive_summaries(self, summaries: List[ArchiveSummary]):
+        """Store one row per archive scanned, in one transaction."""
+        now = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO archive_scans (timestamp, path, size, members, skipped, nested, bytes_read, max_score, level, levels, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(now, s.archive, s.size, s.members, s.skipped, s.nested, s.bytes_read, s.max_score, s.level,
+                   json.dumps(s.levels), s.error) for s in summaries])
+            conn.commit()
+
+    def list_archive_summaries(self, limit: int = 50, path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Archive scans newest first, optionally only those of one archive path."""
+        where, params = ("WHERE path = ? ", [path]) if path is not None else ("", [])
+        with self.get_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"SELECT * FROM archive_scans {where}ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+        return [dict(row, levels=json.loads(row["levels"])) for row in rows]
+
+    @_metered
+    def touch_manifest(self, entries: List[Tuple[str, int, int]]):
+        """Record a new (path, size, mtime_ns) for entries whose content turned out unchanged."""
+        now = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            conn.executemany(
+                "UPDATE manifest SET size = ?, mtime_ns = ?, scanned = ? WHERE path = ?",
+                [(size, mtime_ns, now, path) for path, size, mtime_ns in entries]
+            )
+            conn.commit()
+
+    @_metered
+    def mark_manifest_deleted(self, paths: List[str]):
+        now = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            conn.executemany("UPDATE manifest SET deleted = ? WHERE path = ?", [(now, path) for path in paths])
+            conn.commit()
+
+    @_metered
+    def create_job(self, job_id: str, source: Dict[str, Any], paths: List[str], save: bool = False):
+        """Register a job and its work items (one per file, in processing order)."""
+        with self.get_connection() as conn:
+            conn.execute("""
+                INSERT INTO jobs (id, status, source, save, total, created)
+                VALUES (?, 'queued', ?, ?, ?, ?)
+            """, (job_id, json.dumps(source), int(save), len(paths), datetime.now().isoformat()))
+            conn.executemany(
+                "INSERT INTO job_items (job_id, seq, path) VALUES (?, ?, ?)",
+                ((job_id, seq, path) for seq, path in enumerate(paths))
+            )
+            conn.commit()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.get_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if not row:
+                return None
+            job = dict(row)
+            job["source"] = json.loads(job["source"])
+            job["save"] = bool(job["save"])
+            return job
+
+    def list_unfinished_jobs(self) -> List[str]:
+        """IDs of jobs that were queued or running (e.g. when the server stopped)."""
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created"
+            ).fetchall()
+            return [row[0] for row in rows]
+
+    def pending_job_items(self, job_id: str) -> List[Tuple[int, str]]:
+        """(seq, path) of items not yet completed, in order."""
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT seq, path FROM job_items WHERE job_id = ? AND done = 0 ORDER BY seq", (job_id,)
+            ).fetchall()
+            return [(row[0], row[1]) for row in rows]
+
+    @_metered
+    def set_job_status(self, job_id: str, status: str, error: Optional[str] = None):
+        now = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            if status == "running":
+                conn.execute("UPDATE jobs SET status = ?, started = COALESCE(started, ?) WHERE id = ?",
+                             (status, now, job_id))
+            elif status in ("done", "failed"):
+                conn.execute("UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ?",
+                             (status, now, error, job_id))
+            else:
+                conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (status, job_id))
+            conn.commit()
+
+    @_metered
+    def record_job_results(self, job_id: str, results: List[Tuple[int, AnalysisReport]], save: bool = False):
+        """Store a batch of (seq, report) results and advance the job's counters in one transaction."""
+        run_ids: List[Optional[int]] = [None] * len(results)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if save:
+                run_ids = [
+                    self._insert_run(cursor, report) if not report.error else None
+                    for _, report in results
+                ]
+            cursor.executemany(
+                "INSERT INTO job_results (job_id, seq, run_id, report) VALUES (?, ?, ?, ?)",
+                [(job_id, seq, run_id, json.dumps(report.to_dict()))
+                 for (seq, report), run_id in zip(results, run_ids)]
+            )
+            cursor.executemany(
+                "UPDATE job_items SET done = 1 WHERE job_id = ? AND seq = ?",
+                [(job_id, seq) for seq, _ in results]
+            )
+            errors = sum(1 for _, report in results if report.error)
+            cursor.execute(
+                "UPDATE jobs SET done = done + ?, errors = errors + ? WHERE id = ?",
+                (len(results), errors, job_id)
+            )
+            conn.commit()
+
+    def get_job_results(self, job_id: str, after_id: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        """Results in completion order; page with after_id = last returned 'id'."""
+        with self.get_connection() as conn:
+            rows = conn.execute("""
+                SELECT id, seq, run_id, report FROM job_results
+                WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?
+            """, (job_id, after_id, limit)).fetchall()
+            return [
+                {"id": row[0], "seq": row[1], "run_id": row[2], "report": json.loads(row[3])}
+                for row in rows
+            ]
+
+    def get_latest_job_results(self, job_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        with self.get_connection() as conn:
+            rows = conn.execute("""
+                SELECT id, seq, run_id, report FROM job_results
+                WHERE job_id = ? ORDER BY id DESC LIMIT ?
+            """, (job_id, limit)).fetchall()
+            return [
+                {"id": row[0], "seq": row[1], "run_id": row[2], "report": json.loads(row[3])}
+                for row in reversed(rows)
+            ]
+
+
+class WriterSaturated(Exception):
+    """The BackgroundWriter queue is full; the database is falling behind."""
+
+class BackgroundWriter:
+    """Single writer thread that group-commits reports queued from request handlers.
+
+    submit() returns a Future resolving to the run ID once the report's batch
+    is committed. Reports are flushed when flush_size are pending or
+    flush_interval seconds have passed, whichever comes first.
+    """
+
+    _STOP = object()
+
+    def __init__(self, storage: SQLiteStorage, flush_size: int = 200, flush_interval: float = 0.05,
+                 max_queue: int = 10000):
+        self.storage = storage
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._closed = False
+        self._thread.start()
+
+    def submit(self, report: AnalysisReport) -> Future:
+        """Queue report without blocking; raises WriterSaturated when max_queue reports are pending."""
+        if self._closed:
+            raise RuntimeError("writer is closed")
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((report, future))
+        except queue.Full:
+            raise WriterSaturated(f"{self._queue.maxsize} reports waiting to be written")
+        return future
+
+    def pending(self) -> int:
+        """Reports queued and not yet committed (approximate)."""
+        return self._queue.qsize()
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush everything still queued and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            # gather more until the batch is full or the interval elapses
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+        self.storage.close()
+
+    def _flush(self, batch):
+        try:
+            run_ids = self.storage.save_runs([report for report, _ in batch], batch_size=len(batch))
+        except Exception as e:
+            logger.error(f"Background write of {len(batch)} runs failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), run_id in zip(batch, run_ids):
+            future.set_result(run_id)
@@ -1,8 +1,10 @@
 import logging
-import logging.handlers
 import os
 
 def setup_logging(log_file="analyzer.log", level=logging.INFO):
+    # logging.handlers pulls in socket/pickle/queue; only pay for it here
+    import logging.handlers
+
     # Ensure log directory exists
     log_dir = os.path.dirname(log_file)
     if log_dir and not os.path.exists(log_dir):
@@ -20,7 +22,8 @@ def setup_logging(log_file="analyzer.log", level=logging.INFO):
 
     # File Handler (Rotating)
     file_handler = logging.handlers.RotatingFileHandler(
-        log_file, maxBytes=1024*1024*5, backupCount=3 # 5MB limit, 3 backups
+        log_file, maxBytes=1024*1024*5, backupCount=3, # 5MB limit, 3 backups
+        delay=True # don't open the file until something is logged
     )
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
@@ -0,0 +1,212 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import ctypes
+    import ctypes.util
+    HAVE_CTYPES = True
+except ImportError:
+    HAVE_CTYPES = False
+
+logger = logging.getLogger("analyzer")
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows, NUL padded)
+
+def _is_source(path: str) -> bool:
+    return path.endswith(".py")
+
+class PollingWatcher:
+    """Finds changed .py files by re-stat'ing the tree every interval seconds."""
+
+    def __init__(self, root: str, interval: float = 1.0):
+        self.root = root
+        self.interval = interval
+        self._seen = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        files: Dict[str, Tuple[int, int]] = {}
+        stack = [self.root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif _is_source(entry.name):
+                                st = entry.stat()
+                                files[entry.path] = (st.st_mtime_ns, st.st_size)
+                        except OSError:
+                            continue  # vanished mid-scan
+            except OSError:
+                continue
+        return files
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Paths created or modified since the last call; blocks up to timeout (None = until something changes)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic()))
+            time.sleep(delay)
+            current = self._snapshot()
+            changed = {path for path, stat in current.items() if self._seen.get(path) != stat}
+            self._seen = current
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Linux inotify watcher over a directory tree; new subdirectories are watched as they appear."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}
+        self._last_batch = time.time()
+        self._add_tree(root)
+
+    def _add_dir(self, path: str) -> bool:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                logger.warning(f"inotify watch limit reached; {path} is not watched (raise fs.inotify.max_user_watches)")
+            return False
+        self._dirs[wd] = path
+        return True
+
+    def _add_tree(self, root: str, found: Optional[Set[str]] = None):
+        """Watch root and every directory below it; files already there are added to found."""
+        for dirpath, dirnames, filenames in os.walk(root):
+            if not self._add_dir(dirpath):
+                dirnames.clear()
+                continue
+            if found is not None:
+                found.update(os.path.join(dirpath, name) for name in filenames if _is_source(name))
+
+    def _rescan(self, since: float) -> Set[str]:
+        """After a queue overflow: every source file modified since the given time."""
+        found: Set[str] = set()
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if _is_source(name) and os.stat(path).st_mtime >= since:
+                        found.add(path)
+                except OSError:
+                    continue
+        return found
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Paths created or modified since the last call; blocks up to timeout (None = until something changes).
+
+        Events for other files don't end the wait early, so they can't cut a
+        debounce short.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            changed = self._read_events(remaining)
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def _read_events(self, timeout: Optional[float]) -> Set[str]:
+        changed: Set[str] = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, pos)
+            name = os.fsdecode(data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0"))
+            pos += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed; rescanning for recent changes")
+                changed |= self._rescan(self._last_batch - 1)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # files can land in a new directory before its watch exists
+                    self._add_tree(path, changed)
+            elif _is_source(name):
+                changed.add(path)
+        self._last_batch = time.time()
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+def open_watcher(root: str, poll: bool = False, interval: float = 1.0):
+    """inotify on Linux, polling elsewhere or when asked for (e.g. network filesystems)."""
+    if not poll and HAVE_CTYPES and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}); falling back to polling")
+    return PollingWatcher(root, interval)
+
+def watch_changes(root: str, debounce: float = 0.5, max_delay: float = 5.0, poll: bool = False,
+                  interval: float = 1.0) -> Iterator[List[str]]:
+    """Yield batches of changed .py files under root, forever.
+
+    Events are coalesced until debounce seconds pass without a new one (or
+    max_delay after the first), so a file saved in several writes, or a
+    checkout touching many files, is analyzed once per batch. Files deleted
+    before the batch is yielded are dropped.
+    """
+    watcher = open_watcher(root, poll, interval)
+    logger.info(f"Watching {root} with {type(watcher).__name__}")
+    try:
+        pending: Set[str] = set()
+        first = 0.0
+        while True:
+            changed = watcher.wait(debounce if pending else None)
+            if changed:
+                if not pending:
+                    first = time.monotonic()
+                pending |= changed
+                if time.monotonic() - first < max_delay:
+                    continue
+            if pending:
+                batch = sorted(path for path in pending if os.path.isfile(path))
+                pending = set()
+                if batch:
+                    yield batch
+    finally:
+        watcher.close()
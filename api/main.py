@@ -1,16 +1,27 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from starlette.routing import Match
 from typing import List, Optional, Any
 import shutil
 import os
+import json
+import time
+import asyncio
 import aiofiles
+from dataclasses import replace
 
-from analyzer.core import Analyzer
 from analyzer.models import AnalysisReport
-from analyzer.storage import SQLiteStorage
+from analyzer.storage import SQLiteStorage, BackgroundWriter, WriterSaturated
+from analyzer.cache import ResultCache, content_hash
+from analyzer.pool import AnalysisPool, PoolSaturated, PoolUnavailable, AnalysisTimeout
+from analyzer.jobs import JobManager
+from analyzer.budget import AnalysisBudget
+from analyzer.metrics import REGISTRY, SIZE_BUCKETS
+from analyzer import registry
 
 app = FastAPI(title="Python Deobfuscator API", version="1.0")
 
@@ -29,6 +40,15 @@ class FindingModel(BaseModel):
     location: str
     snippet: Optional[str] = None
 
+class StageModel(BaseModel):
+    stage: str
+    wall_ms: float
+    cpu_ms: float
+    bytes: int = 0
+    ast_nodes: int = 0
+    regex_matches: int = 0
+    decoded_bytes: int = 0
+
 class ReportResponse(BaseModel):
     file_path: Optional[str]
     total_score: int
@@ -38,10 +58,152 @@ class ReportResponse(BaseModel):
     run_id: Optional[int] = None
     safe_preview: Optional[str] = None
     score_breakdown: Optional[List[dict]] = None
+    partial: bool = False
+    skipped_stages: List[str] = []
+    prefiltered: bool = False
+    stages: List[StageModel] = []  # with ANALYZER_TIMINGS=1, for fresh (uncached) analyses
 
 # Initialize components
-analyzer = Analyzer()
 storage = SQLiteStorage() # Initialize DB
+# saves go through one writer thread that group-commits concurrent requests
+writer = BackgroundWriter(
+    storage,
+    flush_size=int(os.environ.get("ANALYZER_DB_FLUSH_SIZE", "200")),
+    flush_interval=float(os.environ.get("ANALYZER_DB_FLUSH_INTERVAL", "0.05"))
+)
+cache = ResultCache(storage=storage)
+# CPU-bound analysis runs in worker processes, never on the event loop
+timeout = float(os.environ.get("ANALYZER_TIMEOUT", "30"))
+# ANALYZER_TIMINGS=1: per-stage time and counters in responses for fresh analyses
+timings = os.environ.get("ANALYZER_TIMINGS", "0") == "1"
+# ANALYZER_METRICS=0: no per-stage histograms (and no stage timing in the workers)
+stage_metrics = os.environ.get("ANALYZER_METRICS", "1") == "1"
+# the soft budget cuts stages short (partial report) before the hard timeout kills the worker
+budget = AnalysisBudget(
+    wall_time=float(os.environ.get("ANALYZER_TIME_BUDGET", str(timeout * 0.8))),
+    max_memory_mb=int(os.environ.get("ANALYZER_MEMORY_MB", "1024")),
+    max_ast_nodes=int(os.environ.get("ANALYZER_MAX_AST_NODES", "2000000")),
+    max_decoded_bytes=int(float(os.environ.get("ANALYZER_MAX_DECODED_MB", "32")) * 1024 * 1024)
+)
+# detector profile for every analysis; non-default selections get their own cache keys
+profile = os.environ.get("ANALYZER_PROFILE", registry.DEFAULT_PROFILE)
+cache_variant = registry.variant(registry.select(profile))
+pool = AnalysisPool(
+    workers=int(os.environ.get("ANALYZER_WORKERS", "0")) or None,
+    max_queue=int(os.environ.get("ANALYZER_MAX_QUEUE", "64")),
+    timeout=timeout,
+    # ANALYZER_TIERED=1: byte-level prefilter first, full analysis only for suspicious input
+    analyzer_options={"budget": budget, "profile": profile, "tiered": os.environ.get("ANALYZER_TIERED", "0") == "1",
+                      # per-stage timings feed /metrics and, with ANALYZER_TIMINGS=1, responses
+                      "instrument": stage_metrics or timings}
+)
+
+HTTP_SECONDS = REGISTRY.histogram("analyzer_http_request_seconds", "HTTP request latency", ("method", "route"))
+HTTP_REQUESTS = REGISTRY.counter("analyzer_http_requests_total", "HTTP requests", ("method", "route", "status"))
+ANALYSIS_SECONDS = REGISTRY.histogram("analyzer_analysis_seconds", "Analysis latency including queueing", ("result",))
+ANALYSIS_FAILURES = REGISTRY.counter("analyzer_analysis_failures_total", "Analyses that did not return a report", ("reason",))
+INPUT_BYTES = REGISTRY.histogram("analyzer_input_bytes", "Size of analyzed inputs", (), SIZE_BUCKETS)
+STAGE_SECONDS = REGISTRY.histogram("analyzer_stage_seconds", "Wall time per analysis stage (fresh analyses)", ("stage",))
+REGISTRY.callback("analyzer_pool_workers", "Analysis worker processes", lambda: pool.workers)
+REGISTRY.callback("analyzer_pool_in_flight", "Analyses running on a worker", lambda: pool.in_flight)
+REGISTRY.callback("analyzer_pool_queued", "Analyses waiting for a worker", lambda: pool.queued)
+REGISTRY.callback("analyzer_pool_timeouts_total", "Analyses stopped for running over ANALYZER_TIMEOUT", lambda: pool.timeouts, "counter")
+REGISTRY.callback("analyzer_pool_rejected_total", "Analyses refused with 429 because the queue was full", lambda: pool.rejected, "counter")
+REGISTRY.callback("analyzer_cache_lookups_total", "Result cache lookups", lambda: _cache_lookups(), "counter", ("result",))
+REGISTRY.callback("analyzer_cache_hit_ratio", "Result cache hits per lookup since startup", lambda: cache.stats()["hit_rate"])
+REGISTRY.callback("analyzer_cache_entries", "Reports in the in-memory result cache", lambda: cache.stats()["entries"])
+REGISTRY.callback("analyzer_db_write_queue", "Reports waiting for the background database writer", lambda: writer.pending())
+
+def _cache_lookups():
+    stats = cache.stats()
+    return {("hit",): stats["hits"], ("persistent_hit",): stats["persistent_hits"], ("miss",): stats["misses"]}
+
+async def _analyze_cached(code: str, file_path: str = "Input Text") -> AnalysisReport:
+    """Cached analysis on the worker pool."""
+    start = time.perf_counter()
+    INPUT_BYTES.observe(len(code.encode("utf-8", "surrogatepass")))
+    key = content_hash(code, cache_variant)
+    report = await asyncio.to_thread(cache.get, key, file_path)
+    if report is not None:
+        ANALYSIS_SECONDS.observe(time.perf_counter() - start, "cached")
+        return report
+    try:
+        report = await pool.analyze_text(code, file_path)
+    except Exception as e:
+        ANALYSIS_FAILURES.inc(type(e).__name__)
+        raise
+    ANALYSIS_SECONDS.observe(time.perf_counter() - start, "fresh")
+    if report.stages:
+        for t in report.stages:
+            if not t.stage.startswith("layer."):  # already inside "layers"
+                STAGE_SECONDS.observe(t.wall_ms / 1000, t.stage)
+        if not timings:
+            report = replace(report, stages=[])
+    await asyncio.to_thread(cache.put, key, report)
+    return report
+
+# Background scan jobs share the pool with interactive requests
+jobs = JobManager(
+    storage,
+    _analyze_cached,
+    jobs_dir=os.environ.get("ANALYZER_JOBS_DIR", "jobs"),
+    concurrency=int(os.environ.get("ANALYZER_JOB_CONCURRENCY", "4")),
+    allowed_roots=[r for r in os.environ.get("ANALYZER_JOB_ROOTS", "").split(os.pathsep) if r]
+)
+
+def _route_label(request: Request) -> str:
+    """Route template ("/jobs/{job_id}") rather than the raw path, to keep label values bounded."""
+    route = request.scope.get("route")
+    if route is None:
+        for candidate in app.router.routes:
+            if candidate.matches(request.scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", "unmatched")
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # streamed bodies (job results) count until the response starts
+        route = _route_label(request)
+        HTTP_SECONDS.observe(time.perf_counter() - start, request.method, route)
+        HTTP_REQUESTS.inc(request.method, route, str(status))
+
+@app.on_event("startup")
+async def start_pool():
+    pool.start()
+    await jobs.resume()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await jobs.shutdown()
+    pool.close()
+    writer.close()
+
+async def _analyze(code: str, file_path: str = "Input Text") -> AnalysisReport:
+    """Cached analysis on the worker pool, mapping saturation/timeouts to HTTP errors."""
+    try:
+        return await _analyze_cached(code, file_path)
+    except PoolSaturated as e:
+        raise HTTPException(status_code=429, detail=f"Analysis queue full: {e}", headers={"Retry-After": "1"})
+    except PoolUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except AnalysisTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+async def _save(report: AnalysisReport) -> int:
+    # never block the event loop on a full writer queue
+    try:
+        future = writer.submit(report)
+    except WriterSaturated as e:
+        raise HTTPException(status_code=503, detail=f"Database busy: {e}", headers={"Retry-After": "1"})
+    return await asyncio.wrap_future(future)
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
@@ -50,11 +212,11 @@ async def read_root(request: Request):
 @app.post("/analyze", response_model=ReportResponse)
 async def analyze_code(request: AnalyzeRequest):
     """Analyze python code provided in JSON body."""
-    report = analyzer.analyze_text(request.code)
+    report = await _analyze(request.code)
     
     run_id = None
     if request.save:
-        run_id = storage.save_run(report)
+        run_id = await _save(report)
 
     return _format_response(report, run_id)
 
@@ -71,20 +233,118 @@ async def analyze_file(file: UploadFile = File(...), save: bool = Query(False)):
     except UnicodeDecodeError:
         raise HTTPException(status_code=400, detail="File encoding must be UTF-8")
 
-    report = analyzer.analyze_text(code, file_path=file.filename)
+    report = await _analyze(code, file_path=file.filename)
     
     run_id = None
     if save:
-        run_id = storage.save_run(report)
+        run_id = await _save(report)
 
     return _format_response(report, run_id)
 
 @app.get("/runs")
-def list_runs(limit: int = 50):
-    """List recent analysis runs from DB."""
-    runs = storage.list_runs(limit)
+def list_runs(
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="id of the last run on the previous page"),
+    level: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    technique: Optional[str] = None,
+    since: Optional[str] = Query(None, description="ISO timestamp, inclusive"),
+    until: Optional[str] = Query(None, description="ISO timestamp, exclusive")
+):
+    """List analysis runs from DB, newest first.
+
+    When more results may follow, the X-Next-Cursor header holds the cursor
+    for the next page.
+    """
+    runs = storage.list_runs(limit, cursor=cursor, level=level, min_score=min_score, max_score=max_score,
+                             technique=technique, since=since, until=until)
+    if len(runs) == limit:
+        response.headers["X-Next-Cursor"] = str(runs[-1]["id"])
     return runs
 
+@app.post("/jobs", status_code=202)
+async def create_job(file: Optional[UploadFile] = File(None), paths: Optional[str] = Form(None),
+                     save: bool = Form(False)):
+    """Start a background scan of an uploaded zip/tar archive or of server-side paths.
+
+    paths is newline-separated and only accepted under ANALYZER_JOB_ROOTS.
+    Returns immediately; poll GET /jobs/{id} or stream GET /jobs/{id}/results.
+    """
+    if (file is None) == (paths is None):
+        raise HTTPException(status_code=400, detail="Provide either an archive upload or paths")
+
+    job_id = jobs.new_job_id()
+    try:
+        if file is not None:
+            archive_path = jobs.upload_path(job_id, file.filename)
+            async with aiofiles.open(archive_path, "wb") as out:
+                while chunk := await file.read(1024 * 1024):
+                    await out.write(chunk)
+            job = await asyncio.to_thread(jobs.create_archive_job, job_id, archive_path, file.filename, save)
+        else:
+            path_list = [p.strip() for p in paths.splitlines() if p.strip()]
+            job = await asyncio.to_thread(jobs.create_paths_job, job_id, path_list, save)
+    except (ValueError, PermissionError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    jobs.start(job_id)
+    return jobs.status(job)
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, results: int = Query(20, ge=0, le=500)):
+    """Job progress, throughput and the most recent results."""
+    job = storage.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status = jobs.status(job)
+    status["results"] = [_job_result(r) for r in storage.get_latest_job_results(job_id, results)] if results else []
+    return status
+
+@app.get("/jobs/{job_id}/results")
+async def stream_job_results(job_id: str, after: int = Query(0, description="result id to resume after")):
+    """Stream results as NDJSON, following the job until it finishes."""
+    if not await asyncio.to_thread(storage.get_job, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def lines():
+        last = after
+        while True:
+            # read the status first so results committed before it finished aren't missed
+            job = await asyncio.to_thread(storage.get_job, job_id)
+            page = await asyncio.to_thread(storage.get_job_results, job_id, last)
+            for row in page:
+                last = row["id"]
+                yield json.dumps(_job_result(row)) + "\n"
+            if not page and job["status"] not in ("queued", "running"):
+                break
+            if not page:
+                await asyncio.sleep(0.5)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def _job_result(row: dict) -> dict:
+    report = AnalysisReport.from_dict(row["report"])
+    result = jsonable_encoder(_format_response(report, row["run_id"]))
+    result["id"] = row["id"]
+    return result
+
+@app.get("/pool/stats")
+def pool_stats():
+    """Worker pool load: running/queued analyses, timeouts and rejections."""
+    return pool.stats()
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Result cache hit/miss/eviction counters."""
+    return cache.stats()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Service metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/runs/{run_id}")
 def get_run(run_id: int):
     """Get full details of a specific run."""
@@ -117,5 +377,9 @@ def _format_response(report: AnalysisReport, run_id: Optional[int] = None) -> Re
         error=report.error,
         run_id=run_id,
         safe_preview=report.safe_preview,
-        score_breakdown=breakdown
+        score_breakdown=breakdown,
+        partial=report.partial,
+        skipped_stages=report.skipped_stages,
+        prefiltered=report.prefiltered,
+        stages=[StageModel(**vars(t)) for t in report.stages]
     )
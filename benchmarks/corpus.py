@@ -0,0 +1,201 @@
+import os
+import json
+import zlib
+import base64
+import random
+import hashlib
+import argparse
+from typing import Callable, Dict, List, Optional
+
+# Synthetic corpus for benchmarks: N files of roughly size_kb each, every one
+# a benign body of generated plain code plus (depending on its kind) the
+# obfuscation patterns from samples/. The same seed and settings always give
+# byte-identical files, so results from different runs compare.
+
+DEFAULT_MIX = {"plain": 0.55, "b64_zlib": 0.15, "hex": 0.1, "chr": 0.1, "heavy": 0.1}
+
+WORDS = ["data", "item", "value", "count", "result", "buffer", "config", "path", "node", "entry",
+         "index", "total", "name", "key", "record", "chunk", "state", "queue", "handler", "token"]
+
+def _ident(rng: random.Random) -> str:
+    return "_".join(rng.sample(WORDS, 2)) + str(rng.randint(0, 99))
+
+def plain_block(rng: random.Random) -> str:
+    """An ordinary function or class, the bulk of every file."""
+    name, arg, acc = _ident(rng), _ident(rng), _ident(rng)
+    if rng.random() < 0.5:
+        return (
+            f"def {name}({arg}, limit={rng.randint(1, 500)}):\n"
+            f'    """Collect the {rng.choice(WORDS)} entries of {arg} up to limit."""\n'
+            f"    {acc} = []\n"
+            f"    for i, item in enumerate({arg}):\n"
+            f"        if i >= limit:\n"
+            f"            break\n"
+            f"        if item is not None and i % {rng.randint(2, 9)} == 0:\n"
+            f"            {acc}.append(item * {rng.randint(1, 9)})\n"
+            f"    return {acc}\n\n\n"
+        )
+    return (
+        f"class {name.title().replace('_', '')}:\n"
+        f"    def __init__(self, {arg}):\n"
+        f"        self.{arg} = {arg}\n"
+        f"        self.{acc} = {{}}\n\n"
+        f"    def update(self, key, value):\n"
+        f"        self.{acc}[key] = value\n"
+        f"        return len(self.{acc}) > {rng.randint(10, 1000)}\n\n\n"
+    )
+
+def b64_zlib_block(rng: random.Random) -> str:
+    """Plain code wrapped in 1-3 nested zlib+base64 layers (like sample_b64_zlib.py)."""
+    code = plain_block(rng)
+    for _ in range(rng.randint(1, 3)):
+        payload = base64.b64encode(zlib.compress(code.encode())).decode()
+        code = (
+            "import base64\nimport zlib\n"
+            f'payload = "{payload}"\n'
+            "exec(zlib.decompress(base64.b64decode(payload)))\n\n"
+        )
+    return code
+
+def hex_block(rng: random.Random) -> str:
+    """\\xNN escaped strings and bytes.fromhex() blobs."""
+    data = plain_block(rng).encode()[:rng.randint(32, 256)]
+    escaped = "".join(f"\\x{b:02x}" for b in data)
+    return (
+        f'{_ident(rng)} = "{escaped}"\n'
+        f'{_ident(rng)} = bytes.fromhex("{data.hex()}").decode()\n\n'
+    )
+
+def chr_block(rng: random.Random) -> str:
+    """Strings assembled from chr() calls (like sample_chr_join.py)."""
+    text = rng.choice(WORDS) + " " + rng.choice(WORDS)
+    var = _ident(rng)
+    lines = [f"{var} = []"]
+    lines += [f"{var}.append(chr({ord(c)}))" for c in text]
+    lines.append(f"{_ident(rng)} = ''.join({var})")
+    lines.append(f"{_ident(rng)} = ''.join(chr(c) for c in {[ord(c) for c in text[::-1]]})")
+    return "\n".join(lines) + "\n\n"
+
+def heavy_header(rng: random.Random) -> str:
+    """Suspicious imports and single-letter variable spam (like sample_100.py)."""
+    names = "abcdefghjkmn"
+    return (
+        "import base64 as b\nimport zlib as z\nimport marshal\nimport importlib\n"
+        "import subprocess\nimport os\nimport sys\nimport socket\n\n"
+        + "; ".join(f"{n} = {i}" for i, n in enumerate(names, 1)) + "\n"
+        + 'zlib_marker = "x\\x9c"\n\n'
+    )
+
+# obfuscated blocks mixed into the plain code of each kind's files
+KINDS: Dict[str, Callable[[random.Random], str]] = {
+    "b64_zlib": b64_zlib_block,
+    "hex": hex_block,
+    "chr": chr_block,
+}
+
+# the finding each obfuscated kind's blocks are generated to trigger
+EXPECTED = {
+    "b64_zlib": "Nested Encoding",
+    "hex": "Hex Blob",
+    "chr": "chr() character assembly",
+    "heavy": "Suspicious import: marshal",
+}
+
+def check_kinds(samples: int = 20, seed: int = 0) -> List[str]:
+    """Analyze generated blocks of every obfuscated kind; one message per kind whose finding is missing."""
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from analyzer.core import Analyzer
+    analyzer = Analyzer()
+    rng = random.Random(seed)
+    blocks = dict(KINDS, heavy=heavy_header)
+    problems = []
+    for kind, technique in EXPECTED.items():
+        missed = 0
+        for _ in range(samples):
+            report = analyzer.analyze_text(blocks[kind](rng), kind)
+            if not any(f.technique == technique for f in report.findings):
+                missed += 1
+        if missed:
+            problems.append(f"{kind}: {missed}/{samples} blocks without {technique!r}")
+    return problems
+
+def generate_file(rng: random.Random, kind: str, size: int) -> str:
+    """About size bytes of code of the given kind."""
+    parts = [heavy_header(rng)] if kind == "heavy" else []
+    total = sum(len(p) for p in parts)
+    while total < size:
+        if kind == "heavy":
+            block = rng.choice(list(KINDS.values()))(rng) if rng.random() < 0.4 else plain_block(rng)
+        elif kind in KINDS and rng.random() < 0.25:
+            block = KINDS[kind](rng)
+        else:
+            block = plain_block(rng)
+        parts.append(block)
+        total += len(block)
+    return "".join(parts)
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """"plain=0.6,hex=0.4" -> weights; unknown kinds raise ValueError."""
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown corpus kind {kind!r} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+def generate(out_dir: str, count: int, size_kb: float = 8, mix: Optional[Dict[str, float]] = None, seed: int = 0) -> Dict:
+    """Write count files to out_dir and a corpus.json describing them; returns that description."""
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    os.makedirs(out_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    total = 0
+    for i, kind in enumerate(kinds):
+        # +-50% around the target size
+        size = int(size_kb * 1024 * rng.uniform(0.5, 1.5))
+        code = generate_file(rng, kind, size).encode()
+        with open(os.path.join(out_dir, f"{i:06d}_{kind}.py"), "wb") as f:
+            f.write(code)
+        digest.update(code)
+        total += len(code)
+    info = {
+        "count": count, "size_kb": size_kb, "mix": mix, "seed": seed,
+        "bytes": total, "kinds": {kind: kinds.count(kind) for kind in mix},
+        "digest": digest.hexdigest()[:16],
+    }
+    with open(os.path.join(out_dir, "corpus.json"), "w") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+def corpus_files(corpus_dir: str) -> List[str]:
+    return sorted(os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir) if name.endswith(".py"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic corpus of (obfuscated) Python files.")
+    parser.add_argument("out_dir", help="Directory to write the corpus to")
+    parser.add_argument("--count", "-n", type=int, default=200, help="Number of files (default: 200)")
+    parser.add_argument("--size-kb", type=float, default=8, help="Average file size in KB (default: 8)")
+    parser.add_argument("--mix", help=f"Kind weights, e.g. plain=0.6,b64_zlib=0.2,chr=0.2 (default: {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--check", action="store_true", help="Also check that every obfuscated kind triggers its detector; exits 1 if one doesn't")
+    args = parser.parse_args()
+    try:
+        mix = parse_mix(args.mix) if args.mix else None
+    except ValueError as e:
+        parser.error(str(e))
+    info = generate(args.out_dir, args.count, args.size_kb, mix, args.seed)
+    print(f"[+] Wrote {info['count']} files ({info['bytes'] / 1024 / 1024:.1f} MB, digest {info['digest']}) to {args.out_dir}")
+    if args.check:
+        problems = check_kinds(seed=args.seed)
+        for problem in problems:
+            print(f"[!] {problem}")
+        if problems:
+            raise SystemExit(1)
+        print(f"[+] Every kind triggers its detector ({', '.join(f'{k}: {t}' for k, t in EXPECTED.items())})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+from .corpus import DEFAULT_MIX, corpus_files, generate, parse_mix
+
+try:
+    import resource
+    HAVE_RESOURCE = True
+except ImportError:  # Windows
+    HAVE_RESOURCE = False
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# same threshold the CLI uses for large-file mode
+LARGE_FILE_THRESHOLD = 1024 * 1024
+
+# Relative change that counts as a regression: throughput down, or p99
+# latency / peak RSS up, by more than this against the baseline
+DEFAULT_THRESHOLD = 0.10
+
+def _peak_rss_mb() -> Optional[float]:
+    if not HAVE_RESOURCE:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KB on Linux
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def summarize(files: int, size: int, seconds: float, latencies: List[float], peak_rss_mb: Optional[float]) -> Dict[str, Any]:
+    p50, p99 = _percentile(latencies, 50), _percentile(latencies, 99)
+    return {
+        "files": files,
+        "bytes": size,
+        "seconds": round(seconds, 3),
+        "files_per_sec": round(files / seconds, 2) if seconds else None,
+        "mb_per_sec": round(size / 1024 / 1024 / seconds, 3) if seconds else None,
+        "p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+        "p99_ms": round(p99 * 1000, 3) if p99 is not None else None,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+def measure_analyzer(paths: List[str], options: Dict[str, Any], warmup: int = 5) -> Dict[str, Any]:
+    """In-process Analyzer over every file; runs in a fresh process so peak RSS is its own."""
+    sys.path.insert(0, ROOT)
+    from analyzer.core import Analyzer
+    analyzer = Analyzer(**options)
+    for path in paths[:warmup]:
+        analyzer.analyze_file(path, max_size=LARGE_FILE_THRESHOLD)
+    latencies = []
+    start = time.perf_counter()
+    for path in paths:
+        t = time.perf_counter()
+        analyzer.analyze_file(path, max_size=LARGE_FILE_THRESHOLD)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    return summarize(len(paths), sum(os.path.getsize(p) for p in paths), elapsed, latencies, _peak_rss_mb())
+
+def measure_cli(corpus_dir: str, paths: List[str], jobs: int = 1) -> Dict[str, Any]:
+    """`cli.py --batch` end to end (startup included); no per-file latency."""
+    cmd = [sys.executable, os.path.join(ROOT, "cli.py"), "--batch", corpus_dir, "--ndjson", "--jobs", str(jobs)]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak = None
+    if hasattr(os, "wait4"):
+        # ru_maxrss of this child alone; with --jobs > 1 the workers' memory isn't included
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        peak = round(usage.ru_maxrss / 1024, 1)
+    else:
+        proc.wait()
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"cli.py exited with status {proc.returncode}")
+    return summarize(len(paths), sum(os.path.getsize(p) for p in paths), elapsed, [], peak)
+
+def measure_api(url: str, paths: List[str], concurrency: int = 1, run: int = 0) -> Dict[str, Any]:
+    """POST /analyze for every file on a running API server; peak RSS is not observable from here."""
+    endpoint = url.rstrip("/") + "/analyze"
+    # a per-run marker keeps the server's result cache from answering repeats
+    marker = f"\n# benchmark run {run} {time.time()}\n"
+
+    def post(path: str) -> float:
+        with open(path, encoding="utf-8") as f:
+            body = json.dumps({"code": f.read() + marker}).encode()
+        request = urllib.request.Request(endpoint, data=body, headers={"Content-Type": "application/json"})
+        t = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        return time.perf_counter() - t
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(post, paths))
+    elapsed = time.perf_counter() - start
+    return summarize(len(paths), sum(os.path.getsize(p) for p in paths), elapsed, latencies, None)
+
+def _in_child(fn, *args):
+    # spawn, so each measurement starts from a clean interpreter (imports, RSS)
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(fn, *args).result()
+
+def best_of(repeat: int, measure) -> Dict[str, Any]:
+    """The run with the highest throughput out of repeat runs."""
+    runs = [measure(i) for i in range(repeat)]
+    return max(runs, key=lambda r: r["files_per_sec"] or 0)
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Regressions of results against baseline, as readable lines."""
+    regressions = []
+    for target, current in results["results"].items():
+        base = baseline.get("results", {}).get(target)
+        if base is None:
+            continue
+        checks = [("files_per_sec", -1), ("p99_ms", 1), ("peak_rss_mb", 1)]
+        for metric, direction in checks:
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change * direction > threshold:
+                regressions.append(f"{target}: {metric} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+def print_table(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    def fmt(value, spec=".1f"):
+        return "-" if value is None else format(value, spec)
+
+    print(f"{'target':<22} {'files/s':>9} {'MB/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8}  vs baseline")
+    for target, r in results["results"].items():
+        delta = ""
+        base = (baseline or {}).get("results", {}).get(target)
+        if base and base.get("files_per_sec") and r["files_per_sec"]:
+            delta = f"{(r['files_per_sec'] - base['files_per_sec']) / base['files_per_sec']:+.1%} files/s"
+        print(f"{target:<22} {fmt(r['files_per_sec']):>9} {fmt(r['mb_per_sec'], '.2f'):>8} {fmt(r['p50_ms'], '.2f'):>8} "
+              f"{fmt(r['p99_ms'], '.2f'):>8} {fmt(r['peak_rss_mb']):>8}  {delta}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analysis throughput, latency and memory on a synthetic corpus.")
+    parser.add_argument("--corpus", help="Existing corpus directory (default: generate one into a temporary directory)")
+    parser.add_argument("--count", "-n", type=int, default=200, help="Files to generate (default: 200)")
+    parser.add_argument("--size-kb", type=float, default=8, help="Average generated file size in KB (default: 8)")
+    parser.add_argument("--mix", help=f"Generated kind weights (default: {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("--targets", default="analyzer,detectors,cli", help="Comma-separated: analyzer, detectors, cli, api (default: analyzer,detectors,cli)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per target; the fastest counts (default: 3)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="--jobs for the CLI batch target (default: 1)")
+    parser.add_argument("--api-url", help="Base URL of a running API server, for the api target (e.g. http://127.0.0.1:8000)")
+    parser.add_argument("--api-concurrency", type=int, default=4, help="Concurrent requests for the api target (default: 4)")
+    parser.add_argument("--output", "-o", help="Write results as JSON (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against; exits 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"Relative change counted as a regression (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = set(targets) - {"analyzer", "detectors", "cli", "api"}
+    if unknown:
+        parser.error(f"Unknown targets: {', '.join(sorted(unknown))}")
+    if "api" in targets and not args.api_url:
+        parser.error("the api target needs --api-url")
+    try:
+        mix = parse_mix(args.mix) if args.mix else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    tmp = None
+    if args.corpus:
+        corpus_dir = args.corpus
+        info_path = os.path.join(corpus_dir, "corpus.json")
+        corpus = json.load(open(info_path)) if os.path.exists(info_path) else {}
+    else:
+        tmp = corpus_dir = tempfile.mkdtemp(prefix="analyzer-bench-")
+        corpus = generate(corpus_dir, args.count, args.size_kb, mix, args.seed)
+        print(f"[+] Generated {corpus['count']} files ({corpus['bytes'] / 1024 / 1024:.1f} MB, digest {corpus['digest']})")
+    paths = corpus_files(corpus_dir)
+    if not paths:
+        print(f"Error: no .py files in {corpus_dir}")
+        sys.exit(1)
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+            "corpus": corpus,
+        },
+        "results": {},
+    }
+    try:
+        if "analyzer" in targets:
+            print("[*] analyzer")
+            results["results"]["analyzer"] = best_of(args.repeat, lambda _: _in_child(measure_analyzer, paths, {}))
+        if "detectors" in targets:
+            sys.path.insert(0, ROOT)
+            from analyzer import registry
+            # one detector at a time, including building the inputs it needs
+            for spec in registry.available():
+                print(f"[*] detector:{spec.name}")
+                results["results"][f"detector:{spec.name}"] = best_of(
+                    args.repeat, lambda _: _in_child(measure_analyzer, paths, {"detectors": [spec.name]}))
+        if "cli" in targets:
+            print("[*] cli")
+            results["results"]["cli"] = best_of(args.repeat, lambda _: measure_cli(corpus_dir, paths, args.jobs))
+        if "api" in targets:
+            print("[*] api")
+            results["results"]["api"] = best_of(
+                args.repeat, lambda i: measure_api(args.api_url, paths, args.api_concurrency, i))
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print()
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[+] Results written to {args.output}")
+
+    if baseline is not None:
+        base_corpus = baseline.get("meta", {}).get("corpus", {}).get("digest")
+        if base_corpus and base_corpus != corpus.get("digest"):
+            print(f"\n[!] Baseline was measured on a different corpus ({base_corpus}); numbers are not comparable")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n[!] Regressions over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n[+] No regressions over {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
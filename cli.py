@@ -3,58 +3,99 @@ import sys
 import os
 import json
 import logging
-from typing import List, Optional
-from analyzer.core import Analyzer
-from analyzer.models import AnalysisReport
+import time
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+from analyzer.budget import AnalysisBudget
+from analyzer.registry import DEFAULT_PROFILE, PROFILES
+from analyzer.models import AnalysisReport, ArchiveSummary
 from analyzer.utils import setup_logging
 
-# Setup logging
-logger = setup_logging(log_file="logs/analyzer.log")
+if TYPE_CHECKING:
+    from analyzer.core import Analyzer
 
-try:
-    from rich.console import Console
-    from rich.table import Table
-    from rich.panel import Panel
-    from rich import print as rprint
-    HAVE_RICH = True
-except ImportError:
-    HAVE_RICH = False
+# handlers are attached in main(); importing cli must stay cheap (it runs
+# from git hooks and per-file CI steps), so rich, storage and the file log
+# are only set up when used, and --connect clients never load the analyzer
+logger = logging.getLogger("analyzer")
 
-def print_json(report: AnalysisReport):
-    """Outputs report as JSON."""
-    data = {
-        "file": report.file_path,
-        "score": report.total_score,
-        "level": report.obfuscation_level,
-        "findings": [
-            {
-                "category": f.category,
-                "technique": f.technique,
-                "score": f.score,
-                "location": str(f.location),
-                "snippet": f.snippet
-            } for f in report.findings
-        ],
-        "breakdown": [
-            {"rule": b.rule_name, "score": b.score_increment, "reason": b.reason}
-            for b in report.score_breakdown
-        ],
-        "error": report.error
-    }
-    print(json.dumps(data, indent=2))
+# files above this are analyzed in chunked large-file mode
+LARGE_FILE_THRESHOLD = 1024 * 1024
+
+_rich = None
 
-def print_json_batch(reports: List[AnalysisReport]):
-    """Outputs batch reports as JSON."""
-    data = []
-    for report in reports:
-        data.append({
+def load_rich():
+    """(Console, Table, Panel) from rich, imported on first use; () if not installed."""
+    global _rich
+    if _rich is None:
+        try:
+            from rich.console import Console
+            from rich.table import Table
+            from rich.panel import Panel
+            _rich = (Console, Table, Panel)
+        except ImportError:
+            _rich = ()
+    return _rich
+
+def report_to_json(report: AnalysisReport, full: bool = True) -> dict:
+    """JSON-ready dict for a report; full adds findings and score breakdown."""
+    if not full:
+        data = {
+            "file": report.file_path,
+            "score": report.total_score,
+            "level": report.obfuscation_level,
+            "error": report.error
+        }
+    else:
+        data = {
             "file": report.file_path,
             "score": report.total_score,
             "level": report.obfuscation_level,
+            "findings": [
+                {
+                    "category": f.category,
+                    "technique": f.technique,
+                    "score": f.score,
+                    "location": str(f.location),
+                    "snippet": f.snippet
+                } for f in report.findings
+            ],
+            "breakdown": [
+                {"rule": b.rule_name, "score": b.score_increment, "reason": b.reason}
+                for b in report.score_breakdown
+            ],
             "error": report.error
-        })
+        }
+    # only present for partial results, so complete reports keep their old shape
+    if report.partial:
+        data["partial"] = True
+        data["skipped_stages"] = report.skipped_stages
+    if report.prefiltered:
+        data["prefiltered"] = True
+    if report.stages:
+        data["stages"] = [asdict(t) for t in report.stages]
+    return data
+
+def print_json(report: AnalysisReport):
+    """Outputs report as JSON."""
+    print(json.dumps(report_to_json(report), indent=2))
+
+def print_json_batch(reports: List[AnalysisReport], deleted: Optional[List[str]] = None,
+                     archives: Optional[List[ArchiveSummary]] = None):
+    """Outputs batch reports (and files an incremental scan found deleted, and archive summaries) as JSON."""
+    data = [report_to_json(report, full=False) for report in reports]
+    data.extend({"file": path, "deleted": True} for path in deleted or [])
+    data.extend(asdict(summary) for summary in archives or [])
     print(json.dumps(data, indent=2))
 
+def print_ndjson(report: AnalysisReport, full: bool = False):
+    """Writes one report as a single JSON line, flushed immediately."""
+    print_ndjson_line(report_to_json(report, full=full))
+
+def print_ndjson_line(data: dict):
+    sys.stdout.write(json.dumps(data) + "\n")
+    sys.stdout.flush()
+
 def print_report(report: AnalysisReport):
     """Prints a single file report to console."""
     if report.error:
@@ -62,9 +103,14 @@ def print_report(report: AnalysisReport):
         print(f"[!] Analysis failed for {report.file_path}: {report.error}")
         return
 
-    if not HAVE_RICH:
+    rich = load_rich()
+    if not rich:
         print(f"Analysis Report for: {report.file_path}")
         print(f"Score: {report.total_score} ({report.obfuscation_level})")
+        if report.prefiltered:
+            print("Prefilter verdict: no suspicious tokens, blobs or entropy - full analysis skipped")
+        if report.partial:
+            print(f"Partial analysis - skipped stages: {', '.join(report.skipped_stages)}")
         print("\nFindings:")
         for f in report.findings:
             print(f"[{f.category}] {f.technique} (Score: {f.score}) @ {f.location}")
@@ -74,8 +120,14 @@ def print_report(report: AnalysisReport):
             print(f"  +{b.score_increment}: {b.rule_name}")
         return
 
+    Console, Table, Panel = rich
     console = Console()
     
+    if report.prefiltered:
+        console.print("[green]Prefilter verdict: no suspicious tokens, blobs or entropy - full analysis skipped[/green]")
+    if report.partial:
+        console.print(f"[yellow]Partial analysis - skipped stages: {', '.join(report.skipped_stages)}[/yellow]")
+
     # Header
     score_color = "green"
     if report.total_score > 20: score_color = "yellow"
@@ -116,9 +168,36 @@ def print_report(report: AnalysisReport):
     if report.safe_preview:
         console.print(Panel(report.safe_preview[:500] + ("..." if len(report.safe_preview)>500 else ""), title="Safe Preview (Truncated)", border_style="blue"))
 
+def print_watch_line(report: AnalysisReport):
+    """One line per file analyzed in watch mode."""
+    stamp = time.strftime("%H:%M:%S")
+    if report.error:
+        print(f"[{stamp}] {report.file_path}: ERROR {report.error}", flush=True)
+        return
+    techniques = ", ".join(dict.fromkeys(f.technique for f in report.findings if f.score > 0))
+    print(f"[{stamp}] {report.file_path}: {report.total_score} ({report.obfuscation_level})"
+          + (f" - {techniques}" if techniques else ""), flush=True)
+
+def display_name(path: str) -> str:
+    """Base name of a file; archive members keep their archive ("pkg.whl!pkg/mod.py")."""
+    archive, sep, member = path.partition("!")
+    return os.path.basename(archive) + sep + member
+
+def print_archive_summary(summaries: List[ArchiveSummary], out=sys.stdout):
+    print(f"\nArchives: {len(summaries)} scanned, {sum(s.members for s in summaries)} members analyzed, "
+          f"{sum(s.skipped for s in summaries)} skipped", file=out)
+    for s in summaries:
+        line = f"  {s.archive}: {s.members} members, max score {s.max_score} ({s.level})"
+        if s.skipped:
+            line += f", {s.skipped} skipped"
+        if s.error:
+            line += f" - stopped: {s.error}"
+        print(line, file=out)
+
 def print_batch_summary(reports: List[AnalysisReport]):
     """Prints a summary table for batch processing."""
-    if not HAVE_RICH:
+    rich = load_rich()
+    if not rich:
         print("\nBatch Analysis Summary:")
         print(f"{'File':<50} | {'Score':<5} | {'Level':<10}")
         print("-" * 70)
@@ -129,6 +208,7 @@ def print_batch_summary(reports: List[AnalysisReport]):
                 print(f"{r.file_path:<50} | {r.total_score:<5} | {r.obfuscation_level:<10}")
         return
 
+    Console, Table, _ = rich
     console = Console()
     table = Table(title="Batch Analysis Summary")
     table.add_column("File", style="cyan")
@@ -138,93 +218,436 @@ def print_batch_summary(reports: List[AnalysisReport]):
 
     for r in reports:
         if r.error:
-            table.add_row(os.path.basename(r.file_path), "-", "-", f"[red]ERROR: {r.error}[/red]")
+            table.add_row(display_name(r.file_path), "-", "-", f"[red]ERROR: {r.error}[/red]")
         else:
             style = "green"
             if r.total_score > 20: style = "yellow"
             if r.total_score > 60: style = "red"
-            table.add_row(os.path.basename(r.file_path), str(r.total_score), f"[{style}]{r.obfuscation_level}[/{style}]", "[green]OK[/green]")
+            table.add_row(display_name(r.file_path), str(r.total_score), f"[{style}]{r.obfuscation_level}[/{style}]", "[green]OK[/green]")
 
     console.print(table)
 
-def process_file(analyzer: Analyzer, path: str) -> AnalysisReport:
+_STAGE_COLUMNS = ("Stage", "Wall ms", "CPU ms", "Bytes", "AST nodes", "Matches", "Decoded")
+
+def _stage_row(t) -> List[str]:
+    return [t.stage, f"{t.wall_ms:.2f}", f"{t.cpu_ms:.2f}", str(t.bytes), str(t.ast_nodes),
+            str(t.regex_matches), str(t.decoded_bytes)]
+
+def print_stages(report: AnalysisReport):
+    """Per-stage timings of one report (--timings)."""
+    rich = load_rich()
+    if not rich:
+        print("\nStage Timings:")
+        print("  ".join(f"{c:>10}" for c in _STAGE_COLUMNS))
+        for t in report.stages:
+            print("  ".join(f"{c:>10}" for c in _stage_row(t)))
+        return
+
+    Console, Table, _ = rich
+    table = Table(title="Stage Timings")
+    for i, column in enumerate(_STAGE_COLUMNS):
+        table.add_column(column, justify="left" if i == 0 else "right", style="cyan" if i == 0 else None)
+    for t in report.stages:
+        table.add_row(*_stage_row(t))
+    Console().print(table)
+
+def print_timing_summary(summary, out=sys.stdout, top: int = 10):
+    """Slowest files and total time per stage over a batch (--timings)."""
+    print(f"\nSlowest files (of {summary.count}):", file=out)
+    for wall_ms, path in summary.slowest_files(top):
+        print(f"  {wall_ms:10.2f} ms  {path}", file=out)
+    stages = summary.slowest_stages()
+    total = sum(t.wall_ms for t in stages) or 1.0
+    print("\nTime per stage:", file=out)
+    print("  ".join(f"{c:>10}" for c in _STAGE_COLUMNS + ("Share",)), file=out)
+    for t in stages:
+        print("  ".join(f"{c:>10}" for c in _stage_row(t) + [f"{t.wall_ms / total:.1%}"]), file=out)
+
+def process_file(analyzer: "Analyzer", path: str) -> AnalysisReport:
     logger.info(f"Analyzing file: {path}")
     if not os.path.exists(path):
         return AnalysisReport(file_path=path, total_score=0, obfuscation_level="ERROR", error="File not found")
     
-    # Size check (skip huge files > 1MB to avoid hangs)
-    if os.path.getsize(path) > 1024 * 1024:
-         logger.warning(f"File too large, skipping: {path}")
-         return AnalysisReport(file_path=path, total_score=0, obfuscation_level="SKIPPED", error="File too large (>1MB)")
+    report = analyzer.analyze_file(path, max_size=LARGE_FILE_THRESHOLD)
+    if report.partial:
+        logger.warning(f"Partial analysis of {path}, skipped stages: {', '.join(report.skipped_stages)}")
+    return report
+
+def collect_files(directory: str) -> List[str]:
+    """Recursively list .py files under directory."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if file.endswith(".py"):
+                paths.append(os.path.join(root, file))
+    return paths
+
+class BatchProgress:
+    """Live files/sec and ETA line on stderr (only when stderr is a terminal)."""
+
+    def __init__(self, total: int, interval: float = 0.5):
+        self.total = total
+        self.done = 0
+        self.interval = interval
+        self.enabled = sys.stderr.isatty()
+        self.start = time.monotonic()
+        self._last = 0.0
+
+    def update(self, count: int = 1):
+        self.done += count
+        now = time.monotonic()
+        if self.enabled and (now - self._last >= self.interval or self.done == self.total):
+            self._last = now
+            sys.stderr.write("\r" + self.status(now))
+            sys.stderr.flush()
+
+    def status(self, now: Optional[float] = None) -> str:
+        elapsed = (now or time.monotonic()) - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate > 0 else 0
+        eta = f"{int(remaining // 60)}m{int(remaining % 60):02d}s"
+        return f"[{self.done}/{self.total}] {rate:.1f} files/s, ETA {eta}   "
+
+    def close(self):
+        if self.enabled:
+            sys.stderr.write("\n")
+        logger.info(f"Batch finished: {self.status()}")
+
+class RunSaver:
+    """Saves reports to the database as they are produced, one transaction per batch."""
+
+    def __init__(self, db_path: str, quiet: bool = False, batch_size: int = 500):
+        self.db_path = db_path
+        self.quiet = quiet
+        self.batch_size = batch_size
+        self.saved_count = 0
+        self.db = None
+        self.failed = False
+        self.pending: List[AnalysisReport] = []
+        self.archives: List[ArchiveSummary] = []
+
+    def save(self, report: AnalysisReport):
+        if self.failed or report.error:
+            return
+        self.pending.append(report)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def save_archive(self, summary: ArchiveSummary):
+        """Queue an archive's summary; call after its member reports."""
+        if not self.failed:
+            self.archives.append(summary)
+
+    def flush(self):
+        if self.failed or not (self.pending or self.archives):
+            return
+        try:
+            if self.db is None:
+                from analyzer.storage import SQLiteStorage
+                self.db = SQLiteStorage(self.db_path)
+            self.db.save_runs(self.pending, batch_size=self.batch_size)
+            self.saved_count += len(self.pending)
+            self.pending = []
+            if self.archives:
+                self.db.save_archive_summaries(self.archives)
+                self.archives = []
+        except Exception as e:
+            # stop saving after the first failure, analysis output continues
+            self.failed = True
+            logger.error(f"Failed to save to database: {e}")
+            if not self.quiet:
+                print(f"\n[!] Database Error: {e}")
 
-    return analyzer.analyze_file(path)
+    def close(self):
+        self.flush()
+        logger.info(f"Saved {self.saved_count} runs to {self.db_path}")
+        if not self.quiet and not self.failed:
+            print(f"\n[+] Saved {self.saved_count} results to database: {self.db_path}")
 
 def main():
     parser = argparse.ArgumentParser(description="Python Deobfuscator & Obfuscation Detector")
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("file", nargs="?", help="Path to python file to analyze")
     group.add_argument("--batch", "-b", help="Directory to scan recursively")
+    group.add_argument("--watch", "-w", help="Directory to watch; .py files are analyzed as they are created or modified")
+    group.add_argument("--daemon", action="store_true", help="Run a resident analysis daemon on --socket for --connect clients (uses --jobs workers)")
     
     parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    parser.add_argument("--ndjson", action="store_true", help="Stream one JSON line per file as soon as it is analyzed")
+    parser.add_argument("--full", action="store_true", help="Include findings and score breakdown in --ndjson lines")
     parser.add_argument("--db", help="Path to SQLite database (optional)")
     parser.add_argument("--save", action="store_true", help="Save results to database")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for batch mode (default: 1)")
+    parser.add_argument("--ast-max-mb", type=float, default=8, help="Largest file (MB) that still gets AST analysis in large-file mode (default: 8)")
+    parser.add_argument("--ast-time-budget", type=float, default=10.0, help="Seconds a large file may spend on AST analysis (default: 10)")
+    parser.add_argument("--cache", action="store_true", help="Reuse results for previously seen content (persisted in the database)")
+    parser.add_argument("--time-budget", type=float, default=30.0, help="Seconds one file may take before remaining stages are cut (default: 30, 0 = no limit)")
+    parser.add_argument("--memory-budget-mb", type=int, default=1024, help="Memory one file may use; worker processes enforce it as a hard limit (default: 1024, 0 = no limit)")
+    parser.add_argument("--max-ast-nodes", type=int, default=2_000_000, help="AST nodes walked per file (default: 2000000, 0 = no limit)")
+    parser.add_argument("--max-decoded-mb", type=float, default=32, help="Output of base64/hex/decompression layers per file (default: 32, 0 = no limit)")
+    parser.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE, help="Detectors to run: triage = static checks only, no parsing; deep = also expensive plugins (default: standard)")
+    parser.add_argument("--detectors", help="Comma-separated detector names to run instead of a profile")
+    parser.add_argument("--incremental", action="store_true", help="Batch mode: reuse stored results for files unchanged since the last scan (manifest kept in the database)")
+    parser.add_argument("--debounce", type=float, default=0.5, help="Watch mode: seconds without new events before a batch of changes is analyzed (default: 0.5)")
+    parser.add_argument("--poll", type=float, metavar="SECONDS", help="Watch mode: poll every SECONDS instead of using inotify (e.g. on network filesystems)")
+    parser.add_argument("--tiered", action="store_true", help="Cheap byte-level prefilter first; only suspicious files get full analysis")
+    parser.add_argument("--archives", action="store_true", help="Batch mode: also scan .whl/.zip/.egg/.tar(.gz/.bz2/.xz) files in place, reporting members as archive!member")
+    parser.add_argument("--archive-member-mb", type=float, default=8, help="Largest archive member (MB) that is analyzed (default: 8)")
+    parser.add_argument("--archive-max-mb", type=float, default=256, help="Decompressed MB read per archive, nested archives included (default: 256)")
+    parser.add_argument("--archive-depth", type=int, default=2, help="Levels of archives inside archives to open (default: 2)")
+    parser.add_argument("--timings", action="store_true", help="Record wall/CPU time and work counters per analysis stage; batch runs end with the slowest files and stages")
+    parser.add_argument("--connect", action="store_true", help="Have a running daemon do the analysis (its analysis options apply); analyzes in-process if none is running")
+    parser.add_argument("--socket", metavar="PATH", help="Daemon socket (default: $ANALYZER_SOCKET, else analyzer.sock in $XDG_RUNTIME_DIR or a private /tmp/analyzer-UID directory)")
     
     args = parser.parse_args()
+    if args.incremental and not args.batch:
+        parser.error("--incremental requires --batch")
+    if args.archives and not args.batch:
+        parser.error("--archives requires --batch")
+    if args.connect and args.daemon:
+        parser.error("--connect and --daemon cannot be combined")
+    setup_logging(log_file="logs/analyzer.log")
     
-    analyzer = Analyzer()
+    cache = None
+    if args.cache:
+        from analyzer.cache import ResultCache
+        from analyzer.storage import SQLiteStorage
+        cache = ResultCache(storage=SQLiteStorage(args.db or "analysis.db"))
+
+    options = {
+        "ast_size_budget": int(args.ast_max_mb * 1024 * 1024),
+        "ast_time_budget": args.ast_time_budget,
+        "budget": AnalysisBudget(
+            wall_time=args.time_budget,
+            max_memory_mb=args.memory_budget_mb,
+            max_ast_nodes=args.max_ast_nodes,
+            max_decoded_bytes=int(args.max_decoded_mb * 1024 * 1024)
+        ),
+        "profile": args.profile,
+        "detectors": args.detectors.split(",") if args.detectors else None,
+        "tiered": args.tiered,
+        "instrument": args.timings
+    }
+
+    # Daemon Mode
+    if args.daemon:
+        from analyzer.daemon import DaemonError, DaemonServer
+        try:
+            # as in the API, the budget cuts stages short before the hard timeout kills a worker
+            server = DaemonServer(args.socket, options, workers=args.jobs, cache=cache, max_size=LARGE_FILE_THRESHOLD,
+                                  timeout=args.time_budget / 0.8 if args.time_budget else None)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Starting analysis daemon on {server.socket_path} ({server.pool.workers} workers, Ctrl+C to stop)")
+        try:
+            server.run()
+        except DaemonError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    client = analyzer = None
+    if args.connect:
+        from analyzer.daemon import DaemonClient, DaemonError, DaemonUnavailable
+        try:
+            client = DaemonClient.connect(args.socket)
+        except DaemonUnavailable as e:
+            logger.warning(f"{e}; analyzing in-process")
+    if client is None:
+        from analyzer.core import Analyzer
+        try:
+            analyzer = Analyzer(cache=cache, **options)
+        except ValueError as e:
+            parser.error(str(e))
+
+    def analyze(paths: List[str], jobs: int = 1) -> Iterator[AnalysisReport]:
+        # reports from the daemon arrive in completion order, like jobs > 1; put
+        # them back in file order when a sequential run was asked for
+        if client is not None:
+            try:
+                yield from client.analyze_paths(paths, ordered=jobs <= 1)
+            except DaemonError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        elif jobs > 1:
+            yield from analyzer.analyze_many(paths, workers=jobs, max_size=LARGE_FILE_THRESHOLD)
+        else:
+            for path in paths:
+                yield process_file(analyzer, path)
+
+    def scan_archives(paths: List[str]) -> Iterator[Tuple[List[AnalysisReport], ArchiveSummary]]:
+        from analyzer.archives import ArchiveLimits, scan_archive
+        limits = ArchiveLimits(
+            max_member_bytes=int(args.archive_member_mb * 1024 * 1024),
+            max_archive_bytes=int(args.archive_max_mb * 1024 * 1024),
+            max_depth=args.archive_depth
+        )
+        if client is not None:
+            # members are read here and sent to the daemon one at a time
+            try:
+                for path in paths:
+                    yield scan_archive(client.analyze_code, path, limits)
+            except DaemonError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        else:
+            yield from analyzer.scan_archives(paths, limits, workers=args.jobs)
+
     reports = []
-    
+    archive_summaries: List[ArchiveSummary] = []
+    # files short-circuited by each tier (tiered mode)
+    tiers = {"prefilter": 0, "full": 0}
+    timings = None
+    if args.timings:
+        from analyzer.instrument import TimingSummary
+        timings = TimingSummary()
+    saver = RunSaver(args.db or "analysis.db", quiet=args.json or args.ndjson) if args.save else None
+
+    manifest = plan = None
+
+    def handle(report: AnalysisReport, fresh: bool = True):
+        # stream output and DB rows as each report arrives; only keep reports
+        # around when the output format needs the whole set at the end
+        if args.ndjson:
+            print_ndjson(report, full=args.full)
+        else:
+            reports.append(report)
+        # reused reports were saved by the scan that produced them
+        if not fresh:
+            return
+        if saver is not None:
+            saver.save(report)
+        if manifest is not None:
+            manifest.record(plan, report)
+        if timings is not None:
+            timings.add(report)
+        tiers["prefilter" if report.prefiltered else "full"] += 1
+
+    def handle_archive(member_reports: List[AnalysisReport], summary: ArchiveSummary):
+        for report in member_reports:
+            handle(report)
+        if args.ndjson:
+            print_ndjson_line(asdict(summary))
+        else:
+            archive_summaries.append(summary)
+        if saver is not None:
+            saver.save_archive(summary)
+
+    # an archive given as the file is scanned like a batch of its members
+    single_archive = False
+    if args.file:
+        from analyzer.archives import is_archive
+        single_archive = is_archive(args.file)
+
     # Batch Processing
-    if args.batch:
-        if not os.path.isdir(args.batch):
+    if args.batch or single_archive:
+        archives: List[str] = []
+        if single_archive:
+            if not os.path.isfile(args.file):
+                print(f"Error: {args.file} not found.")
+                sys.exit(1)
+            paths, archives = [], [args.file]
+        elif not os.path.isdir(args.batch):
             print(f"Error: {args.batch} is not a directory.")
             sys.exit(1)
-            
-        logger.info(f"Starting batch analysis on {args.batch}")
-        for root, _, files in os.walk(args.batch):
-            for file in files:
-                if file.endswith(".py"):
-                    full_path = os.path.join(root, file)
-                    reports.append(process_file(analyzer, full_path))
-        
-        if args.json:
-            print_json_batch(reports)
         else:
-            print_batch_summary(reports)
+            logger.info(f"Starting batch analysis on {args.batch} (jobs={args.jobs})")
+            paths = collect_files(args.batch)
+            if args.archives:
+                from analyzer.archives import collect_archives
+                archives = collect_archives(args.batch)
+        if args.incremental:
+            from analyzer.manifest import Manifest
+            from analyzer.storage import SQLiteStorage
+            fingerprint = client.request("info")["fingerprint"] if client is not None else analyzer.fingerprint
+            manifest = Manifest(SQLiteStorage(args.db or "analysis.db"), fingerprint)
+            plan = manifest.plan(args.batch, paths)
+            for report in manifest.reused(plan):
+                handle(report, fresh=False)
+            paths = plan.changed
+        # an archive counts as one item
+        progress = BatchProgress(len(paths) + len(archives))
+        for report in analyze(paths, jobs=args.jobs):
+            handle(report)
+            progress.update()
+        for member_reports, summary in scan_archives(archives):
+            handle_archive(member_reports, summary)
+            progress.update()
+        progress.close()
+        if manifest is not None:
+            manifest.finish(plan)
+            if args.ndjson:
+                for path in plan.deleted:
+                    print_ndjson_line({"file": path, "deleted": True})
+        
+        # --ndjson already streamed every report
+        if not args.ndjson:
+            if args.json:
+                print_json_batch(reports, deleted=plan.deleted if plan is not None else [], archives=archive_summaries)
+            else:
+                print_batch_summary(reports)
+                if archive_summaries:
+                    print_archive_summary(archive_summaries)
+        # keep stdout machine-readable for --json/--ndjson
+        out = sys.stderr if args.json or args.ndjson else sys.stdout
+        if plan is not None:
+            summary = (f"Incremental: {len(plan.changed)} new or modified files analyzed, "
+                       f"{len(plan.unchanged)} unchanged, {len(plan.deleted)} deleted")
+            logger.info(summary)
+            print(summary, file=out)
+        if args.tiered:
+            summary = f"Tiers: {tiers['prefilter']} files cleared by the prefilter, {tiers['full']} fully analyzed"
+            logger.info(summary)
+            print(summary, file=out)
+        if timings is not None and timings.count:
+            print_timing_summary(timings, out)
+
+    # Watch Mode
+    elif args.watch:
+        if not os.path.isdir(args.watch):
+            print(f"Error: {args.watch} is not a directory.")
+            sys.exit(1)
+        from analyzer.watch import watch_changes
+        if not (args.json or args.ndjson):
+            print(f"Watching {args.watch} for changes (Ctrl+C to stop)")
+        try:
+            # one warm analyzer for the whole session; only changed files are analyzed
+            for batch in watch_changes(args.watch, debounce=args.debounce, poll=args.poll is not None,
+                                       interval=args.poll or 1.0):
+                for report in analyze(batch):
+                    if args.ndjson or args.json:
+                        print_ndjson(report, full=args.full or args.json)
+                    else:
+                        print_watch_line(report)
+                    if saver is not None:
+                        saver.save(report)
+                if saver is not None:
+                    saver.flush()
+        except KeyboardInterrupt:
+            pass
 
     # Single File
     elif args.file:
-        report = process_file(analyzer, args.file)
-        if args.json:
+        (report,) = analyze([args.file])
+        if args.ndjson:
+            print_ndjson(report, full=args.full)
+        elif args.json:
             print_json(report)
         else:
             print_report(report)
-        
-        # for single file mode, if we have reports list populated (we don't for single file logic above unless we refactor), 
-        # let's just add it to list for potential DB saving below
-        reports.append(report)
-
-    # Database Saving
-    if args.save:
-        if not args.db:
-            args.db = "analysis.db" # Default
-        
-        try:
-            from analyzer.storage import SQLiteStorage
-            db = SQLiteStorage(args.db)
-            saved_count = 0
-            for r in reports: 
-                if not r.error:
-                    db.save_run(r)
-                    saved_count += 1
-            
-            logger.info(f"Saved {saved_count} runs to {args.db}")
-            if not args.json:
-                print(f"\n[+] Saved {saved_count} results to database: {args.db}")
-        except Exception as e:
-            logger.error(f"Failed to save to database: {e}")
-            if not args.json:
-                print(f"\n[!] Database Error: {e}")
+            if report.stages:
+                print_stages(report)
+
+        if saver is not None:
+            saver.save(report)
+
+    if saver is not None:
+        saver.close()
+
+    if cache is not None:
+        logger.info(f"Cache stats: {cache.stats()}")
+    if client is not None:
+        client.close()
 
 if __name__ == "__main__":
     main()
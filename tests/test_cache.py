@@ -0,0 +1,19 @@
+from analyzer.cache import ResultCache
+from analyzer.models import AnalysisReport
+from analyzer.storage import SQLiteStorage
+
+def _report(**fields):
+    return AnalysisReport(file_path="a.py", total_score=40, obfuscation_level="MEDIUM", **fields)
+
+def test_partial_report_is_not_stored(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "cache.db"))
+    cache = ResultCache(storage=storage)
+    cache.put("partial", _report(partial=True, skipped_stages=["ast"]))
+    assert cache.get("partial", "a.py") is None
+    # nor in the persistent tier, as seen by a fresh cache on the same database
+    assert ResultCache(storage=storage).get("partial", "a.py") is None
+
+def test_complete_report_is_stored(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "cache.db"))
+    ResultCache(storage=storage).put("complete", _report())
+    assert ResultCache(storage=storage).get("complete", "b.py").file_path == "b.py"
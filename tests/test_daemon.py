@@ -0,0 +1,33 @@
+import asyncio
+from analyzer.budget import AnalysisBudget
+from analyzer.daemon import DaemonClient, DaemonServer
+
+CODE = "import os\nos.system('id')\n"
+
+def _ask_twice(socket_path):
+    client = DaemonClient.connect(socket_path, timeout=30)
+    try:
+        reports = [client.analyze_code(CODE, "a.py") for _ in range(2)]
+        stats = client.request("info")
+        client.request("shutdown")
+    finally:
+        client.close()
+    return reports, stats
+
+def test_partial_report_is_not_cached(tmp_path):
+    socket_path = str(tmp_path / "d.sock")
+    server = DaemonServer(socket_path, analyzer_options={"budget": AnalysisBudget(max_ast_nodes=1)}, workers=1)
+
+    async def main():
+        serving = asyncio.ensure_future(server.serve())
+        while not (tmp_path / "d.sock").exists():
+            await asyncio.sleep(0.05)
+        result = await asyncio.to_thread(_ask_twice, socket_path)
+        await asyncio.wait_for(serving, 10)
+        return result
+
+    reports, stats = asyncio.run(main())
+    assert all(r.partial for r in reports)
+    # the second request is analyzed again rather than served the cut-short result
+    assert stats["cache"]["entries"] == 0
+    assert stats["cache"]["hits"] == 0
@@ -0,0 +1,22 @@
+import os
+import random
+import pytest
+from analyzer.entropy import entropy_profile, window_entropies
+
+pytest.importorskip("numpy")
+
+def _inputs():
+    rng = random.Random(0)
+    text = b"".join(rng.choice([b"def f(x):\n", b"    return x * 2\n", b"import os\n"]) for _ in range(4000))
+    return [os.urandom(200_000), text, text[:1000] + os.urandom(3000) + text[:1000]]
+
+@pytest.mark.parametrize("window,step", [(256, 128), (256, 1), (64, 7)])
+def test_numpy_profile_matches_rolling_engine(window, step):
+    for data in _inputs():
+        offsets, entropies = entropy_profile(data, window, step)
+        expected = list(window_entropies(data, window, step))
+        assert [int(o) for o in offsets] == [o for o, _ in expected]
+        assert list(entropies) == pytest.approx([e for _, e in expected], abs=1e-9)
+
+def test_profile_shorter_than_window():
+    assert entropy_profile(b"abc", 256, 128) == ([], [])
@@ -0,0 +1,25 @@
+import asyncio
+from analyzer.pool import AnalysisPool
+
+SLOW = "x = 1\n" * 200000
+
+def test_cancelled_call_does_not_leak_its_worker():
+    async def main():
+        pool = AnalysisPool(workers=1, timeout=30)
+        pool.start()
+        try:
+            task = asyncio.ensure_future(pool.analyze_text(SLOW, "slow"))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            # the next request must get a fresh worker, not the slow call's late reply
+            report = await asyncio.wait_for(pool.analyze_text("import os\n", "fast"), 20)
+            assert report.file_path == "fast"
+            assert len(pool._all) == 1
+            assert pool.in_flight == 0
+        finally:
+            pool.close()
+    asyncio.run(main())
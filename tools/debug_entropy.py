@@ -1,19 +1,47 @@
 import argparse
-import math
-import collections
+import csv
 import base64
 import zlib
 import binascii
 import sys
 import os
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analyzer.entropy import shannon_entropy, entropy_profile, percentiles, segment_profile
+
+BAND_NAMES = ["plain", "encoded", "packed"]
+
 def calc_entropy(data):
     """Computes Shannon entropy of the byte data."""
-    if not data:
-        return 0.0
-    counter = collections.Counter(data)
-    length = len(data)
-    return -sum((count / length) * math.log2(count / length) for count in counter.values())
+    return shannon_entropy(data)
+
+def export_csv(path, offsets, entropies):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["offset", "entropy"])
+        for offset, e in zip(offsets, entropies):
+            writer.writerow([int(offset), f"{float(e):.4f}"])
+
+def export_png(path, offsets, entropies, window, edges):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("  PNG export requires matplotlib")
+        return False
+    plt.figure(figsize=(12, 4))
+    plt.plot(offsets, entropies, linewidth=0.8)
+    for edge in edges:
+        plt.axhline(edge, color="red", linestyle="--", linewidth=0.6)
+    plt.title(f"Sliding window entropy (window={window})")
+    plt.xlabel("Offset")
+    plt.ylabel("Entropy (bits/byte)")
+    plt.ylim(0, 8)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+    return True
 
 def analyze_layer(label, data, indent=0):
     pre = "  " * indent
@@ -28,6 +56,11 @@ def main():
     parser.add_argument("path", nargs="?", help="Input file path")
     parser.add_argument("--string", "-s", help="Input string to analyze")
     parser.add_argument("--window", "-w", type=int, default=256, help="Sliding window size (default: 256)")
+    parser.add_argument("--step", type=int, default=1, help="Offset between windows (default: 1)")
+    parser.add_argument("--bands", default="4.5,6.0", help="Entropy band edges for region segmentation (default: 4.5,6.0)")
+    parser.add_argument("--min-region", type=int, help="Fold regions shorter than this into their neighbour (default: window size)")
+    parser.add_argument("--csv", help="Export the entropy profile to a CSV file")
+    parser.add_argument("--png", help="Export a plot of the entropy profile (requires matplotlib)")
     args = parser.parse_args()
 
     # Acquire input bytes
@@ -53,17 +86,31 @@ def main():
 
     # 2. Sliding Window Entropy (Summary)
     if len(raw) >= args.window:
-        print(f"\n[SLIDING WINDOW] (size={args.window})")
-        entropies = []
-        # Calculate entropy for each window
-        for i in range(len(raw) - args.window + 1):
-            chunk = raw[i : i + args.window]
-            entropies.append(calc_entropy(chunk))
+        print(f"\n[SLIDING WINDOW] (size={args.window}, step={args.step})")
+        offsets, entropies = entropy_profile(raw, args.window, args.step)
         
-        if entropies:
+        if len(entropies):
+            print(f"  Windows: {len(entropies)}")
             print(f"  Min: {min(entropies):.4f}")
             print(f"  Avg: {sum(entropies) / len(entropies):.4f}")
             print(f"  Max: {max(entropies):.4f}")
+            qs = [5, 25, 50, 75, 95, 99]
+            for q, v in zip(qs, percentiles(entropies, qs)):
+                print(f"  P{q}: {v:.4f}")
+
+            # Region segmentation
+            edges = sorted(float(x) for x in args.bands.split(","))
+            names = BAND_NAMES if len(edges) == len(BAND_NAMES) - 1 else [f"band{i}" for i in range(len(edges) + 1)]
+            min_length = args.window if args.min_region is None else args.min_region
+            print(f"\n[REGIONS] (edges={', '.join(f'{e:g}' for e in edges)})")
+            for start, end, band, peak in segment_profile(offsets, entropies, args.window, edges, min_length):
+                print(f"  {start:>10}-{end:<10} {names[band]:<8} peak {peak:.4f}")
+
+            if args.csv:
+                export_csv(args.csv, offsets, entropies)
+                print(f"\n  Profile written to {args.csv}")
+            if args.png and export_png(args.png, offsets, entropies, args.window, edges):
+                print(f"  Plot written to {args.png}")
     
     # 3. Base64 Check
     # Strip whitespace because validate=True is strict
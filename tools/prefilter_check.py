@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analyzer.core import Analyzer
+from benchmarks.corpus import corpus_files, generate
+
+# Score at which a report stops being LOW; the prefilter must never clear a
+# file that full analysis scores this high
+MEDIUM_SCORE = 20
+
+def collect_files(directory: str):
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(".py"))
+    return paths
+
+def check(paths):
+    """(files cleared by the prefilter, [(path, full score)] for those it should not have cleared)."""
+    tiered = Analyzer(tiered=True)
+    full = Analyzer()
+    cleared = 0
+    missed = []
+    for path in paths:
+        if not tiered.analyze_file(path).prefiltered:
+            continue
+        cleared += 1
+        report = full.analyze_file(path)
+        if report.total_score >= MEDIUM_SCORE:
+            missed.append((path, report.total_score))
+    return cleared, missed
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that tiered mode's prefilter never clears a file full analysis scores MEDIUM or higher.")
+    parser.add_argument("dirs", nargs="*", help="Extra directories of .py files to check (e.g. a stdlib checkout)")
+    parser.add_argument("--count", "-n", type=int, default=300, help="Benchmark corpus files to generate (default: 300)")
+    parser.add_argument("--seed", type=int, default=0, help="Benchmark corpus seed (default: 0)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="prefilter-corpus-") as corpus_dir:
+        generate(corpus_dir, args.count, seed=args.seed)
+        paths = collect_files(os.path.join(ROOT, "samples")) + corpus_files(corpus_dir)
+        for directory in args.dirs:
+            paths += collect_files(directory)
+        cleared, missed = check(paths)
+
+    print(f"{len(paths)} files: {cleared} cleared by the prefilter, {len(paths) - cleared} fully analyzed")
+    if missed:
+        print(f"\n[!] Cleared by the prefilter but scored {MEDIUM_SCORE}+ in full:")
+        for path, score in missed:
+            print(f"  {score:3d}  {path}")
+        sys.exit(1)
+    print("\n[+] No MEDIUM or HIGH file was cleared")
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,6 @@ import argparse
 import os
 import sys
 from collections import Counter
-import matplotlib.pyplot as plt
 
 def generate_report(db_path, out_dir):
     if not os.path.exists(db_path):
@@ -42,7 +41,16 @@ def generate_report(db_path, out_dir):
     for t, c in top_techniques:
         print(f"  {t}: {c}")
 
-    # 3. Charts
+    # 3. Charts (matplotlib is only imported once there is something to plot)
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("\nCharts require matplotlib")
+        conn.close()
+        return
+
     # Histogram of Scores
     plt.figure(figsize=(10, 6))
     plt.hist(scores, bins=20, color='skyblue', edgecolor='black')
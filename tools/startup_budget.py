@@ -0,0 +1,104 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget in ms for `import cli`, best of several `python -X importtime` runs.
+# Raise it deliberately, not to make a failing check pass.
+BUDGET_MS = 100
+
+# Modules the single-file CLI path must not import up front
+FORBIDDEN = [
+    "rich",
+    "sqlite3",
+    "matplotlib",
+    "numpy",
+    "analyzer.storage",
+    "analyzer.cache",
+    "analyzer.parallel",
+    "analyzer.pool",
+    "importlib.metadata",
+    "logging.handlers",
+    "hashlib",
+    "bz2",
+    "lzma",
+]
+
+LINE = re.compile(r'import time:\s+(\d+)\s*\|\s+(\d+)\s*\|(\s*)(\S+)')
+
+def measure(target: str):
+    """[(module, self_us, cumulative_us, depth)] for one interpreter importing target."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+def imported_by(rows, target: str):
+    """The rows for target and everything imported beneath it.
+
+    importtime lists a module after its nested imports, one level deeper,
+    so these are the rows just before target's top-level row. Modules that
+    site or .pth hooks loaded earlier appear elsewhere and don't count.
+    """
+    end = next((i for i, (name, _, _, depth) in enumerate(rows) if name == target and depth == 0), None)
+    if end is None:
+        return []
+    start = end
+    while start > 0 and rows[start - 1][3] > 0:
+        start -= 1
+    return rows[start:end + 1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI startup (import time and eagerly loaded modules) against a budget.")
+    parser.add_argument("--target", default="cli", help="Module to import (default: cli)")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help=f"Cumulative import time allowed (default: {BUDGET_MS})")
+    parser.add_argument("--runs", type=int, default=5, help="Measurements to take; the fastest counts (default: 5)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list (default: 10)")
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(args.runs):
+        try:
+            rows = measure(args.target)
+        except RuntimeError as e:
+            print(f"Error: importing {args.target} failed: {e}")
+            sys.exit(1)
+        rows = imported_by(rows, args.target)
+        if rows and (best is None or rows[-1][2] < best[0]):
+            best = (rows[-1][2], rows)
+    if best is None:
+        print(f"Error: no import time reported for {args.target}")
+        sys.exit(1)
+
+    total, rows = best
+    loaded = {name for name, _, _, _ in rows}
+    print(f"import {args.target}: {total / 1000:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    print("\nSlowest modules (self time):")
+    for name, self_us, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:6.1f} ms  {name}")
+
+    failed = False
+    eager = [name for name in FORBIDDEN if name in loaded]
+    if eager:
+        failed = True
+        print(f"\n[!] Loaded at startup but should be lazy: {', '.join(eager)}")
+    if total / 1000 > args.budget_ms:
+        failed = True
+        print(f"\n[!] Over budget by {total / 1000 - args.budget_ms:.1f} ms")
+    if failed:
+        sys.exit(1)
+    print("\n[+] Startup within budget")
+
+if __name__ == "__main__":
+    main()